@@ -13,22 +13,1477 @@ Features:
 - Sortierung und Filterung
 """
 
+import time
+_T_START = time.perf_counter()  # Startzeit-Messung: vor allen anderen Imports
+
 import os
 import re
+import sys
+import io
 import csv
+import json
+import bisect
+import hashlib
+import math
+import queue
 import sqlite3
+import threading
 import tkinter as tk
+from array import array
 from tkinter import ttk, filedialog, messagebox
-from datetime import datetime
-from typing import Optional, List, Tuple, Any
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional, List, Tuple, Any, Callable, Dict, Iterable, Sequence
+
+_T_IMPORTED = time.perf_counter()
 
 APP_TITLE = "SQLite Viewer Pro"
 APP_VERSION = "2.0.0"
 DEFAULT_LIMIT = 1000
+UI_POLL_MS = 50
+PROGRESS_STEPS = 10_000  # VM-Instruktionen zwischen zwei Progress-Handler-Aufrufen
+SNAPSHOT_TICK_MS = 1000  # Aktualisierung der Snapshot-Altersanzeige
+SNAPSHOT_COUNT_RETRY_MS = 500  # abgebrochenes COUNT im Snapshot so viel später nachholen
+EXPORT_BATCH = 5000      # Zeilen pro Schritt beim Export der ganzen Tabelle
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".sqliteviewer")  # Verlauf, Cache
+
+
+def connect_readonly(path: str) -> sqlite3.Connection:
+    """Öffnet eine Datenbank schreibgeschützt (URI mode=ro)."""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+class BackgroundTask:
+    """Fortschritt und Abbruch eines Hintergrund-Jobs (über set_progress_handler)."""
+
+    def __init__(self):
+        self.cancelled = False
+        self.steps = 0
+        self.fraction = 0.0  # Anteil 0..1, falls der Job seinen Fortschritt selbst kennt
+        self.started = time.perf_counter()
+
+    def progress_handler(self) -> int:
+        # Läuft im Worker-Thread; ein Rückgabewert != 0 bricht die Anweisung ab
+        self.steps += PROGRESS_STEPS
+        return 1 if self.cancelled else 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+# ==================== TABLE META / FILTER ====================
+@dataclass
+class TableMeta:
+    """Spalten, Typen und Indizes einer Tabelle (aus PRAGMA table_info/index_list)."""
+    name: str
+    columns: List[str]
+    types: List[str]
+    pk: List[str] = field(default_factory=list)
+    indexes: Dict[str, List[str]] = field(default_factory=dict)
+    has_rowid: bool = True
+
+    def affinity(self, column: str) -> str:
+        return column_affinity(self.types[self.columns.index(column)])
+
+    def rowid_alias(self) -> Optional[str]:
+        """INTEGER PRIMARY KEY Spalte (Alias für rowid), falls vorhanden."""
+        if self.has_rowid and len(self.pk) == 1:
+            col = self.pk[0]
+            if self.types[self.columns.index(col)].upper() == "INTEGER":
+                return col
+        return None
+
+    def rowid_name(self) -> Optional[str]:
+        """Name, unter dem die rowid ansprechbar ist (falls nicht von Spalten verdeckt)."""
+        if not self.has_rowid:
+            return None
+        taken = {c.lower() for c in self.columns}
+        for name in ("rowid", "_rowid_", "oid"):
+            if name not in taken:
+                return name
+        return None
+
+    def index_paths(self) -> Dict[str, List[str]]:
+        """Alle Indizes inkl. rowid-Alias als Spaltenliste (führende Spalte zuerst)."""
+        paths = dict(self.indexes)
+        alias = self.rowid_alias()
+        if alias:
+            paths.setdefault("PRIMARY KEY", [alias])
+        return paths
+
+    def indexed_columns(self) -> set:
+        """Spalten, die als führende Indexspalte eine Suche/Sortierung beschleunigen."""
+        return {cols[0] for cols in self.index_paths().values() if cols}
+
+
+def load_table_meta(conn: sqlite3.Connection, table: str,
+                    ident: Callable[[str], str]) -> TableMeta:
+    """Liest Spalten, Primärschlüssel und (nicht-partielle) Indizes einer Tabelle."""
+    info = conn.execute(f"PRAGMA table_info({ident(table)})").fetchall()
+    pk = [row[1] for row in sorted((r for r in info if r[5]), key=lambda r: r[5])]
+
+    indexes: Dict[str, List[str]] = {}
+    for idx in conn.execute(f"PRAGMA index_list({ident(table)})").fetchall():
+        name, partial = idx[1], idx[4]
+        if partial:
+            continue  # partielle Indizes decken nicht jede Abfrage ab
+        cols = []
+        for row in conn.execute(f"PRAGMA index_info({ident(name)})").fetchall():
+            if row[2] is None:
+                break  # Ausdrucks-Index: nur die Spalten davor sind nutzbar
+            cols.append(row[2])
+        if cols:
+            indexes[name] = cols
+
+    sql_row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchone()
+    has_rowid = not (sql_row and sql_row[0]
+                     and re.search(r"\bWITHOUT\s+ROWID\b", sql_row[0], re.IGNORECASE))
+
+    return TableMeta(
+        name=table,
+        columns=[row[1] for row in info],
+        types=[row[2] or "" for row in info],
+        pk=pk,
+        indexes=indexes,
+        has_rowid=has_rowid,
+    )
+
+
+def column_affinity(decl_type: str) -> str:
+    """Typ-Affinität nach den SQLite-Regeln (Datatypes, Abschnitt 3.1)."""
+    t = (decl_type or "").upper()
+    if "INT" in t:
+        return "INTEGER"
+    if "CHAR" in t or "CLOB" in t or "TEXT" in t:
+        return "TEXT"
+    if "BLOB" in t or not t:
+        return "BLOB"
+    if "REAL" in t or "FLOA" in t or "DOUB" in t:
+        return "REAL"
+    return "NUMERIC"
+
+
+class FilterError(ValueError):
+    """Ungültiger Spaltenfilter."""
+
+
+_FILTER_OPS = (">=", "<=", "!=", "<>", "=", ">", "<")
+_EQ_KINDS = {"=", "in", "null"}
+_RANGE_KINDS = {"<", "<=", ">", ">=", "between", "prefix"}
+
+
+def _unquote_filter(value: str) -> Optional[str]:
+    """Inhalt eines in '…' oder "…" gequoteten Filterwerts, sonst None."""
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return None
+
+
+def _split_unquoted(text: str, sep: str, maxsplit: int = -1) -> List[str]:
+    """Teilt text an sep, aber nicht innerhalb von '…' oder "…"."""
+    parts, start, quote, i = [], 0, None, 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif text.startswith(sep, i) and maxsplit != len(parts):
+            parts.append(text[start:i])
+            i += len(sep)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _filter_value(raw: str, affinity: str) -> Any:
+    """Wandelt einen Filterwert passend zur Spalten-Affinität um."""
+    value = raw.strip()
+    quoted = _unquote_filter(value)
+    if quoted is not None:
+        return quoted  # explizit als Text gequotet
+    # Auch ohne Typ (BLOB-Affinität) als Zahl: dort gespeicherte Zahlen bleiben
+    # Zahlen und träfen einen Text-Parameter nie; Text lässt sich quoten
+    if affinity in ("INTEGER", "REAL", "NUMERIC", "BLOB"):
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    return value
+
+
+def parse_filter(text: str, affinity: str) -> Tuple[str, List[Any]]:
+    """
+    Zerlegt einen Spaltenfilter in (Operator, Werte).
+
+    Syntax:  NULL | !NULL | =v | !=v | <v | <=v | >v | >=v
+             a..b (Bereich, offene Enden erlaubt) | abc* (Präfix)
+             a, b, c (IN-Liste) | v (Gleichheit)
+    Werte in '…' oder "…" sind Text; '..', ',' und '*' darin zählen nicht.
+    """
+    text = text.strip()
+    upper = text.upper()
+    if upper in ("NULL", "IS NULL"):
+        return "null", []
+    if upper in ("!NULL", "NOT NULL", "IS NOT NULL"):
+        return "notnull", []
+    for op in _FILTER_OPS:
+        if text.startswith(op):
+            value = text[len(op):]
+            if not value.strip():
+                raise FilterError(f"Wert fehlt nach '{op}'")
+            return ("!=" if op == "<>" else op), [_filter_value(value, affinity)]
+    bounds = _split_unquoted(text, "..", 1)
+    if len(bounds) == 2:
+        low, high = bounds
+        if low.strip() and high.strip():
+            return "between", [_filter_value(low, affinity), _filter_value(high, affinity)]
+        if low.strip():
+            return ">=", [_filter_value(low, affinity)]
+        if high.strip():
+            return "<=", [_filter_value(high, affinity)]
+        raise FilterError("Bereich ohne Grenzen")
+    if text.endswith("*") and len(text) > 1:
+        quoted = _unquote_filter(text[:-1].strip())
+        return "prefix", [text[:-1] if quoted is None else quoted]
+    values = _split_unquoted(text, ",")
+    if len(values) > 1:
+        values = [_filter_value(v, affinity) for v in values if v.strip()]
+        if not values:
+            raise FilterError("Leere IN-Liste")
+        return "in", values
+    return "=", [_filter_value(text, affinity)]
+
+
+def _prefix_predicate(expr: str, prefix: str, affinity: str) -> Tuple[str, List[Any]]:
+    """
+    Präfix als Bereich formulieren, damit ein Index auf expr nutzbar bleibt.
+
+    Nur bei TEXT-Affinität: in Spalten ohne Typ (BLOB) liegen auch Zahlen,
+    die vor jedem Text sortieren und der Bereich nie träfe; dort GLOB.
+    """
+    if affinity == "TEXT" and prefix and ord(prefix[-1]) < sys.maxunicode:
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return f"({expr} >= ? AND {expr} < ?)", [prefix, upper]
+    escaped = re.sub(r"([*?\[])", r"[\1]", prefix)
+    return f"{expr} GLOB ?", [escaped + "*"]
+
+
+def compile_predicate(expr: str, op: str, values: List[Any], affinity: str) -> Tuple[str, List[Any]]:
+    """Erzeugt eine parametrisierte WHERE-Bedingung für einen geparsten Filter."""
+    if op == "null":
+        return f"{expr} IS NULL", []
+    if op == "notnull":
+        return f"{expr} IS NOT NULL", []
+    if op == "between":
+        return f"{expr} BETWEEN ? AND ?", list(values)
+    if op == "prefix":
+        return _prefix_predicate(expr, values[0], affinity)
+    if op == "in":
+        marks = ", ".join("?" for _ in values)
+        return f"{expr} IN ({marks})", list(values)
+    return f"{expr} {op} ?", list(values)
+
+
+def compile_filters(filters: Dict[str, str], exprs: Dict[str, Tuple[str, str]],
+                    indexes: Dict[str, List[str]]) -> Tuple[List[str], List[Any], Optional[str]]:
+    """
+    Übersetzt Spaltenfilter in WHERE-Bedingungen.
+
+    Args:
+        filters: Spalte -> Filtertext
+        exprs: Spalte -> (SQL-Ausdruck, Affinität)
+        indexes: Indexname -> Spalten (führende zuerst)
+
+    Returns:
+        (Bedingungen, Parameter, Name des passenden Index oder None).
+        Die Bedingungen stehen in der Reihenfolge des am besten passenden
+        Index: Gleichheiten auf den führenden Spalten, dann ein Bereich,
+        danach alle übrigen Filter.
+    """
+    parsed: Dict[str, Tuple[str, List[Any]]] = {}
+    for col, text in filters.items():
+        if not text.strip():
+            continue
+        if col not in exprs:
+            raise FilterError(f"Unbekannte Spalte: {col}")
+        try:
+            parsed[col] = parse_filter(text, exprs[col][1])
+        except FilterError as e:
+            raise FilterError(f"{col}: {e}") from None
+
+    # Index wählen: möglichst viele führende Gleichheiten, dann ein Bereich
+    best_name, best_cols, best_score = None, [], 0
+    for name, cols in indexes.items():
+        used, score = [], 0
+        for col in cols:
+            kind = parsed.get(col, ("", []))[0]
+            if kind in _EQ_KINDS:
+                used.append(col)
+                score += 2
+                continue
+            if kind in _RANGE_KINDS:
+                used.append(col)
+                score += 1
+            break
+        if score > best_score:
+            best_name, best_cols, best_score = name, used, score
+
+    def rank(col):
+        kind = parsed[col][0]
+        return 0 if kind in _EQ_KINDS else 1 if kind in _RANGE_KINDS else 2
+
+    order = best_cols + sorted((c for c in parsed if c not in best_cols), key=rank)
+    clauses, params = [], []
+    for col in order:
+        op, values = parsed[col]
+        expr, affinity = exprs[col]
+        clause, args = compile_predicate(expr, op, values, affinity)
+        clauses.append(clause)
+        params.extend(args)
+    return clauses, params, best_name
+
+
+# ==================== JSON ====================
+JSON_SAMPLE_ROWS = 1000  # Stichprobe, aus der Pfade vorgeschlagen werden
+JSON_TREE_LIMIT = 20000  # maximal angezeigte Knoten im Zell-Inspektor
+_JSON_PATH_RE = re.compile(r'^\$(?:\.[A-Za-z_$][\w$]*|\."[^"]*"|\[(?:\d+|\*|#-\d+)\])*$')
+
+
+def _sql_string(text: str) -> str:
+    """SQL-Stringliteral (für JSON-Pfade, die Teil eines Ausdrucks sind)."""
+    return "'" + text.replace("'", "''") + "'"
+
+
+@dataclass(frozen=True)
+class JsonColumn:
+    """
+    Virtuelle Spalte: ein JSON-Pfad in einer Textspalte.
+
+    Ausgewertet wird ausschließlich in SQLite (json_extract bzw. json_each
+    für Pfade mit [*]), Dokumente werden nie nach Python geholt.
+    """
+    source: str
+    path: str
+
+    def __post_init__(self):
+        if not _JSON_PATH_RE.match(self.path) or self.path.count("[*]") > 1:
+            raise FilterError(f"Ungültiger JSON-Pfad: {self.path}")
+
+    @property
+    def name(self) -> str:
+        """Spaltenname im Grid, z.B. payload.user.name oder payload.tags[*]."""
+        return self.source + self.path[1:]
+
+    @property
+    def each(self) -> bool:
+        return "[*]" in self.path
+
+    def _element(self) -> Tuple[str, str]:
+        """(Pfad des Arrays, Ausdruck je Element) für Pfade mit [*]."""
+        base, _, rest = self.path.partition("[*]")
+        return base, "value" if not rest else f"json_extract(value, {_sql_string('$' + rest)})"
+
+    def expr(self, ident: Callable[[str], str]) -> str:
+        """Ausdruck für SELECT und ORDER BY; Arrays als kommagetrennte Liste."""
+        col = ident(self.source)
+        if not self.each:
+            return f"json_extract({col}, {_sql_string(self.path)})"
+        base, element = self._element()
+        return f"(SELECT group_concat({element}, ', ') FROM json_each({col}, {_sql_string(base)}))"
+
+    def predicate(self, ident: Callable[[str], str], op: str, values: List[Any]) -> Tuple[str, List[Any]]:
+        """WHERE-Bedingung; bei [*] genügt ein passendes Array-Element (EXISTS über json_each)."""
+        if not self.each:
+            return compile_predicate(self.expr(ident), op, values, "NUMERIC")
+        base, element = self._element()
+        clause, params = compile_predicate(element, op, values, "NUMERIC")
+        return (f"EXISTS (SELECT 1 FROM json_each({ident(self.source)}, {_sql_string(base)}) "
+                f"WHERE {clause})", params)
+
+
+def discover_json_paths(conn: sqlite3.Connection, table_sql: str, col_sql: str,
+                        sample: int = JSON_SAMPLE_ROWS) -> List[Tuple[str, str, int]]:
+    """
+    Häufigste Blatt-Pfade einer JSON-Spalte als (Pfad, JSON-Typ, Vorkommen).
+
+    json_tree läuft in SQLite über eine Stichprobe; nach Python kommen nur
+    die gruppierten Pfade. Array-Indizes werden zu [*] zusammengefasst.
+    """
+    rows = conn.execute(
+        f"SELECT t.fullkey, t.type, COUNT(*) FROM "
+        f"(SELECT {col_sql} AS doc FROM {table_sql} WHERE json_valid({col_sql}) LIMIT ?) AS s, "
+        f"json_tree(s.doc) AS t WHERE t.type NOT IN ('object', 'array') "
+        f"GROUP BY t.fullkey, t.type", (sample,)
+    ).fetchall()
+    merged: Dict[Tuple[str, str], int] = {}
+    for path, kind, count in rows:
+        key = (re.sub(r"\[\d+\]", "[*]", path, count=1), kind)
+        merged[key] = merged.get(key, 0) + count
+    return sorted(((p, k, n) for (p, k), n in merged.items()), key=lambda r: (-r[2], r[0]))
+
+
+# ==================== KEYSET PAGING ====================
+def keyset_predicate(exprs: List[str], values: Tuple, desc: bool,
+                     inclusive: bool = False) -> List[Tuple[str, List[Any]]]:
+    """
+    Bedingungen "liegt in Scanrichtung hinter values" für ORDER BY exprs.
+
+    Nur die erste Spalte (Sortierspalte) darf NULL sein; SQLite sortiert
+    NULL bei ASC zuerst und bei DESC zuletzt. Die übrigen Schlüssel
+    (rowid bzw. Primärschlüssel) sind nie NULL und machen die Ordnung eindeutig.
+
+    Returns:
+        Segmente (Bedingung, Parameter) in Scanreihenfolge. Jedes ist ein
+        reiner Zeilenwert- bzw. IS-NULL-Vergleich, damit SQLite per Index
+        einsteigen kann; ein OR über NULL- und Nicht-NULL-Bereich würde
+        zum Scan. Der Aufrufer fragt sie nacheinander ab, bis die Seite voll ist.
+    """
+    op = ("<" if desc else ">") + ("=" if inclusive else "")
+    first, rest = exprs[0], exprs[1:]
+    if not rest:
+        return [(f"{first} {op} ?", [values[0]])]
+
+    def row(items):
+        return items[0] if len(items) == 1 else f"({', '.join(items)})"
+
+    if values[0] is None:
+        tail = f"{first} IS NULL AND {row(rest)} {op} {row(['?'] * len(rest))}"
+        segments = [(tail, list(values[1:]))]
+        if not desc:
+            segments.append((f"{first} IS NOT NULL", []))  # nach den NULLs folgen alle Werte
+        return segments
+
+    # Zeilenwert-Vergleich schließt NULL in der ersten Spalte aus (Ergebnis NULL)
+    segments = [(f"{row(exprs)} {op} {row(['?'] * len(exprs))}", list(values))]
+    if desc:
+        segments.append((f"{first} IS NULL", []))  # absteigend stehen die NULLs am Ende
+    return segments
+
+
+def plan_page(nav: str, exprs: List[str], desc: bool,
+              first_key: Optional[Tuple], last_key: Optional[Tuple],
+              jump_value: Any = None) -> Tuple[List[Tuple[Optional[str], List[Any]]], bool, bool]:
+    """
+    Bestimmt Zusatzbedingungen und Scanrichtung für eine Seitennavigation.
+
+    Returns:
+        (Segmente (Bedingung oder None, Parameter) in Scanreihenfolge,
+         absteigend scannen, Zeilen umdrehen)
+    """
+    if nav == "next" and last_key is not None:
+        return keyset_predicate(exprs, last_key, desc), desc, False
+    if nav == "prev" and first_key is not None:
+        return keyset_predicate(exprs, first_key, not desc), not desc, True
+    if nav == "current" and first_key is not None:
+        return keyset_predicate(exprs, first_key, desc, inclusive=True), desc, False
+    if nav == "last":
+        return [(None, [])], not desc, True
+    if nav == "jump":
+        first = exprs[0]
+        if jump_value is None:
+            # NULL steht bei ASC am Anfang, bei DESC am Ende
+            return ([(f"{first} IS NULL", [])] if desc else [(None, [])]), desc, False
+        if desc:
+            return [(f"{first} <= ?", [jump_value]), (f"{first} IS NULL", [])], desc, False
+        return [(f"{first} >= ?", [jump_value])], desc, False
+    return [(None, [])], desc, False
+
+
+def needs_temp_sort(conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()) -> bool:
+    """True, wenn SQLite für das ORDER BY selbst sortiert (kein passender Index)."""
+    try:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error:
+        return False
+    return any("TEMP B-TREE" in str(row[-1]) and "ORDER BY" in str(row[-1]) for row in plan)
+
+
+# ==================== RESULT BUFFER ====================
+def _type_rank(value: Any) -> int:
+    """Rang eines Werts in der SQLite-Sortierung: NULL < Zahl < Text < BLOB."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    return 3
+
+
+class _ArrayColumn:
+    """INTEGER- bzw. REAL-Spalte als typisiertes array plus optionaler NULL-Maske."""
+
+    def __init__(self, typecode: str, values: Sequence):
+        self.nulls = bytearray(v is None for v in values) if None in values else None
+        self.data = array(typecode, (0 if v is None else v for v in values))
+
+    def __getitem__(self, i: int) -> Any:
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return self.data[i]
+
+    def sort_key(self) -> Callable[[int], Any]:
+        if self.nulls is None:
+            return self.data.__getitem__
+        return [(0, 0) if null else (1, v) for null, v in zip(self.nulls, self.data)].__getitem__
+
+    def text_mask(self, term: str) -> bytearray:
+        nulls = self.nulls or bytearray(len(self.data))
+        return bytearray(not null and term in str(v) for null, v in zip(nulls, self.data))
+
+
+class _DictTextColumn:
+    """TEXT-Spalte mit wenigen verschiedenen Werten: Codes + einmal gespeicherte Strings."""
+
+    def __init__(self, values: Sequence, distinct: List[str]):
+        self.values = distinct
+        lookup = {v: i for i, v in enumerate(distinct)}
+        self.codes = array("I", (lookup.get(v, 0) for v in values))
+        self.nulls = bytearray(v is None for v in values) if None in values else None
+
+    def __getitem__(self, i: int) -> Any:
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return self.values[self.codes[i]]
+
+    def sort_key(self) -> Callable[[int], Any]:
+        # Rang jedes Wörterbuch-Eintrags einmal bestimmen statt Strings zu vergleichen
+        rank = array("q", bytes(8 * len(self.values)))
+        for pos, code in enumerate(sorted(range(len(self.values)), key=self.values.__getitem__)):
+            rank[code] = pos
+        keys = array("q", (rank[c] for c in self.codes))
+        if self.nulls is not None:
+            for i, null in enumerate(self.nulls):
+                if null:
+                    keys[i] = -1
+        return keys.__getitem__
+
+    def text_mask(self, term: str) -> bytearray:
+        hits = bytearray(term in v.lower() for v in self.values)
+        nulls = self.nulls or bytearray(len(self.codes))
+        return bytearray(not null and hits[c] for null, c in zip(nulls, self.codes))
+
+
+class _PackedTextColumn:
+    """TEXT-Spalte mit vielen verschiedenen Werten: ein String + Offsets."""
+
+    def __init__(self, values: Sequence):
+        self.nulls = bytearray(v is None for v in values) if None in values else None
+        texts = ["" if v is None else v for v in values]
+        self.offsets = array("Q", [0])
+        pos = 0
+        for t in texts:
+            pos += len(t)
+            self.offsets.append(pos)
+        self.text = "".join(texts)
+
+    def __getitem__(self, i: int) -> Any:
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return self.text[self.offsets[i]:self.offsets[i + 1]]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def sort_key(self) -> Callable[[int], Any]:
+        # Strings erst beim Sortieren ausschneiden: sorted() hält sie nur
+        # vorübergehend, gespeichert bleibt allein der gepackte Text
+        text, offsets, nulls = self.text, self.offsets, self.nulls
+        if nulls is None:
+            return lambda i: text[offsets[i]:offsets[i + 1]]
+        return lambda i: (0, "") if nulls[i] else (1, text[offsets[i]:offsets[i + 1]])
+
+    def text_mask(self, term: str) -> bytearray:
+        return bytearray(v is not None and term in v.lower()
+                         for v in (self[i] for i in range(len(self))))
+
+
+class _ObjectColumn:
+    """Spalte mit gemischten Typen (oder BLOBs): bleibt eine Python-Liste."""
+
+    def __init__(self, values: Sequence):
+        self.data = list(values)
+
+    def __getitem__(self, i: int) -> Any:
+        return self.data[i]
+
+    def sort_key(self) -> Callable[[int], Any]:
+        return [(_type_rank(v), v) for v in self.data].__getitem__
+
+    def text_mask(self, term: str) -> bytearray:
+        return bytearray(isinstance(v, (int, float, str)) and term in str(v).lower()
+                         for v in self.data)
+
+
+def _pack_column(values: Sequence):
+    """Wählt die kompakteste Darstellung für die Werte einer Spalte."""
+    kinds = {type(v) for v in values if v is not None}
+    if kinds == {int}:
+        try:
+            return _ArrayColumn("q", values)
+        except OverflowError:
+            return _ObjectColumn(values)
+    if kinds == {float}:
+        return _ArrayColumn("d", values)
+    if kinds == {str}:
+        distinct = {v for v in values if v is not None}
+        if len(distinct) <= len(values) // 2:
+            return _DictTextColumn(values, sorted(distinct))
+        return _PackedTextColumn(values)
+    return _ObjectColumn(values)
+
+
+class ResultBuffer:
+    """
+    Spaltenweiser Speicher für ein geladenes Ergebnis.
+
+    Einzige Quelle für Grid-Anzeige, CSV-Export und Sortierung/Suche im
+    Speicher: Zahlen liegen in typisierten arrays, Text wörterbuchkodiert
+    oder in einem gepackten String. Sortierschlüssel werden pro Spalte
+    einmal berechnet und wiederverwendet; gepackter Text liefert sie beim
+    Sortieren aus dem gepackten String, ohne eine Kopie aufzuheben.
+    """
+
+    def __init__(self, columns: List[str], rows: Sequence[Sequence]):
+        self.columns = list(columns)
+        self.row_count = len(rows)
+        if rows:
+            self._cols = [_pack_column(col) for col in zip(*rows)]
+        else:
+            self._cols = [_ObjectColumn([]) for _ in self.columns]
+        self._keys: Dict[int, Callable[[int], Any]] = {}
+        self._sort: Optional[Tuple[int, bool]] = None
+        self._search = ""
+        self.order: Sequence[int] = range(self.row_count)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def row(self, i: int) -> Tuple:
+        """Zeile i in Ladereihenfolge."""
+        return tuple(col[i] for col in self._cols)
+
+    def iter_rows(self):
+        """Zeilen in aktueller Sortierung, nach Suchbegriff gefiltert."""
+        cols = self._cols
+        for i in self.order:
+            yield tuple(col[i] for col in cols)
+
+    def sort(self, col_index: Optional[int], reverse: bool = False):
+        """Sortiert im Speicher (None = Ladereihenfolge)."""
+        self._sort = None if col_index is None else (col_index, reverse)
+        self._refresh_order()
+
+    def search(self, term: str):
+        """Behält nur Zeilen, in denen eine Spalte term enthält (wie LIKE '%term%')."""
+        self._search = term.lower()
+        self._refresh_order()
+
+    def _refresh_order(self):
+        order: Sequence[int] = range(self.row_count)
+        if self._sort is not None:
+            col_index, reverse = self._sort
+            key = self._keys.get(col_index)
+            if key is None:
+                key = self._keys[col_index] = self._cols[col_index].sort_key()
+            order = array("L", sorted(order, key=key, reverse=reverse))
+        if self._search:
+            mask = bytearray(self.row_count)
+            for col in self._cols:
+                for i, hit in enumerate(col.text_mask(self._search)):
+                    if hit:
+                        mask[i] = 1
+            order = array("L", (i for i in order if mask[i]))
+        self.order = order
+
+
+# ==================== AUSWAHL / KOPIEREN ====================
+COPY_BATCH = 2000  # Zeilen pro Schritt beim Kopieren in die Zwischenablage
+COPY_FORMATS = {"tsv": "TSV", "markdown": "Markdown", "insert": "INSERT"}
+
+
+class RowSelection:
+    """
+    Zeilenauswahl als disjunkte rowid-Bereiche statt Treeview-Items.
+
+    all=True steht für alle Zeilen der Tabelle (mit Suche und Filtern),
+    ohne dass dafür ein einziges Item markiert oder geladen wird.
+    """
+
+    def __init__(self):
+        self.all = False
+        self.ranges: List[Tuple[int, int]] = []
+
+    def __bool__(self) -> bool:
+        return self.all or bool(self.ranges)
+
+    def clear(self):
+        self.all = False
+        self.ranges = []
+
+    def set_ids(self, ids: Iterable[int]):
+        """Übernimmt einzelne rowids; aufeinanderfolgende werden zu Bereichen zusammengefasst."""
+        self.all = False
+        ranges: List[List[int]] = []
+        for rowid in sorted(set(ids)):
+            if ranges and rowid == ranges[-1][1] + 1:
+                ranges[-1][1] = rowid
+            else:
+                ranges.append([rowid, rowid])
+        self.ranges = [(lo, hi) for lo, hi in ranges]
+
+    def count(self) -> Optional[int]:
+        """Anzahl ausgewählter Zeilen (None bei "alle")."""
+        return None if self.all else sum(hi - lo + 1 for lo, hi in self.ranges)
+
+
+def selection_sql(rowid: str, select: str, table_sql: str, order: str) -> str:
+    """
+    Liest die Zeilen einer Bereichsauswahl (Parameter: JSON-Liste [[lo, hi], …]).
+
+    Die Bereiche werden erst in SQLite zu einzelnen rowids aufgefaltet;
+    jede Zeile wird per rowid gesucht, sortiert wie im Grid.
+    """
+    return ("WITH RECURSIVE _sel_ranges(lo, hi) AS ("
+            "SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)), "
+            "_sel_ids(id, hi) AS (SELECT lo, hi FROM _sel_ranges "
+            "UNION ALL SELECT id + 1, hi FROM _sel_ids WHERE id < hi) "
+            f"SELECT {select} FROM {table_sql} WHERE {rowid} IN (SELECT id FROM _sel_ids) ORDER BY {order}")
+
+
+def sql_literal(value: Any) -> str:
+    """SQL-Literal für INSERT-Anweisungen."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, int):
+        return str(int(value))
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NULL"
+        if math.isinf(value):
+            return "9e999" if value > 0 else "-9e999"
+        return repr(value)
+    if isinstance(value, bytes):
+        return f"X'{value.hex().upper()}'"
+    return _sql_string(str(value))
+
+
+def _markdown_cell(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bytes):
+        return f"[BLOB {len(value)} bytes]"
+    return str(value).replace("|", "\\|").replace("\r\n", "<br>").replace("\n", "<br>")
+
+
+def copy_chunk(fmt: str, columns: List[str], rows: Sequence[Sequence],
+               header: bool = False, insert_into: str = "") -> str:
+    """
+    Serialisiert einen Block Zeilen für die Zwischenablage.
+
+    fmt: "tsv", "markdown" oder "insert"; header stellt Spaltenköpfe voran
+    (nur TSV/Markdown), insert_into ist 'INSERT INTO t (a, b)'.
+    """
+    if fmt == "tsv":
+        buf = io.StringIO()
+        writer = csv.writer(buf, delimiter="\t", lineterminator="\n")
+        if header:
+            writer.writerow(columns)
+        writer.writerows(["" if v is None else v.hex() if isinstance(v, bytes) else v for v in row]
+                         for row in rows)
+        return buf.getvalue()
+    lines = []
+    if fmt == "markdown":
+        if header:
+            lines.append("| " + " | ".join(_markdown_cell(c) for c in columns) + " |")
+            lines.append("|" + " --- |" * len(columns))
+        lines.extend("| " + " | ".join(_markdown_cell(v) for v in row) + " |" for row in rows)
+    else:
+        lines.extend(f"{insert_into} VALUES ({', '.join(sql_literal(v) for v in row)});" for row in rows)
+    return "".join(line + "\n" for line in lines)
+
+
+# ==================== ZEITREIHEN ====================
+CHART_MAX_BUCKETS = 2000  # höchstens so viele Buckets (≈ Pixelspalten) pro Abfrage
+_UNIX_JULIANDAY = 2440587.5
+_TIME_NAME_RE = re.compile(r"date|time|_at$|^ts$|_ts$", re.IGNORECASE)
+_TIME_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800,
+               21600, 43200, 86400, 2 * 86400, 7 * 86400, 30 * 86400, 91 * 86400, 365 * 86400)
+
+
+def chart_axes(meta: TableMeta) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Achsen-Kandidaten aus den deklarierten Spaltentypen (PRAGMA table_info).
+
+    Returns:
+        (x_axes, y_axes) - X als (Spalte, "time"|"number"), Zeitspalten zuerst;
+        Y sind alle numerischen Spalten, die keine Zeitspalten sind.
+    """
+    times, numbers, y_axes = [], [], []
+    for col, decl in zip(meta.columns, meta.types):
+        upper = decl.upper()
+        affinity = column_affinity(decl)
+        numeric = affinity in ("INTEGER", "REAL", "NUMERIC")
+        if "DATE" in upper or "TIME" in upper or (
+                _TIME_NAME_RE.search(col) and (numeric or affinity == "TEXT")):
+            times.append((col, "time"))
+        elif numeric:
+            numbers.append((col, "number"))
+            y_axes.append(col)
+    return times + numbers, y_axes
+
+
+def time_expr(col_sql: str) -> str:
+    """Zeitwert als Unix-Sekunden: Zahlen unverändert, ISO-Text über julianday()."""
+    return (f"(CASE WHEN typeof({col_sql}) IN ('integer', 'real') THEN {col_sql} "
+            f"ELSE (julianday({col_sql}) - {_UNIX_JULIANDAY}) * 86400.0 END)")
+
+
+def _iso_day(seconds: float) -> Optional[str]:
+    try:
+        return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime("%Y-%m-%d")
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def chart_range_clause(col_sql: str, kind: str, x0: float, x1: float) -> Tuple[str, List[Any]]:
+    """
+    Bedingung für den sichtbaren X-Bereich.
+
+    Zahlen werden direkt verglichen (indexfähig). Bei Zeitspalten grenzt ein
+    tagesgenauer Vorfilter auf Zahl bzw. ISO-Text den Indexbereich ein, die
+    exakte Grenze prüft danach der umgerechnete Ausdruck.
+    """
+    if kind == "number":
+        return f"{col_sql} BETWEEN ? AND ?", [x0, x1]
+    exact = f"{time_expr(col_sql)} BETWEEN ? AND ?"
+    day0, day1 = _iso_day(x0), _iso_day(x1 + 86400)
+    if day0 is None or day1 is None:
+        return exact, [x0, x1]
+    return (f"({col_sql} BETWEEN ? AND ? OR ({col_sql} >= ? AND {col_sql} < ?)) AND {exact}",
+            [x0, x1, day0, day1, x0, x1])
+
+
+def chart_bounds_sql(table_sql: str, col_sql: str, kind: str) -> str:
+    """MIN/MAX der X-Spalte; nutzt die MIN/MAX-Optimierung über einen Index."""
+    if kind == "number":
+        return f"SELECT MIN({col_sql}), MAX({col_sql}) FROM {table_sql}"
+    return (f"SELECT {time_expr('lo')}, {time_expr('hi')} FROM "
+            f"(SELECT MIN({col_sql}) AS lo, MAX({col_sql}) AS hi FROM {table_sql})")
+
+
+def chart_bucket_sql(table_sql: str, col_sql: str, kind: str, y_sql: List[str],
+                     x0: float, x1: float, buckets: int) -> Tuple[str, List[Any]]:
+    """
+    Aggregiert den Bereich [x0, x1] in SQLite auf höchstens buckets+1 Zeilen.
+
+    Pro Bucket: Anzahl, MIN/MAX der X-Werte und MIN/MAX/AVG je Y-Spalte.
+    """
+    x_expr = col_sql if kind == "number" else time_expr(col_sql)
+    width = (x1 - x0) / buckets or 1.0
+    where, params = chart_range_clause(col_sql, kind, x0, x1)
+    inner = ", ".join(f"{y} AS y{i}" for i, y in enumerate(y_sql))
+    aggregates = ", ".join(f"MIN(y{i}), MAX(y{i}), AVG(y{i})" for i in range(len(y_sql)))
+    sql = (f"SELECT CAST((x - ?) / ? AS INTEGER) AS b, COUNT(*), MIN(x), MAX(x), {aggregates} "
+           f"FROM (SELECT {x_expr} AS x, {inner} FROM {table_sql} WHERE {where}) "
+           f"WHERE x IS NOT NULL GROUP BY b ORDER BY b")
+    return sql, [x0, width, *params]
+
+
+def lttb_select(candidates: List[List[Tuple[float, float]]]) -> List[Tuple[float, float]]:
+    """
+    Largest-Triangle-Three-Buckets über vorgegebene Buckets.
+
+    candidates enthält je Bucket die in Frage kommenden Punkte (hier MIN und
+    MAX aus SQL). Gewählt wird der Punkt, der mit dem zuletzt gewählten und
+    dem Mittel des nächsten Buckets das größte Dreieck bildet.
+    """
+    buckets = [c for c in candidates if c]
+    if len(buckets) <= 2:
+        return [p for c in buckets for p in c]
+    selected = [buckets[0][0]]
+    for i in range(1, len(buckets) - 1):
+        ax, ay = selected[-1]
+        following = buckets[i + 1]
+        cx = sum(p[0] for p in following) / len(following)
+        cy = sum(p[1] for p in following) / len(following)
+        selected.append(max(buckets[i], key=lambda p: abs(
+            (ax - cx) * (p[1] - ay) - (ax - p[0]) * (cy - ay))))
+    selected.append(buckets[-1][-1])
+    return selected
+
+
+def nice_ticks(lo: float, hi: float, count: int = 6, kind: str = "number") -> List[float]:
+    """Gut lesbare Achsenmarken zwischen lo und hi (Zeit: Sekunden bis Jahre)."""
+    span = hi - lo
+    if span <= 0:
+        return [lo]
+    raw = span / max(1, count)
+    if kind == "time" and raw >= 1:
+        step = next((s for s in _TIME_STEPS if s >= raw), _TIME_STEPS[-1] * -(-raw // _TIME_STEPS[-1]))
+    else:
+        magnitude = 10 ** math.floor(math.log10(raw))
+        step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    first = math.ceil(lo / step) * step
+    return [first + i * step for i in range(int((hi - first) / step) + 1)]
+
+
+def format_tick(value: float, kind: str, span: float) -> str:
+    if kind == "time":
+        try:
+            moment = datetime.fromtimestamp(value, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return ""
+        if span >= 3 * 86400:
+            return moment.strftime("%Y-%m-%d")
+        if span >= 600:
+            return moment.strftime("%m-%d %H:%M")
+        return moment.strftime("%H:%M:%S")
+    if value and (abs(value) >= 1e6 or abs(value) < 1e-3):
+        return f"{value:.3g}"
+    return f"{value:.6g}"
+
+
+# ==================== AUTOVERVOLLSTÄNDIGUNG ====================
+COMPLETION_LIMIT = 50
+_FALLBACK_FUNCTIONS = (
+    "abs", "avg", "char", "coalesce", "count", "date", "datetime", "group_concat", "hex",
+    "ifnull", "iif", "instr", "julianday", "length", "like", "lower", "ltrim", "max", "min",
+    "nullif", "printf", "quote", "random", "replace", "round", "rtrim", "strftime", "substr",
+    "sum", "time", "total", "trim", "typeof", "unicode", "upper", "zeroblob",
+)
+_TABLE_CONTEXT_RE = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+$", re.IGNORECASE)
+_TABLE_REF_RE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+(\"[^\"]+\"|\[[^\]]+\]|`[^`]+`|[\w$]+)(?:\s+(?:AS\s+)?([\w$]+))?",
+    re.IGNORECASE,
+)
+_COMPLETION_WORD_RE = re.compile(r"(?:(\"[^\"]+\"|[\w$]+)\.)?([\w$]*)$")
+
+
+class PrefixIndex:
+    """
+    Präfix-Index über Namen (Groß-/Kleinschreibung egal).
+
+    Sortiertes Array als flacher Trie: alle Namen mit gleichem Präfix liegen
+    zusammenhängend, eine Suche sind zwei Binärsuchen (O(log n)) – auch bei
+    Hunderttausenden Spalten ohne Knoten-Overhead pro Zeichen.
+    """
+
+    def __init__(self, entries: Sequence[Tuple[str, str]] = ()):
+        # (Schlüssel, Anzeigename, Art), sortiert nach Schlüssel
+        items = sorted({(name.lower(), name, kind) for name, kind in entries})
+        self._keys = [item[0] for item in items]
+        self._items = [(item[1], item[2]) for item in items]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def complete(self, prefix: str, limit: int = COMPLETION_LIMIT) -> List[Tuple[str, str]]:
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + "\U0010ffff", lo=start)
+        return self._items[start:min(end, start + limit)]
+
+
+def _unquote(name: str) -> str:
+    if len(name) >= 2 and name[0] + name[-1] in ('""', "[]", "``"):
+        return name[1:-1]
+    return name
+
+
+@dataclass
+class SchemaCatalog:
+    """Namen für die Vervollständigung, aufgebaut aus sqlite_master und pragma_table_info."""
+    schema_version: int
+    general: PrefixIndex
+    tables: PrefixIndex
+    columns: Dict[str, PrefixIndex]
+    keywords: frozenset = frozenset()
+
+    @classmethod
+    def build(cls, conn: sqlite3.Connection, keywords: Sequence[str]) -> "SchemaCatalog":
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        table_names: Dict[str, str] = {}
+        columns: Dict[str, List[Tuple[str, str]]] = {}
+        for table, kind in conn.execute(
+            "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') ORDER BY name"
+        ).fetchall():
+            table_names[table] = "Tabelle" if kind == "table" else "View"
+            # Spalten je Objekt: eine kaputte View (z.B. auf eine gelöschte
+            # Tabelle) darf nicht den ganzen Katalog verhindern
+            try:
+                names = conn.execute(
+                    "SELECT name FROM pragma_table_info(?) ORDER BY cid", (table,)
+                ).fetchall()
+            except sqlite3.Error:
+                continue
+            if names:
+                columns[table.lower()] = [(name, "Spalte") for name, in names]
+        try:
+            functions = {r[0] for r in conn.execute("SELECT name FROM pragma_function_list")}
+        except sqlite3.Error:
+            functions = set(_FALLBACK_FUNCTIONS)
+
+        tables = [(name, kind) for name, kind in table_names.items()]
+        general = tables + [(k, "Schlüsselwort") for k in keywords] + [(f, "Funktion") for f in functions]
+        return cls(
+            schema_version=version,
+            general=PrefixIndex(general),
+            tables=PrefixIndex(tables),
+            columns={t: PrefixIndex(cols) for t, cols in columns.items()},
+            keywords=frozenset(k.upper() for k in keywords),
+        )
+
+    def complete(self, before: str, statement: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Vorschläge für das Wort vor dem Cursor.
+
+        before: Text der aktuellen Zeile bis zum Cursor; statement: ganzer
+        Editorinhalt (für Tabellen-Aliase). Returns (Präfix, [(Name, Art)]).
+        """
+        match = _COMPLETION_WORD_RE.search(before)
+        qualifier, prefix = match.group(1), match.group(2)
+        if qualifier:
+            refs = self._table_refs(statement)
+            table = refs.get(_unquote(qualifier).lower(), _unquote(qualifier).lower())
+            index = self.columns.get(table)
+            return prefix, index.complete(prefix) if index else []
+        if not prefix:
+            return prefix, []
+        if _TABLE_CONTEXT_RE.search(before[:len(before) - len(prefix)]):
+            return prefix, self.tables.complete(prefix)
+        # Spalten der im Statement genannten Tabellen zuerst, dann alles andere
+        found: List[Tuple[str, str]] = []
+        for table in dict.fromkeys(self._table_refs(statement).values()):
+            index = self.columns.get(table)
+            if index:
+                found.extend(index.complete(prefix))
+        found.extend(self.general.complete(prefix))
+        return prefix, list(dict.fromkeys(found))[:COMPLETION_LIMIT]
+
+    def _table_refs(self, statement: str) -> Dict[str, str]:
+        """Alias bzw. Tabellenname (klein) -> Tabelle (klein) aus FROM/JOIN/UPDATE/INTO."""
+        refs: Dict[str, str] = {}
+        for name, alias in _TABLE_REF_RE.findall(statement):
+            table = _unquote(name).lower()
+            refs[table] = table
+            if alias and alias.upper() not in self.keywords:
+                refs[alias.lower()] = table
+        return refs
+
+
+# ==================== PIVOT ====================
+PIVOT_FUNCS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+PIVOT_MAX_COLUMNS = 50     # höchstens so viele Werte des Spaltenschlüssels
+PIVOT_MAX_GROUPS = 10_000  # höchstens so viele Ergebniszeilen im Treeview
+PIVOT_CACHE_SIZE = 8       # zwischengespeicherte Ergebnisse (Drill-down, erneutes Anzeigen)
+
+
+@dataclass(frozen=True)
+class PivotMeasure:
+    """Aggregat über eine Spalte; column=None steht für COUNT(*)."""
+    func: str
+    column: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.func}({self.column or '*'})"
+
+
+def pivot_sql(table_sql: str, row_exprs: List[str], col_expr: Optional[str],
+              col_values: List[Any], measures: List[Tuple[str, Optional[str]]],
+              where: str) -> Tuple[str, List[Any]]:
+    """
+    Eine GROUP-BY-Abfrage mit bedingter Aggregation.
+
+    Je Wert des Spaltenschlüssels und Aggregat entsteht eine Spalte
+    AGG(CASE WHEN schlüssel IS ? THEN ausdruck END), dahinter je Aggregat
+    die Zeilensumme. SQLite liest die Tabelle dafür genau einmal.
+
+    Args:
+        measures: (Funktion, SQL-Ausdruck oder None für COUNT(*))
+        where: "" oder " WHERE …"; dessen Parameter hängt der Aufrufer an
+    """
+    select = list(row_exprs)
+    params: List[Any] = []
+    if col_expr is not None:
+        for value in col_values:
+            for func, expr in measures:
+                select.append(f"{func}(CASE WHEN {col_expr} IS ? THEN {expr or 1} END)")
+                params.append(value)
+    select.extend(f"{func}({expr or '*'})" for func, expr in measures)
+    sql = f"SELECT {', '.join(select)} FROM {table_sql}{where}"
+    if row_exprs:
+        keys = ", ".join(row_exprs)
+        sql += f" GROUP BY {keys} ORDER BY {keys}"
+    return sql, params
+
+
+def run_pivot(conn: sqlite3.Connection, table_sql: str, row_exprs: List[str],
+              col_expr: Optional[str], measures: List[Tuple[str, Optional[str]]],
+              where: str, params: List[Any]) -> Tuple[List[Any], List[tuple], bool]:
+    """Berechnet eine Pivot-Tabelle: (Werte des Spaltenschlüssels, Zeilen, gekürzt)."""
+    values: List[Any] = []
+    if col_expr is not None:
+        cur = conn.execute(f"SELECT DISTINCT {col_expr} FROM {table_sql}{where} ORDER BY 1 LIMIT ?",
+                           (*params, PIVOT_MAX_COLUMNS + 1))
+        values = [row[0] for row in cur]
+        if len(values) > PIVOT_MAX_COLUMNS:
+            raise ValueError(f"Der Spaltenschlüssel hat mehr als {PIVOT_MAX_COLUMNS} verschiedene Werte")
+    sql, args = pivot_sql(table_sql, row_exprs, col_expr, values, measures, where)
+    rows = conn.execute(sql, args + list(params)).fetchmany(PIVOT_MAX_GROUPS + 1)
+    return values, [tuple(row) for row in rows[:PIVOT_MAX_GROUPS]], len(rows) > PIVOT_MAX_GROUPS
+
+
+def filter_literal(value: Any) -> Optional[str]:
+    """
+    Spaltenfilter, der genau value trifft (Drill-down); None für BLOBs.
+
+    Zahlen bleiben ungequotet und werden von _filter_value auch in Spalten
+    ohne Typ wieder zu Zahlen, Text wird gequotet und bleibt Text. So
+    trifft der Filter den gespeicherten Wert samt Speicherklasse.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bytes):
+        return None
+    if isinstance(value, (int, float)):
+        return f"={value!r}"  # repr: Floats ohne Rundung, 1.0 bleibt REAL
+    return f'="{value}"'  # gequotet: Kommas, '..' und '*' bleiben Text
+
+
+# ==================== ABFRAGEVERLAUF ====================
+HISTORY_PATH = os.environ.get("SQLITEVIEWER_HISTORY") or os.path.join(APP_DATA_DIR, "history.db")
+HISTORY_LIMIT = 500  # maximal angezeigte Einträge im Verlauf
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def normalize_sql(sql: str) -> str:
+    """Whitespace vereinheitlichen, damit Wiederholungen zusammengefasst werden."""
+    return " ".join(sql.split()).rstrip(";").strip()
+
+
+def plan_fingerprint(conn: sqlite3.Connection, sql: str) -> Optional[str]:
+    """Hash über EXPLAIN QUERY PLAN; ändert sich, wenn SQLite einen anderen Plan wählt."""
+    try:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    except sqlite3.Error:
+        return None
+    return _fingerprint("\n".join(str(row[-1]) for row in plan)) if plan else None
+
+
+class QueryHistory:
+    """
+    Persistenter Abfrageverlauf in einer eigenen SQLite-Datei.
+
+    Pro Ausführung: Zeitpunkt, Datenbank, SQL, Zeilen, Dauer, Plan-Hash und
+    ggf. Fehler. Wiederholungen werden über den Hash des normalisierten SQL
+    gruppiert (Statistik mit p50/p95).
+    """
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS queries (
+                    id INTEGER PRIMARY KEY,
+                    executed_at TEXT NOT NULL,
+                    db_path TEXT,
+                    sql TEXT NOT NULL,
+                    sql_hash TEXT NOT NULL,
+                    rows INTEGER,
+                    elapsed REAL,
+                    plan_hash TEXT,
+                    error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS queries_hash ON queries(sql_hash, elapsed);
+                CREATE INDEX IF NOT EXISTS queries_db ON queries(db_path, id);
+            """)
+            self._conn = conn
+        return self._conn
+
+    def record(self, db_path: Optional[str], sql: str, rows: Optional[int], elapsed: float,
+               plan_hash: Optional[str] = None, error: Optional[str] = None) -> int:
+        """Speichert eine Ausführung; Returns die id (für set_plan)."""
+        db = self._db()
+        cur = db.execute(
+            "INSERT INTO queries (executed_at, db_path, sql, sql_hash, rows, elapsed, plan_hash, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (datetime.now().isoformat(timespec="seconds"), db_path, sql,
+             _fingerprint(normalize_sql(sql)), rows, elapsed, plan_hash, error),
+        )
+        db.commit()
+        return cur.lastrowid
+
+    def set_plan(self, query_id: int, plan_hash: Optional[str]):
+        """Trägt den nachträglich (im Hintergrund) ermittelten Plan-Hash nach."""
+        if plan_hash is None:
+            return
+        db = self._db()
+        db.execute("UPDATE queries SET plan_hash = ? WHERE id = ?", (plan_hash, query_id))
+        db.commit()
+
+    def search(self, term: str = "", db_path: Optional[str] = None,
+               limit: int = HISTORY_LIMIT) -> List[Tuple]:
+        """Neueste Einträge zuerst: (id, Zeitpunkt, DB, Zeilen, Dauer, Plan, Fehler, SQL)."""
+        clauses, params = [], []
+        if term:
+            clauses.append("sql LIKE ?")
+            params.append(f"%{term}%")
+        if db_path:
+            clauses.append("db_path = ?")
+            params.append(db_path)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._db().execute(
+            f"SELECT id, executed_at, db_path, rows, elapsed, plan_hash, error, sql FROM queries"
+            f"{where} ORDER BY id DESC LIMIT ?", (*params, limit)
+        ).fetchall()
+
+    def slowest(self, term: str = "", db_path: Optional[str] = None,
+                limit: int = HISTORY_LIMIT) -> List[Tuple]:
+        """
+        Statistik je normalisiertem SQL, langsamste (p95) zuerst:
+        (Läufe, p50, p95, Max, letzte Dauer, Anzahl Pläne, SQL der letzten Ausführung).
+        """
+        clauses, params = ["error IS NULL"], []
+        if term:
+            clauses.append("sql LIKE ?")  # vor dem LIMIT filtern, nicht danach
+            params.append(f"%{term}%")
+        if db_path:
+            clauses.append("db_path = ?")
+            params.append(db_path)
+        where = f"WHERE {' AND '.join(clauses)}"
+        # Perzentile nach Nearest-Rank über Fensterfunktionen, ohne Daten nach Python zu holen
+        return self._db().execute(f"""
+            WITH ranked AS (
+                SELECT id, sql_hash, elapsed, plan_hash,
+                       ROW_NUMBER() OVER (PARTITION BY sql_hash ORDER BY elapsed) AS rn,
+                       COUNT(*) OVER (PARTITION BY sql_hash) AS n
+                FROM queries {where}
+            ), stats AS (
+                SELECT n,
+                       MIN(CASE WHEN rn >= 0.5 * n THEN elapsed END) AS p50,
+                       MIN(CASE WHEN rn >= 0.95 * n THEN elapsed END) AS p95,
+                       MAX(elapsed) AS worst,
+                       COUNT(DISTINCT plan_hash) AS plans,
+                       MAX(id) AS last_id
+                FROM ranked GROUP BY sql_hash
+            )
+            SELECT s.n, s.p50, s.p95, s.worst, q.elapsed, s.plans, q.sql
+            FROM stats AS s JOIN queries AS q ON q.id = s.last_id
+            ORDER BY s.p95 DESC LIMIT ?
+        """, (*params, limit)).fetchall()
+
+    def clear(self):
+        db = self._db()
+        db.execute("DELETE FROM queries")
+        db.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ==================== KOMPRIMIERTE DATENBANKEN ====================
+DECOMPRESS_CACHE_DIR = os.path.join(APP_DATA_DIR, "cache")
+DECOMPRESS_CACHE_KEEP = 8      # so viele entpackte Datenbanken bleiben im Cache
+DECOMPRESS_CACHE_GRACE = 3600  # so lange (s) nach der letzten Benutzung wird nichts entfernt
+_SQLITE_SIDECARS = ("-wal", "-shm", "-journal")
+DECOMPRESS_CHUNK = 1 << 20
+
+# Erkennung über die ersten Bytes, nicht über die Dateiendung
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"BZh", "bz2"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+)
+_COMPRESSED_SUFFIXES = (".gz", ".gzip", ".xz", ".lzma", ".bz2", ".zst", ".zstd")
+
+
+def compression_of(path: str) -> Optional[str]:
+    """Kompressionsformat anhand der Magic Bytes oder None für unkomprimierte Dateien."""
+    with open(path, "rb") as f:
+        head = f.read(8)
+    return next((kind for magic, kind in _MAGIC if head.startswith(magic)), None)
+
+
+def _decompressor(kind: str, raw):
+    """Stream-Dekompressor über dem geöffneten Rohdatei-Objekt."""
+    # Erst bei Bedarf importieren: hält den Programmstart schlank
+    if kind == "gzip":
+        import gzip
+        return gzip.GzipFile(fileobj=raw)
+    if kind == "xz":
+        import lzma
+        return lzma.LZMAFile(raw)
+    if kind == "bz2":
+        import bz2
+        return bz2.BZ2File(raw)
+    try:
+        from compression import zstd  # ab Python 3.14 in der Standardbibliothek
+    except ImportError:
+        raise ValueError("Zstandard-Dateien benötigen Python 3.14 oder neuer.") from None
+    return zstd.ZstdFile(raw)
+
+
+class DecompressCache:
+    """
+    Entpackte Kopien komprimierter Datenbanken, Schlüssel ist der SHA-1 der Archivdatei.
+
+    Ein Index (Pfad -> Größe, mtime, Hash) erspart beim erneuten Öffnen
+    derselben unveränderten Datei sogar das Hashen.
+    """
+
+    def __init__(self, directory: str = DECOMPRESS_CACHE_DIR):
+        self.directory = directory
+        self.index_file = os.path.join(directory, "index.json")
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]):
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_file)
+
+    def _target(self, digest: str, path: str) -> str:
+        name = os.path.basename(path)
+        for suffix in _COMPRESSED_SUFFIXES:
+            if name.lower().endswith(suffix):
+                name = name[:-len(suffix)]
+                break
+        return os.path.join(self.directory, f"{digest[:16]}_{name or 'db'}")
+
+    def lookup(self, path: str) -> Optional[str]:
+        """Schneller Weg ohne Lesen der Datei: gleiche Größe und mtime wie beim letzten Mal."""
+        st = os.stat(path)
+        entry = self._load_index().get(os.path.abspath(path))
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns \
+                and os.path.exists(entry["target"]):
+            os.utime(entry["target"])
+            return entry["target"]
+        return None
+
+    def extract(self, path: str, kind: str, task: BackgroundTask) -> str:
+        """Hasht und entpackt path (im Worker-Thread); task.fraction zeigt den Fortschritt."""
+        os.makedirs(self.directory, exist_ok=True)
+        st = os.stat(path)
+        size = max(1, st.st_size)
+
+        # 1. Hash des Archivs (schnell, nur Lesen): bereits entpackt?
+        sha = hashlib.sha1()
+        with open(path, "rb") as f:
+            while chunk := f.read(DECOMPRESS_CHUNK):
+                if task.cancelled:
+                    raise InterruptedError("Abgebrochen")
+                sha.update(chunk)
+                task.fraction = 0.1 * f.tell() / size
+        digest = sha.hexdigest()
+        prefix = digest[:16] + "_"
+        existing = [n for n in os.listdir(self.directory) if n.startswith(prefix) and not n.endswith(".part")]
+        target = os.path.join(self.directory, existing[0]) if existing else self._target(digest, path)
+
+        # 2. Streamend entpacken, Fortschritt über die gelesenen komprimierten Bytes
+        if not os.path.exists(target):
+            part = target + ".part"
+            try:
+                with open(path, "rb") as raw, _decompressor(kind, raw) as src, open(part, "wb") as dst:
+                    first = True
+                    while chunk := src.read(DECOMPRESS_CHUNK):
+                        if task.cancelled:
+                            raise InterruptedError("Abgebrochen")
+                        if first and not chunk.startswith(b"SQLite format 3\x00"):
+                            raise ValueError("Das Archiv enthält keine SQLite-Datenbank.")
+                        first = False
+                        dst.write(chunk)
+                        task.fraction = 0.1 + 0.9 * raw.tell() / size
+                os.replace(part, target)
+            finally:
+                if os.path.exists(part):
+                    os.remove(part)
+        else:
+            os.utime(target)
+
+        index = self._load_index()
+        index[os.path.abspath(path)] = {"size": st.st_size, "mtime": st.st_mtime_ns, "target": target}
+        self._save_index(index)
+        self._prune(keep=target)
+        return target
+
+    def _prune(self, keep: str):
+        """
+        Entfernt die am längsten nicht benutzten Kopien über DECOMPRESS_CACHE_KEEP hinaus.
+
+        -wal/-shm/-journal gehören zu ihrer Datenbank und zählen nicht extra.
+        Eine Kopie mit solchen Dateien ist vermutlich gerade offen, und eine
+        innerhalb von DECOMPRESS_CACHE_GRACE benutzte vielleicht in einer
+        anderen Instanz: beide bleiben stehen.
+        """
+        groups: Dict[str, List[str]] = {}
+        for name in os.listdir(self.directory):
+            if name.endswith((".json", ".tmp", ".part")):
+                continue
+            base = next((name[:-len(s)] for s in _SQLITE_SIDECARS if name.endswith(s)), name)
+            groups.setdefault(base, []).append(os.path.join(self.directory, name))
+
+        def last_used(base: str) -> float:
+            times = []
+            for member in groups[base]:
+                try:
+                    times.append(os.path.getmtime(member))
+                except OSError:
+                    pass
+            return max(times, default=0.0)
+
+        now = time.time()
+        for base in sorted(groups, key=last_used, reverse=True)[DECOMPRESS_CACHE_KEEP:]:
+            db = os.path.join(self.directory, base)
+            members = groups[base]
+            if db == keep or now - last_used(base) < DECOMPRESS_CACHE_GRACE:
+                continue
+            if db in members and len(members) > 1:
+                continue  # Datenbank mit Journal/WAL: in Benutzung
+            # Datenbank zuerst; übrig gebliebene Begleitdateien ohne Datenbank gleich mit
+            for member in sorted(members, key=lambda m: m != db):
+                try:
+                    os.remove(member)
+                except OSError:
+                    break  # z.B. unter Windows noch geöffnet: Rest nicht anfassen
 
 
 class SqlViewer(tk.Tk):
     def __init__(self):
+        t_init = time.perf_counter()
         super().__init__()
         self.title(f"{APP_TITLE} v{APP_VERSION}")
         self.geometry("1200x800")
@@ -37,10 +1492,63 @@ class SqlViewer(tk.Tk):
         # State
         self.conn: sqlite3.Connection | None = None
         self.db_path: str | None = None
+        self.source_path: str | None = None  # vom Benutzer gewählte Datei (bei Archiven nicht db_path)
         self.current_columns: List[str] = []
-        self.current_data: List[Tuple] = []
+        # Geladene Seite bzw. SQL-Ergebnis, spaltenweise gespeichert
+        self.result: Optional[ResultBuffer] = None
+        self.sql_result: Optional[ResultBuffer] = None
+        self._result_complete = False  # Seite enthält das gesamte (gefilterte) Ergebnis
+        self._result_search = ""       # Suchbegriff, mit dem die Seite geladen wurde
+        self._indexed_columns: frozenset = frozenset()
+        self._sql_sort: Optional[Tuple[str, bool]] = None
         self.sort_column: str | None = None
         self.sort_reverse: bool = False
+        self.tables: List[str] = []
+        self._load_token = 0
+        self._count_task: Optional[BackgroundTask] = None  # COUNT(*) der geladenen Seite
+        self._table_meta: Dict[str, TableMeta] = {}
+        # Virtuelle JSON-Spalten je Tabelle (json_extract/json_each in SQL)
+        self._json_columns: Dict[str, List[JsonColumn]] = {}
+        self.column_filters: Dict[str, tk.StringVar] = {}
+        self._filter_columns: List[str] = []
+        self._search_after: Optional[str] = None
+
+        # Keyset-Paging: Schlüssel (Sortierspalte, rowid) der ersten/letzten Zeile
+        self._page_first_key: Optional[Tuple] = None
+        self._page_last_key: Optional[Tuple] = None
+        self._page_no: Optional[int] = None
+        self._page_count: Optional[int] = None
+        self._page_has_next = False
+        self._page_has_prev = False
+        self._page_key_exprs: List[str] = []
+
+        # Snapshot-Sitzung: eine offene Lesetransaktion für Blättern, Zählen und Export
+        self.snapshot_var = tk.BooleanVar(value=False)
+        self._snapshot_started: Optional[float] = None
+        self._snapshot_counts: Dict[Tuple, int] = {}  # COUNT(*) je Abfrage, gültig im Snapshot
+        self._snapshot_count: Optional[BackgroundTask] = None  # laufendes COUNT im Snapshot
+        self._snapshot_count_done = threading.Event()  # gesetzt, sobald der Zähl-Thread fertig ist
+        self._snapshot_count_done.set()
+        self._snapshot_count_retry: Optional[Callable[[], None]] = None
+        self._count_local = threading.local()  # Task des Zähl-Threads für den Progress-Handler
+        self._snapshot_after: Optional[str] = None
+        self._export: Optional[Tuple[Any, str]] = None  # laufender Tabellen-Export (Datei, Pfad)
+
+        # Pivot-Ergebnisse je Abfrage (für Drill-down und erneutes Anzeigen), ältestes fliegt zuerst
+        self._pivot_cache: Dict[Tuple, Tuple] = {}
+
+        # Auswahl im Grid als rowid-Bereiche (Treeview-iid = rowid der Zeile)
+        self.row_selection = RowSelection()
+        self._page_rowids: Optional[array] = None  # rowids der geladenen Seite in Ladereihenfolge
+        self._copy_token = 0
+        self._copying = False  # Kopieren liest gerade blockweise aus self.conn
+
+        # Ausgeführte SQL-Abfragen (Datei wird erst beim ersten Zugriff geöffnet)
+        self.history: Optional[QueryHistory] = QueryHistory()
+        self._decompress_cache = DecompressCache()
+
+        # Hintergrund-Jobs liefern ihre Ergebnisse über diese Queue an den UI-Thread
+        self._ui_queue: "queue.Queue[Tuple[Optional[Callable], Any]]" = queue.Queue()
 
         # UI
         self._build_menu()
@@ -54,11 +1562,22 @@ class SqlViewer(tk.Tk):
         # BUG 4: Sauberes Schließen via WM_DELETE_WINDOW
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
+        self.after(UI_POLL_MS, self._poll_ui_queue)
+
+        # Startzeit-Messung: Import, Fensteraufbau, erster Paint
+        self._startup_times: Dict[str, float] = {
+            "import": _T_IMPORTED - _T_START,
+            "window": time.perf_counter() - t_init,
+        }
+        self.bind("<Map>", self._on_first_map, add="+")
+
     def _setup_styles(self):
         """Konfiguriere ttk Styles."""
         style = ttk.Style()
         style.configure("Treeview", rowheight=24)
         style.configure("Treeview.Heading", font=('Segoe UI', 9, 'bold'))
+        # "Alle auswählen" markiert keine Items, sondern färbt das ganze Grid
+        style.configure("AllSelected.Treeview", background="#cce4f7", fieldbackground="#cce4f7")
 
     # ==================== MENU ====================
     def _build_menu(self):
@@ -78,8 +1597,14 @@ class SqlViewer(tk.Tk):
         edit_menu = tk.Menu(menubar, tearoff=False)
         edit_menu.add_command(label="Suchen…", command=self._focus_search, accelerator="Ctrl+F")
         edit_menu.add_command(label="Alle auswählen", command=self._select_all, accelerator="Ctrl+A")
+        edit_menu.add_command(label="Kopieren (TSV)", command=lambda: self._copy_selection("tsv"),
+                              accelerator="Ctrl+C")
+        edit_menu.add_command(label="Als Markdown kopieren", command=lambda: self._copy_selection("markdown"))
+        edit_menu.add_command(label="Als INSERT kopieren", command=lambda: self._copy_selection("insert"))
         edit_menu.add_separator()
-        edit_menu.add_command(label="Refresh", command=self.load_selected_table, accelerator="F5")
+        edit_menu.add_command(label="Refresh", command=self._refresh_table, accelerator="F5")
+        edit_menu.add_checkbutton(label="Snapshot-Sitzung", variable=self.snapshot_var,
+                                  command=self._toggle_snapshot)
         menubar.add_cascade(label="Bearbeiten", menu=edit_menu)
 
         # Ansicht-Menü
@@ -87,10 +1612,21 @@ class SqlViewer(tk.Tk):
         view_menu.add_command(label="Daten-Tab", command=lambda: self.notebook.select(0))
         view_menu.add_command(label="Schema-Tab", command=lambda: self.notebook.select(1))
         view_menu.add_command(label="SQL-Editor", command=lambda: self.notebook.select(2))
+        view_menu.add_command(label="Diagramm", command=lambda: self.notebook.select(3))
+        view_menu.add_separator()
+        view_menu.add_command(label="Abfrageverlauf…", command=self._open_history)
         menubar.add_cascade(label="Ansicht", menu=view_menu)
 
+        # Extras-Menü
+        tools_menu = tk.Menu(menubar, tearoff=False)
+        tools_menu.add_command(label="Datenbank-Wartung…", command=self._open_maintenance)
+        tools_menu.add_command(label="Datenbanken vergleichen…", command=lambda: DiffDialog(self))
+        tools_menu.add_command(label="Pivot / Gruppierung…", command=self._open_pivot)
+        menubar.add_cascade(label="Extras", menu=tools_menu)
+
         # Hilfe-Menü
         help_menu = tk.Menu(menubar, tearoff=False)
+        help_menu.add_command(label="Startzeiten…", command=self._show_startup_times)
         help_menu.add_command(label="Über…", command=self._show_about)
         menubar.add_cascade(label="Hilfe", menu=help_menu)
 
@@ -102,7 +1638,7 @@ class SqlViewer(tk.Tk):
         self.bind_all("<Control-e>", lambda e: self.export_csv())
         self.bind_all("<Control-f>", lambda e: self._focus_search())
         self.bind_all("<Control-a>", lambda e: self._select_all())
-        self.bind_all("<F5>", lambda e: self.load_selected_table())
+        self.bind_all("<F5>", lambda e: self._refresh_table())
 
     # ==================== TOOLBAR ====================
     def _build_toolbar(self):
@@ -118,7 +1654,7 @@ class SqlViewer(tk.Tk):
         self.table_var = tk.StringVar()
         self.table_combo = ttk.Combobox(bar, textvariable=self.table_var, state="readonly", width=25)
         self.table_combo.pack(side=tk.LEFT, padx=6)
-        self.table_combo.bind("<<ComboboxSelected>>", lambda e: self.load_selected_table())
+        self.table_combo.bind("<<ComboboxSelected>>", lambda e: self._on_table_selected())
 
         # Limit
         ttk.Label(bar, text="Limit:").pack(side=tk.LEFT, padx=(10, 0))
@@ -133,55 +1669,121 @@ class SqlViewer(tk.Tk):
         self.search_entry = ttk.Entry(bar, textvariable=self.search_var, width=20)
         self.search_entry.pack(side=tk.LEFT, padx=4)
         self.search_entry.bind("<Return>", lambda e: self._search_data())
-        self.search_entry.bind("<KeyRelease>", lambda e: self._search_data())
+        self.search_entry.bind("<KeyRelease>", self._on_search_key)
 
         # Buttons
-        ttk.Button(bar, text="⟳ Refresh", command=self.load_selected_table, width=10).pack(side=tk.LEFT, padx=4)
+        ttk.Button(bar, text="⟳ Refresh", command=self._refresh_table, width=10).pack(side=tk.LEFT, padx=4)
         ttk.Button(bar, text="📋 Export", command=self.export_csv, width=10).pack(side=tk.LEFT, padx=4)
+        ttk.Checkbutton(bar, text="📸 Snapshot", variable=self.snapshot_var,
+                        command=self._toggle_snapshot).pack(side=tk.LEFT, padx=4)
 
     # ==================== NOTEBOOK (Tabs) ====================
     def _build_notebook(self):
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        # Tab 1: Daten
-        self.data_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.data_frame, text="📊 Daten")
-        self._build_data_tab()
+        # Tabs werden erst beim ersten Anzeigen aufgebaut
+        self._tab_builders: Dict[str, Callable[[], None]] = {}
+
+        # Tab 1: Daten (sofort sichtbar, daher direkt aufbauen)
+        self.data_frame = self._add_tab("📊 Daten", self._build_data_tab)
+        self._ensure_tab(self.data_frame)
 
         # Tab 2: Schema
-        self.schema_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.schema_frame, text="🔧 Schema")
-        self._build_schema_tab()
+        self.schema_frame = self._add_tab("🔧 Schema", self._build_schema_tab)
 
         # Tab 3: SQL-Editor
-        self.sql_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.sql_frame, text="💻 SQL-Editor")
-        self._build_sql_tab()
+        self.sql_frame = self._add_tab("💻 SQL-Editor", self._build_sql_tab)
+
+        # Tab 4: Diagramm
+        self.chart_frame = self._add_tab("📈 Diagramm", self._build_chart_tab)
+
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    def _add_tab(self, text: str, builder: Callable[[], None]) -> ttk.Frame:
+        """Fügt einen leeren Tab hinzu, dessen Inhalt builder() später erzeugt."""
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text=text)
+        self._tab_builders[str(frame)] = builder
+        return frame
+
+    def _ensure_tab(self, frame: ttk.Frame):
+        """Baut den Tab-Inhalt beim ersten Bedarf auf."""
+        builder = self._tab_builders.pop(str(frame), None)
+        if builder is not None:
+            builder()
+
+    def _is_tab_built(self, frame: ttk.Frame) -> bool:
+        return str(frame) not in self._tab_builders
+
+    def _on_tab_changed(self, event=None):
+        selected = self.notebook.select()
+        if selected:
+            frame = self.nametowidget(selected)
+            self._ensure_tab(frame)
+            if frame is self.chart_frame:
+                self.chart.on_show()
 
     def _build_data_tab(self):
         """Daten-Tab mit Treeview."""
         container = ttk.Frame(self.data_frame)
         container.pack(fill=tk.BOTH, expand=True)
 
+        # Filterzeile über dem Grid (Canvas scrollt horizontal mit dem Treeview mit)
+        self.filter_canvas = tk.Canvas(container, height=26, highlightthickness=0, borderwidth=0)
+
         # Treeview
         self.tree = ttk.Treeview(container, show="headings", selectmode="extended")
         self.tree["columns"] = ()
 
         # Scrollbars
         vsb = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
-        hsb = ttk.Scrollbar(container, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.grid_hsb = ttk.Scrollbar(container, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=self._on_grid_xscroll)
 
         # Layout
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
-        hsb.grid(row=1, column=0, sticky="ew")
-        container.grid_rowconfigure(0, weight=1)
+        self.filter_canvas.grid(row=0, column=0, sticky="ew")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        vsb.grid(row=1, column=1, sticky="ns")
+        self.grid_hsb.grid(row=2, column=0, sticky="ew")
+        container.grid_rowconfigure(1, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
-        # Sortierung bei Klick auf Header
-        self.tree.bind("<Button-1>", self._on_header_click)
+        # Spaltenbreiten können per Maus geändert werden: Filterzeile nachziehen
+        self.tree.bind("<ButtonRelease-1>", lambda e: self._layout_filter_row(), add="+")
+        # Doppelklick auf eine JSON-Zelle öffnet den Inspektor
+        self.tree.bind("<Double-1>", self._on_grid_double_click)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Control-c>", lambda e: self._copy_selection("tsv"))
+        self.tree.bind("<Escape>", lambda e: self._clear_selection())
+
+        # Seitennavigation (Keyset-Paging)
+        pager = ttk.Frame(self.data_frame, padding=(0, 4))
+        pager.pack(fill=tk.X)
+        self.page_buttons = {
+            "first": ttk.Button(pager, text="⏮", width=3, command=lambda: self.load_selected_table("first")),
+            "prev": ttk.Button(pager, text="◀", width=3, command=lambda: self.load_selected_table("prev")),
+            "next": ttk.Button(pager, text="▶", width=3, command=lambda: self.load_selected_table("next")),
+            "last": ttk.Button(pager, text="⏭", width=3, command=lambda: self.load_selected_table("last")),
+        }
+        for btn in self.page_buttons.values():
+            btn.pack(side=tk.LEFT, padx=2)
+            btn.state(["disabled"])
+        self.page_var = tk.StringVar(value="")
+        ttk.Label(pager, textvariable=self.page_var, width=18).pack(side=tk.LEFT, padx=8)
+
+        ttk.Label(pager, text="Springe zu:").pack(side=tk.LEFT, padx=(10, 0))
+        self.jump_var = tk.StringVar()
+        jump_entry = ttk.Entry(pager, textvariable=self.jump_var, width=18)
+        jump_entry.pack(side=tk.LEFT, padx=4)
+        jump_entry.bind("<Return>", lambda e: self._jump_to_value())
+        ttk.Button(pager, text="↵", width=3, command=self._jump_to_value).pack(side=tk.LEFT)
+
+        ttk.Button(pager, text="{ } JSON-Spalten…", command=self._open_json_columns).pack(side=tk.LEFT, padx=(14, 0))
+        ttk.Button(pager, text="Σ Pivot…", command=self._open_pivot).pack(side=tk.LEFT, padx=(6, 0))
+
+        self.sort_hint_var = tk.StringVar(value="")
+        ttk.Label(pager, textvariable=self.sort_hint_var, foreground="#666").pack(side=tk.RIGHT, padx=6)
 
     def _build_schema_tab(self):
         """Schema-Tab mit CREATE TABLE Statements."""
@@ -220,6 +1822,12 @@ class SqlViewer(tk.Tk):
         self.schema_text.tag_configure("string", foreground="#ce9178")
         self.schema_text.tag_configure("comment", foreground="#6a9955")
 
+        # Bereits geöffnete Datenbank nachträglich übernehmen
+        self.schema_combo["values"] = self.tables
+        if self.tables:
+            self.schema_combo.current(0)
+            self._load_schema()
+
     def _build_sql_tab(self):
         """SQL-Editor Tab."""
         # Splitter
@@ -242,12 +1850,17 @@ class SqlViewer(tk.Tk):
         self.sql_text.tag_configure("keyword", foreground="#569cd6")
         self.sql_text.bind("<KeyRelease>", self._highlight_sql)
 
+        # Autovervollständigung (Ctrl+Space erzwingt das Popup)
+        self.completer = SqlCompleter(self, self.sql_text)
+        self.completer.refresh()
+
         # Buttons
         btn_frame = ttk.Frame(self.sql_frame, padding=5)
         btn_frame.pack(fill=tk.X)
 
         ttk.Button(btn_frame, text="▶ Ausführen (F9)", command=self.execute_sql).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="🗑 Leeren", command=lambda: self.sql_text.delete("1.0", tk.END)).pack(side=tk.LEFT)
+        ttk.Button(btn_frame, text="🕘 Verlauf", command=self._open_history).pack(side=tk.LEFT, padx=5)
         self.sql_status = ttk.Label(btn_frame, text="")
         self.sql_status.pack(side=tk.RIGHT, padx=10)
 
@@ -267,6 +1880,18 @@ class SqlViewer(tk.Tk):
         result_hsb.grid(row=1, column=0, sticky="ew")
         result_frame.grid_rowconfigure(0, weight=1)
         result_frame.grid_columnconfigure(0, weight=1)
+        self.sql_result_tree.bind("<Double-1>", self._on_sql_double_click)
+
+    def _build_chart_tab(self):
+        """Diagramm-Tab: Zeitreihen der gewählten Tabelle."""
+        self.chart = ChartPanel(self.chart_frame, self)
+        self.chart.pack(fill=tk.BOTH, expand=True)
+        self.chart.set_table(self.table_var.get() or None)
+
+    def _sync_chart(self):
+        """Diagramm folgt der im Daten-Tab gewählten Tabelle."""
+        if self._is_tab_built(self.chart_frame):
+            self.chart.set_table((self.table_var.get() or None) if self.conn else None)
 
     def _build_statusbar(self):
         """Status-Leiste unten."""
@@ -279,24 +1904,50 @@ class SqlViewer(tk.Tk):
         self.row_count_var = tk.StringVar(value="")
         ttk.Label(self.statusbar, textvariable=self.row_count_var, anchor="e").pack(side=tk.RIGHT)
 
+        self.snapshot_age_var = tk.StringVar(value="")
+        ttk.Label(self.statusbar, textvariable=self.snapshot_age_var, anchor="e").pack(side=tk.RIGHT, padx=(0, 12))
+
     # ==================== DATABASE OPERATIONS ====================
     def open_db(self):
         path = filedialog.askopenfilename(
             title="SQLite-Datenbank öffnen",
-            filetypes=[("SQLite DB", "*.db *.sqlite *.sqlite3"), ("Alle Dateien", "*.*")]
+            filetypes=[("SQLite DB", "*.db *.sqlite *.sqlite3 *.gz *.xz *.bz2 *.zst"),
+                       ("Komprimierte DB", "*.gz *.xz *.bz2 *.zst"), ("Alle Dateien", "*.*")]
         )
         if not path:
             return
 
+        # Komprimierte Archive werden einmal entpackt und danach aus dem Cache geöffnet
+        try:
+            kind = compression_of(path)
+            cached = self._decompress_cache.lookup(path) if kind else None
+        except OSError as e:
+            messagebox.showerror("Fehler beim Öffnen", str(e))
+            return
+        if kind and not cached:
+            DecompressDialog(self, path, kind)
+            return
+        self._connect(cached or path, source=path)
+
+    def _connect(self, path: str, source: Optional[str] = None):
+        """Öffnet path schreibgeschützt; source ist die vom Benutzer gewählte Datei (z.B. Archiv)."""
+        source = source or path
         self.close_db()
 
         try:
-            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            # check_same_thread=False: im Snapshot zählt ein Worker-Thread auf dieser Verbindung
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
             conn.row_factory = sqlite3.Row
             self.conn = conn
             self.db_path = path
-            self.db_label.config(text=f"DB: {os.path.basename(path)}")
-            self._set_status(f"Verbunden: {path}")
+            self.source_path = source
+            self.db_label.config(text=f"DB: {os.path.basename(source)}")
+            if self.snapshot_var.get() and not self._start_snapshot_session():
+                self.snapshot_var.set(False)
+            status = f"Verbunden: {source}"
+            if source != path:
+                status += f" (entpackt: {path})"
+            self._set_status(status)
             self._load_tables()
         except Exception as e:
             messagebox.showerror("Fehler beim Öffnen", str(e))
@@ -304,45 +1955,85 @@ class SqlViewer(tk.Tk):
 
     def close_db(self):
         if self.conn is not None:
+            self._abort_export()
+            self._cancel_count()
+            self._copy_token += 1  # laufendes Kopieren abbrechen
+            self._copying = False
+            self._end_snapshot()
             try:
                 self.conn.close()
             except sqlite3.Error:
                 pass
             self.conn = None
             self.db_path = None
+            self.source_path = None
             self.db_label.config(text="DB: –")
+            self._clear_selection()
             self._clear_tree()
+            self._clear_filters()
+            self._reset_paging()
+            self._table_meta.clear()
+            self._json_columns.clear()
+            self._pivot_cache.clear()
+            self.tables = []
             self.table_combo["values"] = []
-            self.schema_combo["values"] = []
+            if self._is_tab_built(self.schema_frame):
+                self.schema_combo["values"] = []
+            self._sync_chart()
+            if self._is_tab_built(self.sql_frame):
+                self.completer.refresh()
             self._set_status("Datenbank geschlossen")
 
     def _load_tables(self):
         if not self.conn:
             return
+        self._claim_conn()
         try:
             cur = self.conn.execute(
                 "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
             )
             tables = [r[0] for r in cur.fetchall()]
+            self.tables = tables
+            self._table_meta.clear()  # Schema kann sich geändert haben
+            self._pivot_cache.clear()
             self.table_combo["values"] = tables
-            self.schema_combo["values"] = tables
+            if self._is_tab_built(self.sql_frame):
+                # Nur hier fragt die Vervollständigung die schema_version ab, nicht je Tastendruck
+                self.completer.refresh(self.conn.execute("PRAGMA schema_version").fetchone()[0])
+            schema_built = self._is_tab_built(self.schema_frame)
+            if schema_built:
+                self.schema_combo["values"] = tables
 
             if tables:
                 self.table_combo.current(0)
-                self.schema_combo.current(0)
-                self.load_selected_table()
-                self._load_schema()
+                # Erste Tabelle erst nach dem Neuzeichnen laden: Fenster bleibt bedienbar
+                self.after_idle(self.load_selected_table)
+                if schema_built:
+                    self.schema_combo.current(0)
+                    self.after_idle(self._load_schema)
             else:
                 self.table_combo.set("")
                 self._clear_tree()
                 self._set_status("Keine Tabellen gefunden")
+            self._sync_chart()
         except Exception as e:
             messagebox.showerror("Fehler", f"Tabellen konnten nicht geladen werden:\n{e}")
 
-    def load_selected_table(self):
+    def load_selected_table(self, nav: str = "first", jump_value: Any = None):
+        """
+        Lädt eine Seite der gewählten Tabelle.
+
+        nav: "first", "next", "prev", "last", "current" (Seite neu laden)
+             oder "jump" (erste Zeile mit Sortierwert >= jump_value).
+        Geblättert wird per Keyset auf (Sortierspalte, rowid), nie per OFFSET.
+        """
         table = self.table_var.get()
         if not table or not self.conn:
             return
+        # Veraltete Zählungen abbrechen statt sie zu Ende laufen zu lassen; die im
+        # Snapshot hielte sonst auch die Verbindung bis zum Ende des COUNT
+        self._cancel_count()
+        self._cancel_snapshot_count()
 
         try:
             limit = max(1, int(self.limit_var.get()))
@@ -351,44 +2042,457 @@ class SqlViewer(tk.Tk):
 
         try:
             # Spalten bestimmen
-            cur = self.conn.execute(f"PRAGMA table_info({self._ident(table)})")
-            cols = [row[1] for row in cur.fetchall()]
+            meta = self._get_table_meta(table)
+            cols = meta.columns
             if not cols:
                 self._clear_tree()
                 self._set_status("Tabelle hat keine Spalten")
                 return
+            json_cols = self._json_columns.get(table, [])
+            cols = cols + [j.name for j in json_cols]
 
             self.current_columns = cols
 
-            # Sortierung
-            order_clause = ""
-            if self.sort_column and self.sort_column in cols:
-                direction = "DESC" if self.sort_reverse else "ASC"
-                order_clause = f" ORDER BY {self._ident(self.sort_column)} {direction}"
-
-            # Daten holen
-            query = f"SELECT * FROM {self._ident(table)}{order_clause} LIMIT ?"
-            cur = self.conn.execute(query, (limit,))
-            rows = cur.fetchall()
-            self.current_data = [tuple(row) for row in rows]
+            # Spaltenfilter und Suche
+            try:
+                clauses, params, index = self._build_where(meta)
+            except FilterError as e:
+                self._set_status(f"Filterfehler: {e}")
+                return
 
-            self._populate_tree(cols, rows)
+            # Sortierung + eindeutiger Schlüssel für das Keyset-Paging
+            sort_col = self.sort_column if self.sort_column in cols else None
+            desc = bool(sort_col) and self.sort_reverse
+            key_exprs = self._key_exprs_for(meta, sort_col)
+            if key_exprs != self._page_key_exprs and nav in ("next", "prev", "current"):
+                nav = "first"  # gemerkte Seitengrenzen gehören zu einer anderen Sortierung
+            self._page_key_exprs = key_exprs
 
-            # Zähle Gesamtzeilen
-            count_cur = self.conn.execute(f"SELECT COUNT(*) FROM {self._ident(table)}")
-            total = count_cur.fetchone()[0]
+            segments, scan_desc, reverse = plan_page(
+                nav, key_exprs, desc, self._page_first_key, self._page_last_key, jump_value
+            )
+            direction = "DESC" if scan_desc else "ASC"
+            order_clause = " ORDER BY " + ", ".join(f"{e} {direction}" for e in key_exprs)
+
+            # Daten holen (eine Zeile mehr, um eine weitere Seite zu erkennen);
+            # die Segmente (Nicht-NULL-/NULL-Bereich) nacheinander, bis die Seite voll ist
+            keys_sql = ", ".join(key_exprs)
+            json_sql = "".join(f", {j.expr(self._ident)}" for j in json_cols)
+            rows = []
+            for page_clause, page_params in segments:
+                page_clauses = clauses + ([page_clause] if page_clause else [])
+                where = f" WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+                query = f"SELECT {keys_sql}, *{json_sql} FROM {self._ident(table)}{where}{order_clause} LIMIT ?"
+                cur = self.conn.execute(query, (*params, *page_params, limit + 1 - len(rows)))
+                rows.extend(tuple(row) for row in cur.fetchall())
+                if len(rows) > limit:
+                    break
+            more = len(rows) > limit
+            rows = rows[:limit]
+            if reverse:
+                rows.reverse()
+
+            if nav == "prev" and not rows:
+                # Vor der ersten Seite ist nichts mehr: erste Seite neu laden
+                self.load_selected_table("first")
+                return
 
-            self._set_status(f"Tabelle: {table}")
-            self.row_count_var.set(f"Zeilen: {len(rows)} / {total}")
+            nk = len(key_exprs)
+            first_key = rows[0][:nk] if rows else None
+            before = None
+            if nav in ("current", "jump"):
+                # Gibt es Zeilen vor dieser Seite? Nicht aus dem vorigen Zustand übernehmen
+                before = first_key is not None and any(
+                    self.conn.execute(
+                        f"SELECT 1 FROM {self._ident(table)} WHERE {' AND '.join(clauses + [clause])} LIMIT 1",
+                        (*params, *args)).fetchone()
+                    for clause, args in keyset_predicate(key_exprs, first_key, not desc))
+            self._update_page_state(nav, first_key, rows[-1][:nk] if rows else None, more, before)
+            # Die rowid ist immer der letzte Schlüssel, sofern die Tabelle eine hat
+            self._page_rowids = array("q", (row[nk - 1] for row in rows)) if meta.rowid_name() else None
+            self.result = ResultBuffer(cols, [row[nk:] for row in rows])
+            del rows
+            self._result_complete = not self._page_has_next and not self._page_has_prev
+            self._result_search = self.search_var.get().strip().lower()
+
+            self._indexed_columns = indexed = frozenset(meta.indexed_columns())
+            self._populate_tree(cols, self.result.iter_rows(), indexed, self._result_iids())
+            if sort_col:
+                backed = sort_col in indexed
+                self.sort_hint_var.set(f"Sortierung nach {sort_col}: "
+                                       + ("über Index" if backed else "ohne Index (Scan)"))
+            else:
+                self.sort_hint_var.set("")
+
+            status = f"Tabelle: {table}"
+            if index:
+                status += f" – Filter nutzt Index: {index}"
+            self._set_status(status)
+            label = "Gefunden" if clauses else "Zeilen"
+            shown = len(self.result)
+            self.row_count_var.set(f"{label}: {shown} / …")
+
+            # Gesamtzeilen im Hintergrund zählen (COUNT(*) kann bei großen Tabellen dauern)
+            self._load_token += 1
+            token = self._load_token
+            filter_where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+            count_sql = f"SELECT COUNT(*) FROM {self._ident(table)}{filter_where}"
+            if self._snapshot_started is not None:
+                # Eine zweite Verbindung sähe einen anderen Datenstand: im Snapshot zählen
+                key = (count_sql, tuple(params))
+                self.after_idle(lambda: self._count_in_snapshot(token, key, label, shown, limit, nav))
+            else:
+                task = self._count_task = BackgroundTask()
+                self._run_background(
+                    lambda conn: conn.execute(count_sql, params).fetchone()[0],
+                    lambda total: self._show_total(token, label, shown, total, limit, nav),
+                    task=task,
+                )
 
         except Exception as e:
             messagebox.showerror("Fehler beim Laden", str(e))
 
+    def _cancel_count(self):
+        """Bricht das COUNT(*) der zuletzt geladenen Seite ab, falls es noch läuft."""
+        if self._count_task is not None:
+            self._count_task.cancel()
+            self._count_task = None
+
+    def _show_total(self, token: int, label: str, shown: int, total: int,
+                    limit: int, nav: str):
+        """Zeigt das Zählergebnis, falls inzwischen nichts anderes geladen wurde."""
+        if token != self._load_token:
+            return
+        self._count_task = None
+        self.row_count_var.set(f"{label}: {shown} / {total}")
+        self._page_count = max(1, -(-total // limit))
+        if nav == "last":
+            self._page_no = self._page_count
+        self._update_pager()
+
+    def _count_in_snapshot(self, token: int, key: Tuple[str, Tuple], label: str,
+                           shown: int, limit: int, nav: str):
+        """
+        COUNT(*) auf der Snapshot-Verbindung; je Abfrage nur einmal pro Snapshot.
+
+        Nur self.conn sieht den Datenstand des Snapshots. Gezählt wird daher in
+        einem Worker-Thread auf dieser Verbindung, abbrechbar über den
+        Progress-Handler; bis zum Ergebnis zeigt die Zeilenzahl "…".
+        """
+        if token != self._load_token or self._snapshot_started is None:
+            return
+        total = self._snapshot_counts.get(key)
+        if total is not None:
+            self._show_total(token, label, shown, total, limit, nav)
+            return
+        self._cancel_snapshot_count()
+        task = self._snapshot_count = BackgroundTask()
+        conn, local, finished = self.conn, self._count_local, threading.Event()
+        self._snapshot_count_done = finished
+        # Bricht _claim_conn das Zählen ab, wird es danach hiermit nachgeholt
+        self._snapshot_count_retry = lambda: self._count_in_snapshot(token, key, label, shown, limit, nav)
+
+        def count():
+            local.task = task
+            try:
+                return conn.execute(*key).fetchone()[0]
+            finally:
+                finished.set()
+
+        def done(total: int):
+            if self._snapshot_count is task:
+                self._snapshot_count = None
+            if task.cancelled:
+                return  # neu geladen oder Snapshot beendet
+            self._snapshot_counts[key] = total
+            self._show_total(token, label, shown, total, limit, nav)
+
+        def failed(e: Exception):
+            if self._snapshot_count is task:
+                self._snapshot_count = None
+            if not task.cancelled:
+                self._set_status(f"Zählen fehlgeschlagen: {e}")
+
+        self._run_thread(count, done, failed)
+
+    def _snapshot_progress(self) -> int:
+        """Progress-Handler der Snapshot-Verbindung: bricht nur das COUNT im Zähl-Thread ab."""
+        task = getattr(self._count_local, "task", None)
+        return task.progress_handler() if task is not None else 0
+
+    def _cancel_snapshot_count(self):
+        """Bricht ein laufendes COUNT im Snapshot ab und wartet, bis es die Verbindung freigibt."""
+        if self._snapshot_count is not None:
+            self._snapshot_count.cancel()
+            self._snapshot_count = None
+            self._snapshot_count_done.wait()  # höchstens PROGRESS_STEPS VM-Schritte
+
+    def _claim_conn(self):
+        """
+        Vor jeder Nutzung von self.conn im UI-Thread aufrufen.
+
+        SQLite serialisiert jede Verbindung über einen Mutex: ein COUNT im
+        Snapshot-Zähl-Thread ließe die Oberfläche bis zu seinem Ende warten.
+        Es wird daher abgebrochen und nachgeholt, sobald nichts mehr
+        blockweise aus der Verbindung liest.
+        """
+        if self._snapshot_count is None:
+            return
+        self._cancel_snapshot_count()
+        retry = self._snapshot_count_retry
+        if retry is not None:
+            self.after(SNAPSHOT_COUNT_RETRY_MS, lambda: self._retry_snapshot_count(retry))
+
+    def _retry_snapshot_count(self, retry: Callable[[], None]):
+        if retry is not self._snapshot_count_retry or self._snapshot_count is not None:
+            return  # inzwischen neu geladen bzw. zählt schon wieder
+        if self._export is not None or self._copying:
+            self.after(SNAPSHOT_COUNT_RETRY_MS, lambda: self._retry_snapshot_count(retry))
+            return
+        retry()
+
+    def _refresh_table(self):
+        """Aktuelle Seite neu laden (F5); ein Snapshot wird dabei erneuert."""
+        self._renew_snapshot()
+        self._pivot_cache.clear()
+        self.load_selected_table("current")
+
+    # ==================== SNAPSHOT ====================
+    def _toggle_snapshot(self):
+        """Snapshot-Sitzung ein-/ausschalten (Menü und Toolbar teilen snapshot_var)."""
+        if not self.snapshot_var.get():
+            if not self._end_snapshot():
+                self.snapshot_var.set(True)
+            return
+        if self.conn is None:
+            return  # startet beim Öffnen der nächsten Datenbank
+        if not self._start_snapshot_session():
+            self.snapshot_var.set(False)
+            return
+        self.load_selected_table("current")  # Seite und Zählung aus dem Snapshot
+
+    def _start_snapshot_session(self) -> bool:
+        """Prüft den Journal-Modus und öffnet den Snapshot; False wenn abgelehnt."""
+        try:
+            mode = str(self.conn.execute("PRAGMA journal_mode").fetchone()[0]).lower()
+        except sqlite3.Error as e:
+            messagebox.showerror("Snapshot", str(e))
+            return False
+        if mode != "wal" and not messagebox.askyesno(
+                "Snapshot",
+                f"Die Datenbank nutzt den Journal-Modus '{mode}', nicht WAL.\n\n"
+                "Solange der Snapshot offen ist, können andere Programme nicht schreiben.\n"
+                "Trotzdem fortfahren?"):
+            return False
+        try:
+            self._begin_snapshot()
+        except sqlite3.Error as e:
+            messagebox.showerror("Snapshot", str(e))
+            return False
+        return True
+
+    def _begin_snapshot(self):
+        """BEGIN plus ein erster Lesezugriff legt den Datenstand für alle Folgeabfragen fest."""
+        self.conn.execute("BEGIN")
+        self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        self.conn.set_progress_handler(self._snapshot_progress, PROGRESS_STEPS)
+        self._snapshot_started = time.monotonic()
+        self._snapshot_counts.clear()
+        self._tick_snapshot()
+
+    def _end_snapshot(self) -> bool:
+        """Gibt den Snapshot frei; während Export oder Kopieren bleibt er bis zu deren Ende offen."""
+        if self._snapshot_started is None:
+            return True
+        if self._export is not None or self._copying:
+            what = "Exports" if self._export is not None else "Kopierens"
+            self._set_status(f"Snapshot bleibt bis zum Ende des {what} bestehen")
+            return False
+        self._snapshot_started = None
+        self._snapshot_counts.clear()
+        self._cancel_snapshot_count()
+        if self._snapshot_after is not None:
+            self.after_cancel(self._snapshot_after)
+            self._snapshot_after = None
+        self.snapshot_age_var.set("")
+        if self.conn is not None:
+            try:
+                if self.conn.in_transaction:
+                    self.conn.rollback()  # nur gelesen: ROLLBACK gibt die Lesesperre frei
+                self.conn.set_progress_handler(None, 0)
+            except sqlite3.Error:
+                pass
+        return True
+
+    def _renew_snapshot(self):
+        """Aktuellen Datenstand übernehmen: alten Snapshot freigeben, neuen öffnen."""
+        if self._snapshot_started is None or not self._end_snapshot():
+            return
+        try:
+            self._begin_snapshot()
+        except sqlite3.Error as e:
+            self.snapshot_var.set(False)
+            messagebox.showerror("Snapshot", str(e))
+
+    def _tick_snapshot(self):
+        """Alter des Snapshots in der Statusleiste."""
+        if self._snapshot_after is not None:
+            self.after_cancel(self._snapshot_after)
+            self._snapshot_after = None
+        if self._snapshot_started is None:
+            self.snapshot_age_var.set("")
+            return
+        age = int(time.monotonic() - self._snapshot_started)
+        if age < 60:
+            text = f"{age} s"
+        elif age < 3600:
+            text = f"{age // 60} min {age % 60:02d} s"
+        else:
+            text = f"{age // 3600} h {age // 60 % 60:02d} min"
+        self.snapshot_age_var.set(f"📸 Snapshot seit {text}")
+        self._snapshot_after = self.after(SNAPSHOT_TICK_MS, self._tick_snapshot)
+
+    def _key_exprs_for(self, meta: TableMeta, sort_col: Optional[str]) -> List[str]:
+        """Sortierschlüssel: Sortierspalte plus rowid bzw. Primärschlüssel als Tiebreaker."""
+        tie = meta.rowid_name()
+        ties = [tie] if tie else [self._ident(c) for c in meta.pk]
+        if not ties:
+            ties = [self._ident(c) for c in meta.columns]  # Notlösung: keine eindeutige Ordnung
+        if not sort_col or sort_col == meta.rowid_alias():
+            return ties  # INTEGER PRIMARY KEY ist die rowid selbst
+        sort_expr = self._column_expr(meta, sort_col)
+        return [sort_expr] + [t for t in ties if t != sort_expr]
+
+    def _json_column(self, table: str, name: str) -> Optional[JsonColumn]:
+        return next((j for j in self._json_columns.get(table, []) if j.name == name), None)
+
+    def _column_expr(self, meta: TableMeta, column: str) -> str:
+        """SQL-Ausdruck einer echten oder virtuellen (JSON-)Spalte."""
+        json_col = self._json_column(meta.name, column)
+        return json_col.expr(self._ident) if json_col else self._ident(column)
+
+    def _update_page_state(self, nav: str, first_key: Optional[Tuple],
+                           last_key: Optional[Tuple], more: bool, before: Optional[bool] = None):
+        """
+        Merkt sich die Seitengrenzen und was in welche Richtung noch folgt.
+
+        before: ob vor der Seite Zeilen liegen (für "current"/"jump" abgefragt).
+        """
+        self._page_first_key = first_key
+        self._page_last_key = last_key
+        if nav in ("prev", "last"):
+            self._page_has_prev = more
+            self._page_has_next = nav == "prev"
+        else:
+            self._page_has_next = more
+            if before is None:
+                before = nav == "next" and first_key is not None
+            self._page_has_prev = before
+
+        if nav == "first":
+            self._page_no, self._page_count = 1, None
+        elif nav == "next" and self._page_no:
+            self._page_no += 1
+        elif nav == "prev" and self._page_no:
+            self._page_no = max(1, self._page_no - 1)
+        elif nav in ("jump", "last"):
+            self._page_no = None
+        if not self._page_has_prev:
+            self._page_no = 1
+        self._update_pager()
+
+    def _update_pager(self):
+        """Aktiviert/deaktiviert die Blätter-Buttons und zeigt die Seitennummer."""
+        for name, allowed in (("first", self._page_has_prev), ("prev", self._page_has_prev),
+                              ("next", self._page_has_next), ("last", self._page_has_next)):
+            self.page_buttons[name].state(["!disabled"] if allowed else ["disabled"])
+        page = str(self._page_no) if self._page_no else "?"
+        total = f" / {self._page_count}" if self._page_count else ""
+        self.page_var.set(f"Seite {page}{total}")
+
+    def _reset_paging(self):
+        self._page_first_key = None
+        self._page_last_key = None
+        self._page_no = None
+        self._page_count = None
+        self._page_has_next = self._page_has_prev = False
+        self._page_key_exprs = []
+        self.result = None
+        self._result_complete = False
+        self._update_pager()
+        self.page_var.set("")
+
+    def _jump_to_value(self):
+        """Springt zur ersten Zeile, deren Sortierwert den eingegebenen Wert erreicht."""
+        table = self.table_var.get()
+        text = self.jump_var.get().strip()
+        if not table or not self.conn or not text:
+            return
+        meta = self._get_table_meta(table)
+        sort_col = self.sort_column if self.sort_column in self.current_columns else None
+        if sort_col:
+            affinity = meta.affinity(sort_col) if sort_col in meta.columns else "NUMERIC"
+        else:
+            affinity = "INTEGER"  # ohne Sortierung wird über die rowid gesprungen
+        value = None if text.upper() == "NULL" else _filter_value(text, affinity)
+        self.load_selected_table("jump", value)
+
+    def _on_table_selected(self):
+        """Neue Tabelle gewählt: Filter und Auswahl der alten Tabelle verwerfen."""
+        self._clear_selection()
+        self._clear_filters()
+        self.load_selected_table()
+        self._sync_chart()
+
+    def _get_table_meta(self, table: str) -> TableMeta:
+        """Spalten, Primärschlüssel und Indizes einer Tabelle (gecacht bis zum Neuladen)."""
+        meta = self._table_meta.get(table)
+        if meta is not None:
+            return meta
+
+        self._claim_conn()
+        meta = load_table_meta(self.conn, table, self._ident)
+        self._table_meta[table] = meta
+        return meta
+
+    def _build_where(self, meta: TableMeta) -> Tuple[List[str], List[Any], Optional[str]]:
+        """WHERE-Bedingungen aus Spaltenfiltern und Suchfeld (parametrisiert)."""
+        json_cols = self._json_columns.get(meta.name, [])
+        names = meta.columns + [j.name for j in json_cols]
+        filters = {c: var.get() for c, var in self.column_filters.items() if c in names}
+        exprs = {c: (self._ident(c), meta.affinity(c)) for c in meta.columns}
+
+        # JSON-Pfade: einzelne Werte wie Spalten über json_extract, [*] über json_each
+        each_filters: Dict[JsonColumn, str] = {}
+        for j in json_cols:
+            if not j.each:
+                exprs[j.name] = (j.expr(self._ident), "NUMERIC")
+            elif filters.get(j.name, "").strip():
+                each_filters[j] = filters.pop(j.name)
+        clauses, params, index = compile_filters(filters, exprs, meta.index_paths())
+        for j, text in each_filters.items():
+            try:
+                op, values = parse_filter(text, "NUMERIC")
+            except FilterError as e:
+                raise FilterError(f"{j.name}: {e}") from None
+            clause, args = j.predicate(self._ident, op, values)
+            clauses.append(clause)
+            params.extend(args)
+
+        search_term = self.search_var.get().strip().lower()
+        if search_term:
+            conditions = " OR ".join(f"{self._column_expr(meta, col)} LIKE ?" for col in names)
+            clauses.append(f"({conditions})")
+            params.extend(f"%{search_term}%" for _ in names)
+
+        return clauses, params, index
+
     # ==================== SCHEMA ====================
     def _load_schema(self):
         table = self.schema_table_var.get()
         if not table or not self.conn:
             return
+        self._claim_conn()
 
         try:
             cur = self.conn.execute(
@@ -402,11 +2506,11 @@ class SqlViewer(tk.Tk):
                 self._highlight_schema()
                 self.schema_text.config(state=tk.DISABLED)
 
-                # Zusätzliche Infos
-                info = self._get_table_info(table)
-                self.schema_text.config(state=tk.NORMAL)
-                self.schema_text.insert(tk.END, f"\n\n-- Tabellen-Info --\n{info}")
-                self.schema_text.config(state=tk.DISABLED)
+                # Zusätzliche Infos (mit COUNT(*)) im Hintergrund ermitteln
+                self._run_background(
+                    lambda conn: self._get_table_info(table, conn),
+                    lambda info: self._append_table_info(table, info),
+                )
 
         except Exception as e:
             messagebox.showerror("Fehler", str(e))
@@ -414,6 +2518,7 @@ class SqlViewer(tk.Tk):
     def _load_all_schemas(self):
         if not self.conn:
             return
+        self._claim_conn()
 
         try:
             cur = self.conn.execute(
@@ -434,29 +2539,37 @@ class SqlViewer(tk.Tk):
         except Exception as e:
             messagebox.showerror("Fehler", str(e))
 
-    def _get_table_info(self, table: str) -> str:
+    def _append_table_info(self, table: str, info: str):
+        """Hängt die Tabellen-Info an, sofern die Tabelle noch angezeigt wird."""
+        if table != self.schema_table_var.get():
+            return
+        self.schema_text.config(state=tk.NORMAL)
+        self.schema_text.insert(tk.END, f"\n\n-- Tabellen-Info --\n{info}")
+        self.schema_text.config(state=tk.DISABLED)
+
+    def _get_table_info(self, table: str, conn: sqlite3.Connection) -> str:
         """Holt zusätzliche Tabelleninformationen."""
         info_parts = []
 
         try:
             # Spalteninfo
-            cur = self.conn.execute(f"PRAGMA table_info({self._ident(table)})")
+            cur = conn.execute(f"PRAGMA table_info({self._ident(table)})")
             columns = cur.fetchall()
             info_parts.append(f"Spalten: {len(columns)}")
 
             # Zeilenanzahl
-            cur = self.conn.execute(f"SELECT COUNT(*) FROM {self._ident(table)}")
+            cur = conn.execute(f"SELECT COUNT(*) FROM {self._ident(table)}")
             count = cur.fetchone()[0]
             info_parts.append(f"Zeilen: {count}")
 
             # Indizes
-            cur = self.conn.execute(f"PRAGMA index_list({self._ident(table)})")
+            cur = conn.execute(f"PRAGMA index_list({self._ident(table)})")
             indexes = cur.fetchall()
             if indexes:
                 info_parts.append(f"Indizes: {len(indexes)}")
 
             # Foreign Keys
-            cur = self.conn.execute(f"PRAGMA foreign_key_list({self._ident(table)})")
+            cur = conn.execute(f"PRAGMA foreign_key_list({self._ident(table)})")
             fks = cur.fetchall()
             if fks:
                 info_parts.append(f"Foreign Keys: {len(fks)}")
@@ -503,8 +2616,9 @@ class SqlViewer(tk.Tk):
         if not sql:
             return
 
+        self._claim_conn()
+        start_time = time.perf_counter()
         try:
-            start_time = datetime.now()
             cur = self.conn.execute(sql)
 
             # Prüfe ob SELECT-artiges Statement (BUG 2: WITH/EXPLAIN/PRAGMA eingeschlossen)
@@ -513,41 +2627,114 @@ class SqlViewer(tk.Tk):
                 rows = cur.fetchall()
                 # BUG 3: Spaltenheader auch bei leeren Ergebnissen auslesen
                 cols = [desc[0] for desc in cur.description] if cur.description else []
+                count = len(rows)
+                elapsed = time.perf_counter() - start_time
                 if rows:
-                    self._populate_sql_result(cols, rows)
-                    elapsed = (datetime.now() - start_time).total_seconds()
-                    self.sql_status.config(text=f"✓ {len(rows)} Zeilen in {elapsed:.3f}s")
+                    self.sql_result = ResultBuffer(cols, rows)
+                    del rows
+                    self._populate_sql_result()
+                    self.sql_status.config(text=f"✓ {count} Zeilen in {elapsed:.3f}s")
                 else:
                     if cols:
-                        self._populate_sql_result(cols, [])
+                        self.sql_result = ResultBuffer(cols, [])
+                        self._populate_sql_result()
                     else:
                         self._clear_sql_result()
                     self.sql_status.config(text="✓ Keine Ergebnisse")
+                self._record_query(sql, count, elapsed)
             else:
-                self.conn.commit()
+                self.conn.commit()  # beendet auch eine offene Snapshot-Transaktion
                 affected = cur.rowcount
+                self._renew_snapshot()
+                self._record_query(sql, affected, time.perf_counter() - start_time)
                 self._clear_sql_result()
                 self.sql_status.config(text=f"✓ {affected} Zeilen betroffen")
                 self._load_tables()  # Aktualisiere Tabellenliste
 
         except Exception as e:
+            self._record_query(sql, None, time.perf_counter() - start_time, error=str(e))
             self.sql_status.config(text=f"✗ Fehler")
             messagebox.showerror("SQL-Fehler", str(e))
 
-    def _populate_sql_result(self, columns: List[str], rows: List[Tuple]):
-        """Füllt das SQL-Ergebnis-Treeview."""
+    def _record_query(self, sql: str, rows: Optional[int], elapsed: float,
+                      error: Optional[str] = None):
+        """
+        Schreibt eine Ausführung in den Verlauf; Fehler dort stören die Abfrage nie.
+
+        Der Plan-Hash (EXPLAIN QUERY PLAN) wird im Hintergrund auf einer
+        eigenen Verbindung ermittelt und nachgetragen.
+        """
+        history = self.history
+        if history is None:
+            return
+        try:
+            # Die gewählte Datei, nicht die entpackte Kopie im Cache (die beim Aufräumen verschwindet)
+            query_id = history.record(self.source_path, sql, rows, elapsed, None, error)
+        except (sqlite3.Error, OSError) as e:
+            self.history = None
+            self._set_status(f"Abfrageverlauf deaktiviert: {e}")
+            return
+        if error is None:
+            self._run_background(lambda conn: plan_fingerprint(conn, sql),
+                                 lambda plan: self._store_plan(history, query_id, plan))
+
+    def _store_plan(self, history: QueryHistory, query_id: int, plan: Optional[str]):
+        if history is not self.history:
+            return  # Verlauf inzwischen deaktiviert
+        try:
+            history.set_plan(query_id, plan)
+        except sqlite3.Error:
+            pass
+
+    def _open_history(self):
+        if self.history is None:
+            messagebox.showwarning("Abfrageverlauf", "Der Abfrageverlauf ist nicht verfügbar.")
+            return
+        HistoryDialog(self)
+
+    def _run_from_history(self, sql: str, execute: bool = True):
+        """Übernimmt SQL aus dem Verlauf in den Editor und führt es optional aus."""
+        self.notebook.select(self.sql_frame)
+        self._ensure_tab(self.sql_frame)
+        self.sql_text.delete("1.0", tk.END)
+        self.sql_text.insert("1.0", sql)
+        self._highlight_sql()
+        if execute:
+            self.execute_sql()
+
+    def _populate_sql_result(self, keep_sort: bool = False):
+        """Füllt das SQL-Ergebnis-Treeview aus self.sql_result."""
+        if not keep_sort:
+            self._sql_sort = None
+        result = self.sql_result
         self.sql_result_tree.delete(*self.sql_result_tree.get_children())
-        self.sql_result_tree["columns"] = columns
+        # Spalten über Position ansprechen: Ergebnisse dürfen doppelte Namen haben
+        col_ids = [f"c{i}" for i in range(len(result.columns))]
+        self.sql_result_tree["columns"] = col_ids
 
-        for c in columns:
-            self.sql_result_tree.heading(c, text=c)
-            self.sql_result_tree.column(c, width=120, anchor="w")
+        for i, (cid, c) in enumerate(zip(col_ids, result.columns)):
+            indicator = ""
+            if self._sql_sort and self._sql_sort[0] == i:
+                indicator = " ↓" if self._sql_sort[1] else " ↑"
+            self.sql_result_tree.heading(cid, text=c + indicator,
+                                         command=lambda idx=i: self._sort_sql_result(idx))
+            self.sql_result_tree.column(cid, width=120, anchor="w")
 
-        for row in rows:
+        for row in result.iter_rows():
             values = [self._format_value(v) for v in row]
             self.sql_result_tree.insert("", tk.END, values=values)
 
+    def _sort_sql_result(self, col_index: int):
+        """Sortiert das SQL-Ergebnis im Speicher, ohne die Abfrage erneut auszuführen."""
+        if self.sql_result is None:
+            return
+        reverse = bool(self._sql_sort and self._sql_sort == (col_index, False))
+        self._sql_sort = (col_index, reverse)
+        self.sql_result.sort(col_index, reverse)
+        self._populate_sql_result(keep_sort=True)
+
     def _clear_sql_result(self):
+        self.sql_result = None
         self.sql_result_tree.delete(*self.sql_result_tree.get_children())
         self.sql_result_tree["columns"] = ()
 
@@ -568,9 +2755,25 @@ class SqlViewer(tk.Tk):
 
     # ==================== EXPORT ====================
     def export_csv(self):
-        if not self.current_columns or not self.current_data:
+        if self.result is None or not len(self.result):
             messagebox.showwarning("Export", "Keine Daten zum Exportieren.")
             return
+        self._claim_conn()
+        if self._export is not None:
+            messagebox.showwarning("Export", "Es läuft bereits ein Export.")
+            return
+
+        # Nur eine Seite geladen: wahlweise die ganze (gefilterte) Tabelle streamen
+        full = False
+        if not self._result_complete and self.table_var.get() and self.conn is not None:
+            answer = messagebox.askyesnocancel(
+                "Export",
+                f"Angezeigt wird nur eine Seite ({len(self.result)} Zeilen).\n\n"
+                "Ja: alle Zeilen der Tabelle exportieren (mit Filtern und Sortierung)\n"
+                "Nein: nur die aktuelle Seite")
+            if answer is None:
+                return
+            full = answer
 
         table = self.table_var.get() or "export"
         default_name = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
@@ -586,73 +2789,161 @@ class SqlViewer(tk.Tk):
             return
 
         try:
+            if full:
+                self._export_table(table, path)
+                return
             with open(path, "w", newline="", encoding="utf-8-sig") as f:
                 writer = csv.writer(f, delimiter=";", quoting=csv.QUOTE_MINIMAL)
-                writer.writerow(self.current_columns)
-                writer.writerows(self.current_data)
+                writer.writerow(self.result.columns)
+                writer.writerows(self.result.iter_rows())
 
             self._set_status(f"Exportiert: {os.path.basename(path)}")
-            messagebox.showinfo("Export", f"Erfolgreich exportiert:\n{path}\n\n{len(self.current_data)} Zeilen")
+            messagebox.showinfo("Export", f"Erfolgreich exportiert:\n{path}\n\n{len(self.result)} Zeilen")
 
         except Exception as e:
             messagebox.showerror("Export-Fehler", str(e))
 
-    # ==================== SEARCH ====================
-    def _search_data(self):
-        """Filtert die Daten basierend auf dem Suchbegriff."""
-        search_term = self.search_var.get().strip().lower()
+    def _export_table(self, table: str, path: str):
+        """
+        Streamt die ganze gefilterte Tabelle blockweise in die CSV-Datei.
+
+        Ein einziger Cursor auf der Hauptverbindung liest alles aus derselben
+        Lesetransaktion (bzw. dem offenen Snapshot); zwischen den Blöcken
+        bleibt die Oberfläche bedienbar. Ausnahme ist der erste Block: Ist die
+        Sortierung nicht durch einen Index gedeckt, sortiert SQLite dabei die
+        ganze gefilterte Tabelle, und so lange blockiert die Oberfläche.
+        """
+        meta = self._get_table_meta(table)
+        json_cols = self._json_columns.get(table, [])
+        clauses, params, _ = self._build_where(meta)
+        sort_col = self.sort_column if self.sort_column in self.current_columns else None
+        direction = "DESC" if sort_col and self.sort_reverse else "ASC"
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = ", ".join(f"{e} {direction}" for e in self._key_exprs_for(meta, sort_col))
+        json_sql = "".join(f", {j.expr(self._ident)}" for j in json_cols)
+        sql = f"SELECT *{json_sql} FROM {self._ident(table)}{where} ORDER BY {order}"
+        cur = self.conn.execute(sql, params)
+
+        f = open(path, "w", newline="", encoding="utf-8-sig")
+        writer = csv.writer(f, delimiter=";", quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(meta.columns + [j.name for j in json_cols])
+        export = self._export = (f, path)
+        written = 0
+        if needs_temp_sort(self.conn, sql, params):
+            self._set_status(f"Sortiere {table} für den Export (ohne Index)…")
+            self.update_idletasks()
+
+        def step():
+            nonlocal written
+            if self._export is not export:
+                return  # abgebrochen (Datenbank geschlossen)
+            self._claim_conn()  # zwischen zwei Blöcken kann neu gezählt worden sein
+            try:
+                rows = cur.fetchmany(EXPORT_BATCH)
+                writer.writerows(rows)
+            except (sqlite3.Error, OSError) as e:
+                self._abort_export()
+                messagebox.showerror("Export-Fehler", str(e))
+                return
+            written += len(rows)
+            if len(rows) == EXPORT_BATCH:
+                self._set_status(f"Exportiere {table}: {written:,} Zeilen…")
+                self.after(1, step)
+                return
+            self._export = None
+            f.close()
+            self._set_status(f"Exportiert: {os.path.basename(path)}")
+            messagebox.showinfo("Export", f"Erfolgreich exportiert:\n{path}\n\n{written} Zeilen")
 
-        if not search_term:
-            # Zeige alle Daten
-            self.load_selected_table()
-            return
+        step()
 
-        if not self.current_columns or not self.conn:
+    def _abort_export(self):
+        """Bricht einen laufenden Tabellen-Export ab und entfernt die halbe Datei."""
+        if self._export is None:
             return
+        f, path = self._export
+        self._export = None
+        f.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        self._set_status("Export abgebrochen")
 
-        table = self.table_var.get()
-        if not table:
+    # ==================== SEARCH ====================
+    def _search_data(self):
+        """Filtert die Daten basierend auf dem Suchbegriff (kombiniert mit Spaltenfiltern)."""
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+            self._search_after = None
+
+        # Liegt das ungesuchte Ergebnis komplett im Speicher, dort filtern statt neu abzufragen
+        if self._result_complete and not self._result_search and self.result is not None:
+            term = self.search_var.get().strip()
+            self.result.search(term)
+            self._render_result()
+            label = "Gefunden" if term else "Zeilen"
+            self.row_count_var.set(f"{label}: {len(self.result)} / {self.result.row_count}")
             return
+        self.load_selected_table()
 
-        # Suche in allen Spalten
-        try:
-            conditions = " OR ".join([f"{self._ident(col)} LIKE ?" for col in self.current_columns])
-            query = f"SELECT * FROM {self._ident(table)} WHERE {conditions} LIMIT ?"
-            params = [f"%{search_term}%" for _ in self.current_columns]
-            params.append(self.limit_var.get())
-
-            cur = self.conn.execute(query, params)
-            rows = cur.fetchall()
+    def _on_search_key(self, event=None):
+        """Suche erst nach einer kurzen Tipp-Pause ausführen."""
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(250, self._search_data)
 
-            self._clear_tree()
-            self.tree["columns"] = self.current_columns
-            for c in self.current_columns:
-                self.tree.heading(c, text=c, command=lambda col=c: self._sort_by_column(col))
-                self.tree.column(c, width=120, anchor="w")
+    def _focus_search(self):
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
 
-            for row in rows:
-                values = [self._format_value(row[c]) for c in self.current_columns]
-                self.tree.insert("", tk.END, values=values)
+    # ==================== COLUMN FILTERS ====================
+    def _build_filter_row(self, columns: List[str]):
+        """Erzeugt je Spalte ein Filterfeld in der Zeile über den Spaltenköpfen."""
+        if columns == self._filter_columns:
+            self._layout_filter_row()
+            return
 
-            self.row_count_var.set(f"Gefunden: {len(rows)}")
+        self.filter_canvas.delete("all")
+        for child in self.filter_canvas.winfo_children():
+            child.destroy()
+        self._filter_columns = list(columns)
 
-        except Exception as e:
-            self._set_status(f"Suchfehler: {e}")
+        for c in columns:
+            var = self.column_filters.setdefault(c, tk.StringVar())
+            entry = ttk.Entry(self.filter_canvas, textvariable=var)
+            entry.bind("<Return>", lambda e: self._apply_filters())
+            entry.bind("<Escape>", lambda e, v=var: (v.set(""), self._apply_filters()))
+            self.filter_canvas.create_window(0, 1, anchor="nw", window=entry, tags=("filter",))
+        self._layout_filter_row()
+
+    def _layout_filter_row(self):
+        """Richtet die Filterfelder an den aktuellen Spaltenbreiten aus."""
+        x = 0
+        for item, c in zip(self.filter_canvas.find_withtag("filter"), self._filter_columns):
+            width = int(self.tree.column(c, "width"))
+            self.filter_canvas.coords(item, x, 1)
+            self.filter_canvas.itemconfigure(item, width=max(width - 2, 10))
+            x += width
+        self.filter_canvas.configure(scrollregion=(0, 0, x, 26))
+        self.filter_canvas.xview_moveto(self.tree.xview()[0])
+
+    def _on_grid_xscroll(self, first, last):
+        """Horizontales Scrollen des Grids auf die Filterzeile übertragen."""
+        self.grid_hsb.set(first, last)
+        self.filter_canvas.xview_moveto(first)
+
+    def _apply_filters(self):
+        self.load_selected_table()
 
-    def _focus_search(self):
-        self.search_entry.focus_set()
-        self.search_entry.select_range(0, tk.END)
+    def _clear_filters(self):
+        self.column_filters.clear()
+        self._filter_columns = []
+        self.filter_canvas.delete("all")
+        for child in self.filter_canvas.winfo_children():
+            child.destroy()
 
     # ==================== SORTING ====================
-    def _on_header_click(self, event):
-        """Handler für Klicks auf Spalten-Header."""
-        region = self.tree.identify_region(event.x, event.y)
-        if region == "heading":
-            column = self.tree.identify_column(event.x)
-            col_idx = int(column.replace("#", "")) - 1
-            if 0 <= col_idx < len(self.current_columns):
-                self._sort_by_column(self.current_columns[col_idx])
-
     def _sort_by_column(self, column: str):
         """Sortiert die Tabelle nach einer Spalte."""
         if self.sort_column == column:
@@ -661,32 +2952,54 @@ class SqlViewer(tk.Tk):
             self.sort_column = column
             self.sort_reverse = False
 
+        # Vollständig geladenes Ergebnis im Speicher umsortieren
+        if self._result_complete and self.result is not None and column in self.result.columns:
+            self.result.sort(self.result.columns.index(column), self.sort_reverse)
+            self._render_result()
+            self.sort_hint_var.set(f"Sortierung nach {column}: im Speicher")
+            return
         self.load_selected_table()
 
+    def _render_result(self):
+        """Zeigt self.result (in aktueller Sortierung/Suche) im Grid an."""
+        self._populate_tree(self.result.columns, self.result.iter_rows(), self._indexed_columns,
+                            self._result_iids())
+
+    def _result_iids(self) -> Optional[Iterable[int]]:
+        """rowids der Zeilen in Anzeigereihenfolge (als Treeview-iids), sonst None."""
+        if self._page_rowids is None or self.result is None:
+            return None
+        rowids = self._page_rowids
+        return (rowids[i] for i in self.result.order)
+
     # ==================== TREE HELPERS ====================
     def _clear_tree(self):
         self.tree.delete(*self.tree.get_children())
         self.tree["columns"] = ()
 
-    def _populate_tree(self, columns: List[str], rows: List):
+    def _populate_tree(self, columns: List[str], rows: List, indexed: frozenset = frozenset(),
+                       iids: Optional[Iterable[int]] = None):
         self._clear_tree()
+        self.row_selection.ranges = []  # markierte Items verschwinden; "alle" bleibt bestehen
 
         self.tree["columns"] = columns
         for c in columns:
-            # Sortierindikator
-            indicator = ""
+            # Sortierindikator, ⚡ = Spalte ist führende Spalte eines Index
+            indicator = " ⚡" if c in indexed else ""
             if c == self.sort_column:
-                indicator = " ↓" if self.sort_reverse else " ↑"
+                indicator += " ↓" if self.sort_reverse else " ↑"
 
             self.tree.heading(c, text=c + indicator, command=lambda col=c: self._sort_by_column(col))
             self.tree.column(c, width=120, anchor="w")
 
-        for row in rows:
-            if isinstance(row, sqlite3.Row):
-                values = [self._format_value(row[c]) for c in columns]
-            else:
-                values = [self._format_value(v) for v in row]
-            self.tree.insert("", tk.END, values=values)
+        self._build_filter_row(columns)
+
+        if iids is None:
+            for row in rows:
+                self.tree.insert("", tk.END, values=[self._format_value(v) for v in row])
+        else:
+            for iid, row in zip(iids, rows):
+                self.tree.insert("", tk.END, iid=iid, values=[self._format_value(v) for v in row])
 
     def _format_value(self, value: Any) -> str:
         """Formatiert einen Wert für die Anzeige."""
@@ -696,9 +3009,212 @@ class SqlViewer(tk.Tk):
             return f"[BLOB {len(value)} bytes]"
         return str(value)
 
+    # ==================== JSON ====================
+    def _cell_text(self, tree: ttk.Treeview, event) -> Optional[Tuple[int, str]]:
+        """(Spaltenindex, Text) der angeklickten Zelle, falls sie wie JSON aussieht."""
+        row_id, col_id = tree.identify_row(event.y), tree.identify_column(event.x)
+        if not row_id or not col_id.startswith("#"):
+            return None
+        index = int(col_id[1:]) - 1
+        values = tree.item(row_id, "values")
+        if not 0 <= index < len(values):
+            return None
+        text = str(values[index])
+        return (index, text) if text.lstrip()[:1] in ("{", "[") else None
+
+    def _on_grid_double_click(self, event):
+        cell = self._cell_text(self.tree, event)
+        if cell is None or self.result is None:
+            return
+        table, column = self.table_var.get(), self.result.columns[cell[0]]
+        source = (table, column) if column in self._get_table_meta(table).columns else None
+        JsonInspector(self, f"{table}.{column}", cell[1], source)
+
+    def _on_sql_double_click(self, event):
+        cell = self._cell_text(self.sql_result_tree, event)
+        if cell is not None and self.sql_result is not None:
+            JsonInspector(self, self.sql_result.columns[cell[0]], cell[1])
+
+    def _open_json_columns(self):
+        table = self.table_var.get()
+        if not table or not self.conn:
+            messagebox.showwarning("Warnung", "Keine Tabelle geöffnet.")
+            return
+        JsonColumnsDialog(self, table)
+
+    def _set_json_columns(self, table: str, columns: List[JsonColumn]):
+        """Setzt die virtuellen JSON-Spalten einer Tabelle und lädt neu."""
+        if columns:
+            self._json_columns[table] = list(dict.fromkeys(columns))
+        else:
+            self._json_columns.pop(table, None)
+        if table == self.table_var.get():
+            self.load_selected_table()
+
+    def _add_json_column(self, table: str, column: str, path: str):
+        try:
+            json_col = JsonColumn(column, path)
+        except FilterError as e:
+            messagebox.showerror("JSON", str(e))
+            return
+        self._set_json_columns(table, self._json_columns.get(table, []) + [json_col])
+
+    def _open_pivot(self):
+        table = self.table_var.get()
+        if not table or not self.conn:
+            messagebox.showwarning("Warnung", "Keine Tabelle geöffnet.")
+            return
+        PivotDialog(self, table)
+
+    def _pivot_cached(self, key: Tuple) -> Optional[Tuple]:
+        result = self._pivot_cache.pop(key, None)
+        if result is not None:
+            self._pivot_cache[key] = result  # zuletzt benutzt: ans Ende
+        return result
+
+    def _pivot_store(self, key: Tuple, result: Tuple):
+        self._pivot_cache[key] = result
+        while len(self._pivot_cache) > PIVOT_CACHE_SIZE:
+            del self._pivot_cache[next(iter(self._pivot_cache))]
+
+    def _drill_down(self, table: str, filters: Dict[str, str], search: str):
+        """Zeigt die Zeilen hinter einer Pivot-Zelle über Suche und Spaltenfilter im Daten-Tab."""
+        if table not in self.tables:
+            return
+        if table != self.table_var.get():
+            self.table_var.set(table)
+            self._clear_filters()
+            self._sync_chart()
+        for var in self.column_filters.values():
+            var.set("")
+        for column, text in filters.items():
+            self.column_filters.setdefault(column, tk.StringVar()).set(text)
+        self.search_var.set(search)
+        self.notebook.select(self.data_frame)
+        self.load_selected_table()
+
+    # ==================== AUSWAHL / KOPIEREN ====================
     def _select_all(self):
-        """Wählt alle Zeilen im Treeview aus."""
-        self.tree.selection_set(self.tree.get_children())
+        """Wählt alle Zeilen der Tabelle aus – als Flag, ohne jedes Treeview-Item zu markieren."""
+        if self.result is None:
+            return
+        self.tree.selection_remove(self.tree.selection())
+        self.row_selection.all = True
+        self.row_selection.ranges = []
+        self.tree.configure(style="AllSelected.Treeview")
+        self._set_status("Alle Zeilen ausgewählt – Ctrl+C kopiert, Escape hebt auf")
+
+    def _clear_selection(self):
+        self.row_selection.clear()
+        self.tree.configure(style="Treeview")
+        self.tree.selection_remove(self.tree.selection())
+
+    def _on_tree_select(self, event=None):
+        """Angeklickte Zeilen übernehmen; ersetzt ein vorheriges "alle"."""
+        items = self.tree.selection()
+        if not items:
+            return  # auch nach selection_remove in _select_all: das Flag bleibt
+        if self.row_selection.all:
+            self.row_selection.all = False
+            self.tree.configure(style="Treeview")
+        if self._page_rowids is not None:
+            self.row_selection.set_ids(int(item) for item in items)
+
+    def _copy_selection(self, fmt: str = "tsv"):
+        """
+        Kopiert die Auswahl als TSV, Markdown oder INSERT-Anweisungen.
+
+        Die Zeilen werden aus der Datenbank gelesen (bei "alle" mit Suche,
+        Filtern und Sortierung des Grids) und blockweise an die
+        Zwischenablage angehängt; zwischen den Blöcken bleibt die
+        Oberfläche bedienbar. Ist die Sortierung bei "alle" nicht durch
+        einen Index gedeckt, müsste SQLite vor dem ersten Block die ganze
+        Tabelle sortieren; dann wird gefragt, ob in rowid-Reihenfolge kopiert wird.
+        """
+        table = self.table_var.get()
+        if not table or self.conn is None or self.result is None:
+            return
+        self._claim_conn()
+        meta = self._get_table_meta(table)
+        # Virtuelle JSON-Spalten gibt es in der Zieltabelle eines INSERT nicht
+        json_cols = [] if fmt == "insert" else self._json_columns.get(table, [])
+        columns = meta.columns + [j.name for j in json_cols]
+        table_sql = self._ident(table)
+        select = ", ".join([self._ident(c) for c in meta.columns] + [j.expr(self._ident) for j in json_cols])
+        sort_col = self.sort_column if self.sort_column in self.current_columns else None
+        direction = "DESC" if sort_col and self.sort_reverse else "ASC"
+        order = ", ".join(f"{e} {direction}" for e in self._key_exprs_for(meta, sort_col))
+
+        selection = self.row_selection
+        try:
+            if selection.all:
+                clauses, params, _ = self._build_where(meta)
+                where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+                sql = f"SELECT {select} FROM {table_sql}{where} ORDER BY {order}"
+                stored = meta.rowid_name() or ", ".join(self._ident(c) for c in meta.pk)
+                if sort_col and needs_temp_sort(self.conn, sql, params):
+                    answer = messagebox.askyesnocancel(
+                        "Kopieren",
+                        f"Für die Sortierung nach {sort_col} gibt es keinen Index: SQLite müsste "
+                        "vor dem Kopieren die ganze Tabelle sortieren, so lange ist die Oberfläche blockiert.\n\n"
+                        "Ja: in Speicherreihenfolge (rowid bzw. Primärschlüssel) kopieren\n"
+                        "Nein: trotzdem sortiert kopieren")
+                    if answer is None:
+                        return
+                    if answer and stored:
+                        sql = f"SELECT {select} FROM {table_sql}{where} ORDER BY {stored}"
+                fetch = self.conn.execute(sql, params).fetchmany
+            elif selection.ranges:
+                sql = selection_sql(meta.rowid_name(), select, table_sql, order)
+                fetch = self.conn.execute(sql, (json.dumps(selection.ranges),)).fetchmany
+            else:
+                fetch = self._selected_result_rows(len(columns))
+        except (sqlite3.Error, FilterError) as e:
+            self._set_status(f"Kopieren fehlgeschlagen: {e}")
+            return
+        if fetch is None:
+            self._set_status("Keine Zeilen ausgewählt")
+            return
+
+        insert_into = f"INSERT INTO {table_sql} ({', '.join(self._ident(c) for c in columns)})"
+        self.clipboard_clear()
+        self._copy_token += 1
+        token = self._copy_token
+        self._copying = selection.all or bool(selection.ranges)  # liest aus self.conn
+        copied = 0
+
+        def step():
+            nonlocal copied
+            if token != self._copy_token:
+                return  # abgelöst oder Datenbank geschlossen
+            self._claim_conn()
+            try:
+                rows = fetch(COPY_BATCH)
+            except sqlite3.Error as e:
+                self._copying = False
+                self._set_status(f"Kopieren fehlgeschlagen: {e}")
+                return
+            self.clipboard_append(copy_chunk(fmt, columns, rows, header=copied == 0,
+                                             insert_into=insert_into))
+            copied += len(rows)
+            if len(rows) == COPY_BATCH:
+                self._set_status(f"Kopiere … {copied:,} Zeilen")
+                self.after(1, step)
+            else:
+                self._copying = False
+                self._set_status(f"{copied} Zeilen als {COPY_FORMATS[fmt]} kopiert")
+
+        step()
+
+    def _selected_result_rows(self, width: int) -> Optional[Callable[[int], List[Tuple]]]:
+        """Markierte Zeilen aus der geladenen Seite (Tabellen ohne rowid)."""
+        items = self.tree.selection()
+        if not items:
+            return None
+        position = {item: pos for pos, item in enumerate(self.tree.get_children())}
+        order = self.result.order
+        rows = iter([self.result.row(order[position[item]])[:width] for item in items])
+        return lambda n: [row for _, row in zip(range(n), rows)]
 
     # ==================== UTILS ====================
     _SQLITE_KEYWORDS = {
@@ -739,9 +3255,104 @@ class SqlViewer(tk.Tk):
     def _set_status(self, text: str):
         self.status_var.set(text)
 
+    # ==================== BACKGROUND ====================
+    def _run_background(self, job: Callable[[sqlite3.Connection], Any],
+                        on_done: Optional[Callable[[Any], Any]] = None,
+                        on_error: Optional[Callable[[Exception], Any]] = None,
+                        task: Optional["BackgroundTask"] = None,
+                        writable: bool = False):
+        """
+        Führt job(conn) in einem Thread mit eigener Verbindung aus.
+
+        Die Verbindung ist read-only, außer writable=True. Mit task wird ein
+        Progress-Handler installiert, über den der Job abgebrochen werden kann.
+        on_done/on_error laufen anschließend im UI-Thread (über _poll_ui_queue).
+        """
+        db_path = self.db_path
+        if not db_path:
+            return
+
+        def run():
+            conn = sqlite3.connect(db_path) if writable else connect_readonly(db_path)
+            try:
+                if task is not None:
+                    conn.set_progress_handler(task.progress_handler, PROGRESS_STEPS)
+                return job(conn)
+            finally:
+                conn.close()
+
+        self._run_thread(run, on_done, on_error)
+
+    def _run_thread(self, func: Callable[[], Any],
+                    on_done: Optional[Callable[[Any], Any]] = None,
+                    on_error: Optional[Callable[[Exception], Any]] = None):
+        """Führt func() in einem Daemon-Thread aus, Rückmeldung im UI-Thread."""
+        def worker():
+            try:
+                result = func()
+            except Exception as e:
+                self._ui_queue.put((on_error, e))
+            else:
+                self._ui_queue.put((on_done, result))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _poll_ui_queue(self):
+        """Übernimmt Ergebnisse der Hintergrund-Jobs im UI-Thread."""
+        try:
+            while True:
+                callback, value = self._ui_queue.get_nowait()
+                if callback is not None:
+                    try:
+                        callback(value)
+                    except Exception as e:
+                        self._set_status(f"Fehler: {e}")
+        except queue.Empty:
+            pass
+        self.after(UI_POLL_MS, self._poll_ui_queue)
+
+    # ==================== STARTUP TIMER ====================
+    def _on_first_map(self, event):
+        if event.widget is not self:
+            return
+        self.unbind("<Map>")
+        t_mapped = time.perf_counter()
+        # Nach dem Mappen erledigt Tk das Zeichnen in den Idle-Tasks
+        self.after_idle(lambda: self._report_startup(t_mapped))
+
+    def _report_startup(self, t_mapped: float):
+        self.update_idletasks()
+        now = time.perf_counter()
+        self._startup_times["paint"] = now - t_mapped
+        self._startup_times["total"] = now - _T_START
+        total_ms = self._startup_times["total"] * 1000
+        if not self.conn:
+            self._set_status(f"Bereit – Start in {total_ms:.0f} ms")
+        if os.environ.get("SQLITEVIEWER_TIMING"):
+            print(self._format_startup_times(), file=sys.stderr)
+
+    def _format_startup_times(self) -> str:
+        labels = [("import", "Import"), ("window", "Fensteraufbau"),
+                  ("paint", "Erster Paint"), ("total", "Gesamt")]
+        return "\n".join(
+            f"{label}: {self._startup_times[key] * 1000:.0f} ms"
+            for key, label in labels if key in self._startup_times
+        )
+
+    def _open_maintenance(self):
+        if not self.conn or not self.db_path:
+            messagebox.showwarning("Warnung", "Keine Datenbank geöffnet.")
+            return
+        MaintenanceDialog(self)
+
+    def _show_startup_times(self):
+        messagebox.showinfo("Startzeiten", self._format_startup_times())
+
     def _on_close(self):
         """Sauberes Schließen: DB schließen, dann Fenster zerstören."""
         self.close_db()
+        if self.history is not None:
+            self.history.close()
         self.destroy()
 
     def _show_about(self):
@@ -759,6 +3370,1781 @@ class SqlViewer(tk.Tk):
         )
 
 
+# ==================== DIAGRAMM ====================
+class ChartPanel(ttk.Frame):
+    """
+    Zeitreihen-Diagramm auf einem Canvas.
+
+    SQLite verdichtet den sichtbaren Bereich auf einen Bucket pro Pixelspalte
+    (MIN/MAX/AVG), Python zeichnet daraus Hüllkurve und LTTB-Linie. Zoom
+    (Mausrad) und Verschieben (Ziehen) fragen nur den neuen Bereich ab.
+    """
+
+    MARGIN = (70, 15, 15, 40)  # links, rechts, oben, unten
+    COLORS = ("#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd", "#8c564b")
+    LIGHT = ("#b3d1e8", "#f0b5b6", "#b8e2b8", "#ffd2a8", "#dacbe8", "#d6c1bd")
+    REQUERY_MS = 200
+
+    def __init__(self, master, app: "SqlViewer"):
+        super().__init__(master)
+        self.app = app
+        self.table: Optional[str] = None
+        self.x_axes: List[Tuple[str, str]] = []
+        self.y_axes: List[str] = []
+        self.full_range: Optional[Tuple[float, float]] = None
+        self.view: Optional[Tuple[float, float]] = None
+        self.data: Optional[Dict[str, Any]] = None
+        self.task: Optional[BackgroundTask] = None
+        self._token = 0
+        self._dirty = False
+        self._requery_after: Optional[str] = None
+        self._drag: Optional[Tuple[int, Tuple[float, float]]] = None
+
+        toolbar = ttk.Frame(self, padding=5)
+        toolbar.pack(fill=tk.X)
+        ttk.Label(toolbar, text="X-Achse:").pack(side=tk.LEFT)
+        self.x_var = tk.StringVar()
+        self.x_combo = ttk.Combobox(toolbar, textvariable=self.x_var, state="readonly", width=22)
+        self.x_combo.pack(side=tk.LEFT, padx=4)
+        self.x_combo.bind("<<ComboboxSelected>>", lambda e: self._on_x_changed())
+
+        ttk.Label(toolbar, text="Werte:").pack(side=tk.LEFT, padx=(10, 0))
+        self.y_list = tk.Listbox(toolbar, selectmode=tk.MULTIPLE, height=3, width=22, exportselection=False)
+        self.y_list.pack(side=tk.LEFT, padx=4)
+        self.y_list.bind("<<ListboxSelect>>", lambda e: self.plot())
+
+        ttk.Label(toolbar, text="Linie:").pack(side=tk.LEFT, padx=(10, 0))
+        self.line_var = tk.StringVar(value="LTTB")
+        line_combo = ttk.Combobox(toolbar, textvariable=self.line_var, state="readonly", width=12,
+                                  values=("LTTB", "Mittelwert", "keine"))
+        line_combo.pack(side=tk.LEFT, padx=4)
+        line_combo.bind("<<ComboboxSelected>>", lambda e: self._draw())
+
+        ttk.Button(toolbar, text="Gesamt", command=self.plot).pack(side=tk.LEFT, padx=10)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(toolbar, textvariable=self.status_var, foreground="#666").pack(side=tk.RIGHT, padx=6)
+
+        self.canvas = tk.Canvas(self, background="white", highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+        self.canvas.bind("<Configure>", lambda e: self._schedule_requery())
+        self.canvas.bind("<MouseWheel>", lambda e: self._zoom(e.x, 0.8 if e.delta > 0 else 1.25))
+        self.canvas.bind("<Button-4>", lambda e: self._zoom(e.x, 0.8))
+        self.canvas.bind("<Button-5>", lambda e: self._zoom(e.x, 1.25))
+        self.canvas.bind("<ButtonPress-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<Double-Button-1>", lambda e: self.plot())
+
+    # ---------- Tabelle / Achsen ----------
+    def set_table(self, table: Optional[str]):
+        """Übernimmt die im Daten-Tab gewählte Tabelle und bietet passende Achsen an."""
+        self._cancel()
+        self.table = table
+        self.full_range = self.view = self.data = None
+        self.x_axes, self.y_axes = [], []
+        if table and self.app.conn:
+            try:
+                self.x_axes, self.y_axes = chart_axes(self.app._get_table_meta(table))
+            except sqlite3.Error as e:
+                self.status_var.set(f"Fehler: {e}")
+        self.x_combo["values"] = [f"{col} ({'Zeit' if kind == 'time' else 'Zahl'})"
+                                  for col, kind in self.x_axes]
+        if self.x_axes:
+            self.x_combo.current(0)
+        else:
+            self.x_var.set("")
+        self._fill_y_list()
+        self._dirty = True
+        if self.winfo_ismapped():
+            self.on_show()
+        else:
+            self._draw()
+
+    def on_show(self):
+        """Tab wurde sichtbar: ausstehende Abfrage jetzt ausführen."""
+        if self._dirty:
+            self.plot()
+
+    def _x_axis(self) -> Optional[Tuple[str, str]]:
+        index = self.x_combo.current()
+        return self.x_axes[index] if 0 <= index < len(self.x_axes) else None
+
+    def _fill_y_list(self):
+        x_axis = self._x_axis()
+        self.y_list.delete(0, tk.END)
+        for col in self.y_axes:
+            if not x_axis or col != x_axis[0]:
+                self.y_list.insert(tk.END, col)
+        if self.y_list.size():
+            self.y_list.selection_set(0)
+
+    def _y_columns(self) -> List[str]:
+        return [self.y_list.get(i) for i in self.y_list.curselection()][:len(self.COLORS)]
+
+    def _on_x_changed(self):
+        self._fill_y_list()
+        self.plot()
+
+    # ---------- Abfrage ----------
+    def plot(self):
+        """Gesamten Bereich neu abfragen (setzt Zoom zurück)."""
+        self.full_range = self.view = None
+        self._query()
+
+    def _plot_size(self) -> Tuple[int, int]:
+        left, right, top, bottom = self.MARGIN
+        return (max(10, self.canvas.winfo_width() - left - right),
+                max(10, self.canvas.winfo_height() - top - bottom))
+
+    def _query(self):
+        self._dirty = False
+        self._cancel()
+        x_axis, y_cols = self._x_axis(), self._y_columns()
+        if not self.table or not self.app.conn or not x_axis or not y_cols:
+            self.data = None
+            self._draw()
+            return
+
+        ident = self.app._ident
+        table_sql, x_sql, kind = ident(self.table), ident(x_axis[0]), x_axis[1]
+        y_sql = [ident(c) for c in y_cols]
+        buckets = min(CHART_MAX_BUCKETS, self._plot_size()[0])
+        view = self.view
+
+        def job(conn):
+            bounds = view
+            full = None
+            if bounds is None:
+                full = conn.execute(chart_bounds_sql(table_sql, x_sql, kind)).fetchone()
+                if full[0] is None or full[1] is None:
+                    return None
+                bounds = full = (float(full[0]), float(full[1]))
+            sql, params = chart_bucket_sql(table_sql, x_sql, kind, y_sql, bounds[0], bounds[1], buckets)
+            started = time.perf_counter()
+            rows = conn.execute(sql, params).fetchall()
+            return {"full": full, "view": bounds, "rows": rows, "kind": kind,
+                    "series": y_cols, "elapsed": time.perf_counter() - started}
+
+        self._token += 1
+        token = self._token
+        self.task = BackgroundTask()
+        self.status_var.set("Abfrage läuft …")
+        self.app._run_background(job, lambda r: self._on_data(token, r),
+                                 lambda e: self._on_error(token, e), task=self.task)
+
+    def _on_data(self, token: int, result: Optional[Dict[str, Any]]):
+        if token != self._token:
+            return
+        self.task = None
+        if result is None:
+            self.data = None
+            self.status_var.set("Keine auswertbaren X-Werte")
+        else:
+            if result["full"] is not None:
+                self.full_range = result["full"]
+            self.view = result["view"]
+            self.data = result
+            total = sum(row[1] for row in result["rows"])
+            self.status_var.set(f"{total:,} Zeilen → {len(result['rows'])} Buckets "
+                                f"in {result['elapsed']:.2f} s".replace(",", "."))
+        self._draw()
+
+    def _on_error(self, token: int, error: Exception):
+        if token != self._token:
+            return
+        cancelled = self.task is not None and self.task.cancelled
+        self.task = None
+        if not cancelled:
+            self.status_var.set(f"Fehler: {error}")
+
+    def _cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self._token += 1
+
+    def _schedule_requery(self):
+        """Zoom/Pan/Größenänderung: erst nach kurzer Ruhe neu abfragen."""
+        if self._requery_after is not None:
+            self.after_cancel(self._requery_after)
+        self._requery_after = self.after(self.REQUERY_MS, self._requery)
+
+    def _requery(self):
+        self._requery_after = None
+        if self.data is not None:
+            self._query()
+
+    # ---------- Zoom / Verschieben ----------
+    def _data_x(self, px: float) -> Optional[float]:
+        if self.view is None:
+            return None
+        x0, x1 = self.view
+        return x0 + (px - self.MARGIN[0]) / self._plot_size()[0] * (x1 - x0)
+
+    def _clamp(self, x0: float, x1: float) -> Tuple[float, float]:
+        """Hält den sichtbaren Bereich innerhalb der Daten."""
+        if self.full_range is None:
+            return x0, x1
+        lo, hi = self.full_range
+        span = min(x1 - x0, hi - lo)
+        x0 = min(max(x0, lo), hi - span)
+        return x0, x0 + span
+
+    def _zoom(self, px: int, factor: float):
+        center = self._data_x(px)
+        if center is None:
+            return
+        x0, x1 = self.view
+        if (x1 - x0) * factor <= 0:
+            return
+        self.view = self._clamp(center - (center - x0) * factor, center + (x1 - center) * factor)
+        # Sofortige Vorschau durch Skalieren, die Abfrage folgt verzögert
+        self.canvas.scale("data", px, 0, 1 / factor, 1)
+        self._schedule_requery()
+
+    def _on_press(self, event):
+        if self.view is not None:
+            self._drag = (event.x, self.view)
+
+    def _on_drag(self, event):
+        if self._drag is None:
+            return
+        start_px, (x0, x1) = self._drag
+        shift = (start_px - event.x) / self._plot_size()[0] * (x1 - x0)
+        new_view = self._clamp(x0 + shift, x1 + shift)
+        dx = (self.view[0] - new_view[0]) / (x1 - x0) * self._plot_size()[0]
+        self.view = new_view
+        self.canvas.move("data", dx, 0)
+
+    def _on_release(self, event):
+        if self._drag is not None and self._drag[1] != self.view:
+            self._schedule_requery()
+        self._drag = None
+
+    # ---------- Zeichnen ----------
+    def _draw(self):
+        c = self.canvas
+        c.delete("all")
+        width, height = self._plot_size()
+        left, _, top, _ = self.MARGIN
+        if self.data is None or not self.data["rows"]:
+            text = "Keine Zeit- oder Zahlenspalte" if self.table and not self.x_axes else \
+                "Keine Daten im gewählten Bereich" if self.data else "X-Achse und Werte wählen"
+            c.create_text(left + width / 2, top + height / 2, text=text, fill="#888")
+            return
+
+        rows, kind = self.data["rows"], self.data["kind"]
+        x0, x1 = self.data["view"]
+        series = self.data["series"]
+        extremes = [row[4 + 3 * i + k] for row in rows for i in range(len(series)) for k in (0, 1)]
+        extremes = [v for v in extremes if isinstance(v, (int, float))]
+        if not extremes:
+            c.create_text(left + width / 2, top + height / 2, text="Keine numerischen Werte", fill="#888")
+            return
+        y0, y1 = min(extremes), max(extremes)
+        pad = (y1 - y0) * 0.05 or abs(y0) * 0.05 or 1.0
+        y0, y1 = y0 - pad, y1 + pad
+        x_span = (x1 - x0) or 1.0
+
+        def px(x):
+            return left + (x - x0) / x_span * width
+
+        def py(y):
+            return top + (y1 - y) / (y1 - y0) * height
+
+        self._draw_axes(x0, x1, y0, y1, kind, px, py)
+        c.create_rectangle(left, top, left + width, top + height, outline="#999")
+
+        mode = self.line_var.get()
+        for i, name in enumerate(series):
+            lo_i, hi_i, avg_i = 4 + 3 * i, 5 + 3 * i, 6 + 3 * i
+            candidates, means = [], []
+            for row in rows:
+                lo, hi, avg = row[lo_i], row[hi_i], row[avg_i]
+                if not isinstance(lo, (int, float)) or not isinstance(hi, (int, float)):
+                    continue
+                x = (row[2] + row[3]) / 2
+                # Hüllkurve: MIN..MAX je Pixelspalte, damit keine Spitze verloren geht
+                c.create_line(px(x), py(lo), px(x), py(hi) - 1, fill=self.LIGHT[i], tags="data")
+                candidates.append([(x, lo), (x, hi)] if lo != hi else [(x, lo)])
+                if isinstance(avg, (int, float)):
+                    means.append((x, avg))
+            points = lttb_select(candidates) if mode == "LTTB" else means if mode == "Mittelwert" else []
+            if len(points) >= 2:
+                c.create_line(*[coord for x, y in points for coord in (px(x), py(y))],
+                              fill=self.COLORS[i], width=1.5, tags="data")
+            c.create_text(left + 8, top + 8 + 14 * i, text=name, anchor="nw",
+                          fill=self.COLORS[i], font=("Segoe UI", 9, "bold"))
+
+    def _draw_axes(self, x0, x1, y0, y1, kind, px, py):
+        c = self.canvas
+        width, height = self._plot_size()
+        left, _, top, _ = self.MARGIN
+        bottom = top + height
+        for x in nice_ticks(x0, x1, max(2, width // 120), kind):
+            c.create_line(px(x), top, px(x), bottom, fill="#eee")
+            c.create_text(px(x), bottom + 4, text=format_tick(x, kind, x1 - x0), anchor="n", fill="#444")
+        for y in nice_ticks(y0, y1, max(2, height // 60)):
+            c.create_line(left, py(y), left + width, py(y), fill="#eee")
+            c.create_text(left - 4, py(y), text=format_tick(y, "number", y1 - y0), anchor="e", fill="#444")
+
+
+# ==================== JSON-INSPEKTOR ====================
+class JsonInspector(tk.Toplevel):
+    """Zeigt ein JSON-Dokument als Baum; zerlegt wird es von SQLite (json_tree)."""
+
+    def __init__(self, app: "SqlViewer", title: str, document: str,
+                 source: Optional[Tuple[str, str]] = None):
+        super().__init__(app)
+        self.app = app
+        self.source = source  # (Tabelle, Spalte), falls Pfade als Spalte übernommen werden können
+        self.title(f"JSON – {title}")
+        self.geometry("720x520")
+
+        self.tree = ttk.Treeview(self, columns=("type", "value", "path"), show="tree headings")
+        self.tree.heading("#0", text="Schlüssel")
+        self.tree.column("#0", width=200)
+        for cid, text, width in (("type", "Typ", 70), ("value", "Wert", 260), ("path", "Pfad", 180)):
+            self.tree.heading(cid, text=text)
+            self.tree.column(cid, width=width, anchor="w")
+        vsb = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+
+        bar = ttk.Frame(self, padding=6)
+        bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.add_btn = ttk.Button(bar, text="Als Spalte anzeigen", command=lambda: self._add_column(False))
+        self.add_all_btn = ttk.Button(bar, text="Alle Elemente als Spalte", command=lambda: self._add_column(True))
+        ttk.Button(bar, text="Pfad kopieren", command=self._copy_path).pack(side=tk.LEFT, padx=3)
+        if source is not None:
+            self.add_btn.pack(side=tk.LEFT, padx=3)
+            self.add_all_btn.pack(side=tk.LEFT, padx=3)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(bar, textvariable=self.status_var, foreground="#666").pack(side=tk.RIGHT)
+
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._update_buttons())
+        self._load(document)
+        self._update_buttons()
+
+    def _load(self, document: str):
+        self.app._claim_conn()
+        try:
+            rows = self.app.conn.execute(
+                "SELECT id, parent, key, type, atom, fullkey FROM json_tree(?) LIMIT ?",
+                (document, JSON_TREE_LIMIT + 1),
+            ).fetchall()
+        except sqlite3.Error as e:
+            self.status_var.set(f"Kein gültiges JSON: {e}")
+            return
+        for node_id, parent, key, kind, atom, fullkey in rows[:JSON_TREE_LIMIT]:
+            if parent is None:
+                label = "$"
+            elif isinstance(key, int):
+                label = f"[{key}]"
+            else:
+                label = str(key)
+            value = "null" if kind == "null" else "" if atom is None else str(atom)
+            parent_iid = "" if parent is None else str(parent)
+            if parent_iid and not self.tree.exists(parent_iid):
+                continue
+            self.tree.insert(parent_iid, tk.END, iid=str(node_id), text=label,
+                             values=(kind, value, fullkey), open=parent is None)
+        more = " (gekürzt)" if len(rows) > JSON_TREE_LIMIT else ""
+        self.status_var.set(f"{min(len(rows), JSON_TREE_LIMIT)} Knoten{more}")
+
+    def _selected_path(self) -> Optional[str]:
+        selection = self.tree.selection()
+        return self.tree.set(selection[0], "path") if selection else None
+
+    def _update_buttons(self):
+        path = self._selected_path()
+        self.add_btn.state(["!disabled"] if path and path != "$" else ["disabled"])
+        has_index = bool(path and re.search(r"\[\d+\]", path))
+        self.add_all_btn.state(["!disabled"] if has_index else ["disabled"])
+
+    def _add_column(self, all_elements: bool):
+        path = self._selected_path()
+        if not path or self.source is None:
+            return
+        if all_elements:
+            path = re.sub(r"\[\d+\]", "[*]", path, count=1)
+        self.app._add_json_column(self.source[0], self.source[1], path)
+
+    def _copy_path(self):
+        path = self._selected_path()
+        if path:
+            self.clipboard_clear()
+            self.clipboard_append(path)
+
+
+class JsonColumnsDialog(tk.Toplevel):
+    """Flatten-Ansicht: JSON-Pfade einer Textspalte als virtuelle Spalten ins Grid holen."""
+
+    def __init__(self, app: "SqlViewer", table: str):
+        super().__init__(app)
+        self.app = app
+        self.table = table
+        self.columns: List[JsonColumn] = list(app._json_columns.get(table, []))
+        self._token = 0
+        self.title(f"JSON-Spalten – {table}")
+        self.geometry("640x520")
+
+        meta = app._get_table_meta(table)
+        top = ttk.Frame(self, padding=6)
+        top.pack(fill=tk.X)
+        ttk.Label(top, text="Quellspalte:").pack(side=tk.LEFT)
+        self.source_var = tk.StringVar()
+        source_combo = ttk.Combobox(top, textvariable=self.source_var, state="readonly",
+                                    values=meta.columns, width=24)
+        source_combo.pack(side=tk.LEFT, padx=4)
+        text_cols = [c for c in meta.columns if meta.affinity(c) in ("TEXT", "BLOB")]
+        self.source_var.set((text_cols or meta.columns or [""])[0])
+        ttk.Button(top, text="Pfade vorschlagen", command=self._discover).pack(side=tk.LEFT, padx=6)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(top, textvariable=self.status_var, foreground="#666").pack(side=tk.LEFT, padx=6)
+
+        self.paths = ttk.Treeview(self, columns=("path", "type", "count"), show="headings", height=10)
+        for cid, text, width in (("path", "Pfad", 330), ("type", "Typ", 80), ("count", "Vorkommen", 90)):
+            self.paths.heading(cid, text=text)
+            self.paths.column(cid, width=width, anchor="e" if cid == "count" else "w")
+        self.paths.pack(fill=tk.BOTH, expand=True, padx=6)
+        self.paths.bind("<Double-1>", lambda e: self._add_selected())
+
+        manual = ttk.Frame(self, padding=6)
+        manual.pack(fill=tk.X)
+        ttk.Label(manual, text="Pfad:").pack(side=tk.LEFT)
+        self.path_var = tk.StringVar(value="$.")
+        path_entry = ttk.Entry(manual, textvariable=self.path_var, width=36)
+        path_entry.pack(side=tk.LEFT, padx=4)
+        path_entry.bind("<Return>", lambda e: self._add_path(self.path_var.get().strip()))
+        ttk.Button(manual, text="Hinzufügen", command=self._add_selected).pack(side=tk.LEFT, padx=3)
+
+        ttk.Label(self, text="Angezeigte JSON-Spalten (Filter und Sortierung laufen in SQLite):",
+                  padding=(6, 4, 6, 0)).pack(fill=tk.X)
+        self.active = tk.Listbox(self, height=6)
+        self.active.pack(fill=tk.X, padx=6)
+
+        bottom = ttk.Frame(self, padding=6)
+        bottom.pack(fill=tk.X)
+        ttk.Button(bottom, text="Entfernen", command=self._remove).pack(side=tk.LEFT)
+        ttk.Button(bottom, text="Schließen", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(bottom, text="Übernehmen", command=self._apply).pack(side=tk.RIGHT, padx=6)
+        self._refresh_active()
+
+    def _discover(self):
+        column = self.source_var.get()
+        if not column:
+            return
+        ident = self.app._ident
+        table_sql, col_sql = ident(self.table), ident(column)
+        self._token += 1
+        token = self._token
+        self.status_var.set("Suche Pfade …")
+        self.app._run_background(
+            lambda conn: discover_json_paths(conn, table_sql, col_sql),
+            lambda paths: self._show_paths(token, paths),
+            lambda e: self._show_error(token, e),
+        )
+
+    def _show_paths(self, token: int, paths: List[Tuple[str, str, int]]):
+        if token != self._token or not self.winfo_exists():
+            return
+        self.paths.delete(*self.paths.get_children())
+        for path, kind, count in paths:
+            self.paths.insert("", tk.END, values=(path, kind, count))
+        self.status_var.set(f"{len(paths)} Pfade in bis zu {JSON_SAMPLE_ROWS} Zeilen"
+                            if paths else "Keine JSON-Dokumente gefunden")
+
+    def _show_error(self, token: int, error: Exception):
+        if token == self._token and self.winfo_exists():
+            self.status_var.set(f"Fehler: {error}")
+
+    def _add_selected(self):
+        selection = self.paths.selection()
+        if not selection:
+            self._add_path(self.path_var.get().strip())
+        for item in selection:
+            self._add_path(self.paths.set(item, "path"))
+
+    def _add_path(self, path: str):
+        try:
+            json_col = JsonColumn(self.source_var.get(), path)
+        except FilterError as e:
+            messagebox.showerror("JSON", str(e), parent=self)
+            return
+        if json_col not in self.columns:
+            self.columns.append(json_col)
+            self._refresh_active()
+
+    def _remove(self):
+        for index in sorted(self.active.curselection(), reverse=True):
+            del self.columns[index]
+        self._refresh_active()
+
+    def _refresh_active(self):
+        self.active.delete(0, tk.END)
+        for json_col in self.columns:
+            self.active.insert(tk.END, json_col.name)
+
+    def _apply(self):
+        self.app._set_json_columns(self.table, self.columns)
+
+
+# ==================== PIVOT (DIALOG) ====================
+class PivotDialog(tk.Toplevel):
+    """Gruppierung/Pivot der aktuellen Tabelle; gerechnet wird in SQLite, angezeigt nur das Ergebnis."""
+
+    NO_COLUMN = "(keine)"
+
+    def __init__(self, app: "SqlViewer", table: str):
+        super().__init__(app)
+        self.app = app
+        self.table = table
+        self.task: Optional[BackgroundTask] = None
+        self._token = 0
+        self._shown: Optional[Tuple] = None  # (Spezifikation, Ergebnis) der Anzeige
+        self.title(f"Pivot – {table}")
+        self.geometry("900x600")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        meta = app._get_table_meta(table)
+        # JSON-Spalten mit [*] liefern mehrere Werte pro Zeile und taugen nicht als Gruppe
+        self.columns = meta.columns + [j.name for j in app._json_columns.get(table, []) if not j.each]
+
+        config = ttk.Frame(self, padding=6)
+        config.pack(side=tk.LEFT, fill=tk.Y)
+        ttk.Label(config, text="Zeilen (Gruppierung):").pack(anchor="w")
+        self.rows_list = tk.Listbox(config, selectmode=tk.MULTIPLE, exportselection=False, height=8)
+        self.rows_list.pack(fill=tk.X)
+        for c in self.columns:
+            self.rows_list.insert(tk.END, c)
+
+        ttk.Label(config, text="Spalten:").pack(anchor="w", pady=(8, 0))
+        self.column_var = tk.StringVar(value=self.NO_COLUMN)
+        ttk.Combobox(config, textvariable=self.column_var, state="readonly",
+                     values=[self.NO_COLUMN] + self.columns).pack(fill=tk.X)
+
+        ttk.Label(config, text="Werte:").pack(anchor="w", pady=(8, 0))
+        measure_bar = ttk.Frame(config)
+        measure_bar.pack(fill=tk.X)
+        self.func_var = tk.StringVar(value="SUM")
+        ttk.Combobox(measure_bar, textvariable=self.func_var, state="readonly",
+                     values=PIVOT_FUNCS, width=7).pack(side=tk.LEFT)
+        self.value_var = tk.StringVar(value="*")
+        ttk.Combobox(measure_bar, textvariable=self.value_var, state="readonly",
+                     values=["*"] + self.columns, width=14).pack(side=tk.LEFT, padx=3)
+        ttk.Button(measure_bar, text="+", width=3, command=self._add_measure).pack(side=tk.LEFT)
+        self.measures: List[PivotMeasure] = [PivotMeasure("COUNT")]
+        self.measure_list = tk.Listbox(config, height=5)
+        self.measure_list.pack(fill=tk.X, pady=(3, 0))
+        ttk.Button(config, text="Entfernen", command=self._remove_measure).pack(anchor="e", pady=3)
+
+        ttk.Label(config, text="Es gelten Suche und Spaltenfilter\ndes Daten-Tabs.",
+                  foreground="#666").pack(anchor="w", pady=(8, 0))
+        buttons = ttk.Frame(config)
+        buttons.pack(fill=tk.X, pady=(8, 0))
+        self.run_btn = ttk.Button(buttons, text="Berechnen", command=self._compute)
+        self.run_btn.pack(side=tk.LEFT)
+        self.cancel_btn = ttk.Button(buttons, text="Abbrechen", command=self._cancel, state="disabled")
+        self.cancel_btn.pack(side=tk.LEFT, padx=4)
+
+        right = ttk.Frame(self, padding=(0, 6, 6, 6))
+        right.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.status_var = tk.StringVar(value="Doppelklick auf eine Zelle zeigt die Zeilen dahinter")
+        ttk.Label(right, textvariable=self.status_var, anchor="w").pack(fill=tk.X, pady=(0, 4))
+        grid = ttk.Frame(right)
+        grid.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(grid, show="headings")
+        vsb = ttk.Scrollbar(grid, orient=tk.VERTICAL, command=self.tree.yview)
+        hsb = ttk.Scrollbar(grid, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        vsb.grid(row=0, column=1, sticky="ns")
+        hsb.grid(row=1, column=0, sticky="ew")
+        grid.rowconfigure(0, weight=1)
+        grid.columnconfigure(0, weight=1)
+        self.tree.bind("<Double-1>", self._drill_down)
+        self._refresh_measures()
+
+    # ---------- Konfiguration ----------
+    def _add_measure(self):
+        func, column = self.func_var.get(), self.value_var.get()
+        if column == "*":
+            if func != "COUNT":
+                messagebox.showwarning("Pivot", f"{func} braucht eine Spalte.", parent=self)
+                return
+            column = None
+        measure = PivotMeasure(func, column)
+        if measure not in self.measures:
+            self.measures.append(measure)
+            self._refresh_measures()
+
+    def _remove_measure(self):
+        for index in sorted(self.measure_list.curselection(), reverse=True):
+            del self.measures[index]
+        self._refresh_measures()
+
+    def _refresh_measures(self):
+        self.measure_list.delete(0, tk.END)
+        for measure in self.measures:
+            self.measure_list.insert(tk.END, measure.label)
+
+    # ---------- Berechnung ----------
+    def _compute(self):
+        if self.task is not None:
+            return
+        app = self.app
+        if app.conn is None or self.table not in app.tables:
+            self.status_var.set("Die Tabelle ist nicht mehr geöffnet")
+            return
+        rows = [self.columns[i] for i in self.rows_list.curselection()]
+        column = self.column_var.get()
+        column = None if column == self.NO_COLUMN else column
+        if column in rows:
+            self.status_var.set(f"{column} ist schon Zeilenschlüssel")
+            return
+        if not self.measures:
+            self.status_var.set("Mindestens ein Wert (Aggregat) ist nötig")
+            return
+
+        meta = app._get_table_meta(self.table)
+        filters: Dict[str, str] = {}
+        search = ""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if app.table_var.get() == self.table:
+            try:
+                clauses, params, _ = app._build_where(meta)
+            except FilterError as e:
+                self.status_var.set(f"Filterfehler: {e}")
+                return
+            filters = {c: v.get() for c, v in app.column_filters.items() if v.get().strip()}
+            search = app.search_var.get()
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        table_sql = app._ident(self.table)
+        row_exprs = [app._column_expr(meta, c) for c in rows]
+        col_expr = app._column_expr(meta, column) if column else None
+        measures = [(m.func, app._column_expr(meta, m.column) if m.column else None)
+                    for m in self.measures]
+        key = (app.db_path, table_sql, tuple(row_exprs), col_expr, tuple(measures), where, tuple(params))
+        spec = (rows, column, list(self.measures), filters, search)
+
+        self._token += 1
+        token = self._token
+        cached = app._pivot_cached(key)
+        if cached is not None:
+            self._show(spec, cached, "aus dem Cache")
+            return
+
+        self.task = BackgroundTask()
+        self.run_btn.state(["disabled"])
+        self.cancel_btn.state(["!disabled"])
+        app._run_background(
+            lambda conn: run_pivot(conn, table_sql, row_exprs, col_expr, measures, where, params),
+            lambda result: self._done(token, key, spec, result),
+            lambda e: self._failed(token, e),
+            task=self.task,
+        )
+        self._tick()
+
+    def _tick(self):
+        if self.task is None or not self.winfo_exists():
+            return
+        steps = f"{self.task.steps:,}".replace(",", ".")
+        self.status_var.set(f"Berechne … {self.task.elapsed:.1f} s, {steps} VM-Schritte")
+        self.after(200, self._tick)
+
+    def _done(self, token: int, key: Tuple, spec: Tuple, result: Tuple):
+        elapsed = self.task.elapsed if self.task else 0.0
+        self._reset()
+        self.app._pivot_store(key, result)
+        if token == self._token and self.winfo_exists():
+            self._show(spec, result, f"in {elapsed:.2f} s")
+
+    def _failed(self, token: int, error: Exception):
+        cancelled = self.task is not None and self.task.cancelled
+        self._reset()
+        if token == self._token and self.winfo_exists():
+            self.status_var.set("Abgebrochen" if cancelled else f"Fehler: {error}")
+
+    def _reset(self):
+        self.task = None
+        if self.winfo_exists():
+            self.run_btn.state(["!disabled"])
+            self.cancel_btn.state(["disabled"])
+
+    def _cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def _on_close(self):
+        self._cancel()
+        self.destroy()
+
+    # ---------- Anzeige und Drill-down ----------
+    def _show(self, spec: Tuple, result: Tuple, how: str):
+        rows, column, measures, _, _ = spec
+        values, data, truncated = result
+        headings = list(rows)
+        single = len(measures) == 1
+        for value in values:
+            for m in measures:
+                headings.append(_format_cell(value) if single else f"{_format_cell(value)} · {m.label}")
+        for m in measures:
+            headings.append(m.label if column is None else
+                            "Gesamt" if single else f"Gesamt · {m.label}")
+
+        self.tree.delete(*self.tree.get_children())
+        ids = [f"c{i}" for i in range(len(headings))]
+        self.tree.configure(columns=ids)
+        for i, (cid, text) in enumerate(zip(ids, headings)):
+            self.tree.heading(cid, text=text)
+            self.tree.column(cid, width=140 if i < len(rows) else 100,
+                             anchor="w" if i < len(rows) else "e", stretch=False)
+        for row in data:
+            self.tree.insert("", tk.END, values=[_format_cell(v) for v in row])
+        self._shown = (spec, result)
+        text = f"{len(data)} Gruppen {how}"
+        if truncated:
+            text += f" (gekürzt auf {PIVOT_MAX_GROUPS})"
+        self.status_var.set(text)
+
+    def _drill_down(self, event):
+        """Zeilen hinter einer Zelle: Gruppenwerte als Spaltenfilter im Daten-Tab setzen."""
+        item = self.tree.identify_row(event.y)
+        if not item or self._shown is None:
+            return
+        (rows, column, measures, filters, search), (values, data, _) = self._shown
+        row = data[self.tree.index(item)]
+        index = int(self.tree.identify_column(event.x)[1:]) - 1
+        targets = list(zip(rows, row))
+        value_index = (index - len(rows)) // len(measures)
+        if column is not None and 0 <= value_index < len(values):
+            targets.append((column, values[value_index]))
+
+        filters = dict(filters)
+        for name, value in targets:
+            text = filter_literal(value)
+            if text is None:
+                self.status_var.set(f"{name}: BLOB-Werte lassen sich nicht filtern")
+                return
+            filters[name] = text
+        self.app._drill_down(self.table, filters, search)
+
+
+# ==================== ABFRAGEVERLAUF (DIALOG) ====================
+class HistoryDialog(tk.Toplevel):
+    """Durchsuchbarer Abfrageverlauf und Statistik der langsamsten Abfragen."""
+
+    def __init__(self, app: "SqlViewer"):
+        super().__init__(app)
+        self.app = app
+        self.history = app.history
+        self._search_after: Optional[str] = None
+        self._sql: Dict[str, str] = {}  # Treeview-Item -> SQL
+        self.title("Abfrageverlauf")
+        self.geometry("980x560")
+
+        top = ttk.Frame(self, padding=6)
+        top.pack(fill=tk.X)
+        ttk.Label(top, text="Suche:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(top, textvariable=self.search_var, width=36)
+        search_entry.pack(side=tk.LEFT, padx=4)
+        search_entry.bind("<KeyRelease>", lambda e: self._schedule_refresh())
+        self.only_db_var = tk.BooleanVar(value=bool(app.source_path))
+        ttk.Checkbutton(top, text="Nur aktuelle Datenbank", variable=self.only_db_var,
+                        command=self.refresh).pack(side=tk.LEFT, padx=10)
+        ttk.Button(top, text="Verlauf löschen", command=self._clear).pack(side=tk.RIGHT)
+
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=6)
+        self.recent = self._make_tree((
+            ("time", "Zeitpunkt", 140, "w"), ("db", "Datenbank", 130, "w"), ("rows", "Zeilen", 70, "e"),
+            ("elapsed", "Dauer", 80, "e"), ("plan", "Plan", 90, "w"), ("sql", "SQL", 440, "w"),
+        ))
+        self.notebook.add(self.recent.master, text="Verlauf")
+        self.slow = self._make_tree((
+            ("runs", "Läufe", 60, "e"), ("p50", "p50", 80, "e"), ("p95", "p95", 80, "e"),
+            ("max", "Max", 80, "e"), ("last", "Zuletzt", 80, "e"), ("plans", "Pläne", 60, "e"),
+            ("sql", "SQL", 480, "w"),
+        ))
+        self.notebook.add(self.slow.master, text="Langsamste Abfragen")
+
+        bottom = ttk.Frame(self, padding=6)
+        bottom.pack(fill=tk.X)
+        ttk.Button(bottom, text="▶ Erneut ausführen", command=lambda: self._use(True)).pack(side=tk.LEFT)
+        ttk.Button(bottom, text="In Editor übernehmen", command=lambda: self._use(False)).pack(side=tk.LEFT, padx=6)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(bottom, textvariable=self.status_var, foreground="#666").pack(side=tk.RIGHT)
+        self.refresh()
+
+    def _make_tree(self, columns) -> ttk.Treeview:
+        frame = ttk.Frame(self.notebook)
+        tree = ttk.Treeview(frame, columns=[c[0] for c in columns], show="headings", selectmode="browse")
+        for cid, text, width, anchor in columns:
+            tree.heading(cid, text=text)
+            tree.column(cid, width=width, anchor=anchor, stretch=(cid == "sql"))
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        # Ein Doppelklick führt die Abfrage erneut aus
+        tree.bind("<Double-1>", lambda e: self._use(True))
+        return tree
+
+    def _schedule_refresh(self):
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(250, self.refresh)
+
+    def refresh(self):
+        self._search_after = None
+        db_path = self.app.source_path if self.only_db_var.get() else None
+        term = self.search_var.get().strip()
+        try:
+            recent = self.history.search(term, db_path)
+            slow = self.history.slowest(term, db_path)
+        except sqlite3.Error as e:
+            self.status_var.set(f"Fehler: {e}")
+            return
+
+        self._sql.clear()
+        self.recent.delete(*self.recent.get_children())
+        for _, when, db, rows, elapsed, plan, error, sql in recent:
+            item = self.recent.insert("", tk.END, values=(
+                when.replace("T", " "), os.path.basename(db or ""), "" if rows is None else rows,
+                f"{elapsed:.3f} s", plan or ("Fehler" if error else ""), " ".join(sql.split())))
+            self._sql[item] = sql
+        self.slow.delete(*self.slow.get_children())
+        for runs, p50, p95, worst, last, plans, sql in slow:
+            item = self.slow.insert("", tk.END, values=(
+                runs, f"{p50:.3f} s", f"{p95:.3f} s", f"{worst:.3f} s", f"{last:.3f} s", plans,
+                " ".join(sql.split())))
+            self._sql[item] = sql
+        self.status_var.set(f"{len(recent)} Einträge, {len(slow)} verschiedene Abfragen – {self.history.path}")
+
+    def _use(self, execute: bool):
+        tree = self.recent if self.notebook.index("current") == 0 else self.slow
+        selection = tree.selection()
+        if not selection:
+            return
+        self.app._run_from_history(self._sql[selection[0]], execute)
+        if execute:
+            self.refresh()
+
+    def _clear(self):
+        if messagebox.askyesno("Abfrageverlauf", "Gesamten Verlauf löschen?", parent=self):
+            self.history.clear()
+            self.refresh()
+
+
+# ==================== ENTPACKEN ====================
+class DecompressDialog(tk.Toplevel):
+    """Fortschritt beim Entpacken eines Datenbank-Archivs in den Cache."""
+
+    def __init__(self, app: "SqlViewer", path: str, kind: str):
+        super().__init__(app)
+        self.app = app
+        self.path = path
+        self.task = BackgroundTask()
+        self.title("Archiv entpacken")
+        self.resizable(False, False)
+        self.transient(app)
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+
+        frame = ttk.Frame(self, padding=12)
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text=f"{os.path.basename(path)} ({kind})").pack(anchor="w")
+        self.progress = ttk.Progressbar(frame, mode="determinate", maximum=100, length=360)
+        self.progress.pack(fill=tk.X, pady=8)
+        self.status_var = tk.StringVar(value="Prüfe Cache …")
+        ttk.Label(frame, textvariable=self.status_var).pack(anchor="w")
+        ttk.Button(frame, text="Abbrechen", command=self._cancel).pack(anchor="e", pady=(8, 0))
+
+        cache, task = app._decompress_cache, self.task
+        app._run_thread(lambda: cache.extract(path, kind, task), self._done, self._failed)
+        self._tick()
+
+    def _tick(self):
+        if self.task is None or not self.winfo_exists():
+            return
+        self.progress.configure(value=100.0 * self.task.fraction)
+        phase = "Prüfsumme" if self.task.fraction < 0.1 else "Entpacken"
+        self.status_var.set(f"{phase} … {self.task.fraction:.0%}, {self.task.elapsed:.1f} s")
+        self.after(100, self._tick)
+
+    def _done(self, target: str):
+        self.task = None
+        if self.winfo_exists():
+            self.destroy()
+        self.app._connect(target, source=self.path)
+
+    def _failed(self, error: Exception):
+        cancelled = self.task is not None and self.task.cancelled
+        self.task = None
+        if self.winfo_exists():
+            self.destroy()
+        if cancelled:
+            self.app._set_status("Entpacken abgebrochen")
+        else:
+            messagebox.showerror("Fehler beim Öffnen", str(error))
+
+    def _cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+
+# ==================== SQL-VERVOLLSTÄNDIGUNG ====================
+class SqlCompleter:
+    """
+    Vervollständigungs-Popup für den SQL-Editor.
+
+    Der Katalog wird einmal im Hintergrund gebaut und nur neu erstellt, wenn
+    sich PRAGMA schema_version ändert; bis dahin bleibt der alte aktiv.
+    """
+
+    IGNORED_KEYS = {"Up", "Down", "Return", "Tab", "Escape", "Shift_L", "Shift_R",
+                    "Control_L", "Control_R", "Alt_L", "Alt_R", "Left", "Right", "Home", "End"}
+
+    def __init__(self, app: "SqlViewer", text: tk.Text):
+        self.app = app
+        self.text = text
+        self.catalog: Optional[SchemaCatalog] = None
+        self._catalog_key: Optional[Tuple[str, Optional[int]]] = None
+        self._building: Optional[Tuple[str, Optional[int]]] = None
+        self._items: List[Tuple[str, str]] = []
+        self._prefix = ""
+
+        self.popup = tk.Toplevel(text)
+        self.popup.withdraw()
+        self.popup.overrideredirect(True)
+        self.listbox = tk.Listbox(self.popup, height=8, width=44, font=("Consolas", 10),
+                                  exportselection=False, takefocus=0)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        self.listbox.bind("<Double-Button-1>", lambda e: self.accept())
+
+        text.bind("<KeyPress>", self._on_key_press, add="+")
+        text.bind("<KeyRelease>", self._on_key_release, add="+")
+        text.bind("<Control-space>", lambda e: self.show(force=True) or "break")
+        text.bind("<FocusOut>", lambda e: self.text.after(150, self._hide_if_unfocused), add="+")
+        text.bind("<Button-1>", lambda e: self.hide(), add="+")
+
+    # ---------- Katalog ----------
+    def refresh(self, version: Optional[int] = None):
+        """
+        Baut den Katalog neu, falls Datenbank oder schema_version gewechselt haben.
+
+        version: aktuelle schema_version, falls der Aufrufer sie kennt (nach
+        dem Laden der Tabellenliste). Ohne sie gilt der Stand des letzten
+        Aufbaus: show() läuft bei jedem Tastendruck und fragt die von der
+        Oberfläche geteilte Verbindung nicht ab.
+        """
+        conn, path = self.app.conn, self.app.db_path
+        if conn is None or path is None:
+            self.catalog = self._catalog_key = None
+            self.hide()
+            return
+        known = [k for k in (self._catalog_key, self._building) if k is not None and k[0] == path]
+        if known and (version is None or any(k[1] == version for k in known)):
+            return
+        key = (path, version)
+        self._building = key
+        keywords = sorted(SqlViewer._SQLITE_KEYWORDS)
+        self.app._run_background(lambda c: SchemaCatalog.build(c, keywords),
+                                 lambda catalog: self._on_built(key, catalog),
+                                 lambda e: self._on_built(key, None))
+
+    def _on_built(self, key: Tuple[str, Optional[int]], catalog: Optional[SchemaCatalog]):
+        if self._building == key:
+            self._building = None
+        if key[0] != self.app.db_path:
+            return
+        # Auch einen Fehlschlag merken: dieselbe schema_version nicht bei
+        # jedem Tastendruck erneut versuchen
+        if catalog is not None or (self._catalog_key and self._catalog_key[0] != key[0]):
+            self.catalog = catalog
+        self._catalog_key = (key[0], catalog.schema_version) if catalog is not None else key
+
+    # ---------- Popup ----------
+    def _visible(self) -> bool:
+        return bool(self.popup.winfo_ismapped())
+
+    def _current_statement(self) -> str:
+        """Statement um den Cursor (zwischen zwei Semikolons)."""
+        before = self.text.get("1.0", "insert")
+        after = self.text.get("insert", "end-1c")
+        return before[before.rfind(";") + 1:] + after.split(";", 1)[0]
+
+    def show(self, force: bool = False):
+        self.refresh()
+        if self.catalog is None:
+            self.hide()
+            return
+        before = self.text.get("insert linestart", "insert")
+        prefix, items = self.catalog.complete(before, self._current_statement())
+        if not force and (not items or (len(items) == 1 and items[0][0] == prefix)):
+            self.hide()
+            return
+        self._prefix, self._items = prefix, items
+        self.listbox.delete(0, tk.END)
+        for name, kind in items:
+            self.listbox.insert(tk.END, f"{name}  · {kind}")
+        if not items:
+            self.hide()
+            return
+        self.listbox.selection_set(0)
+        self.listbox.activate(0)
+        self.listbox.configure(height=min(8, len(items)))
+
+        bbox = self.text.bbox("insert")
+        if bbox is None:
+            return
+        x = self.text.winfo_rootx() + bbox[0]
+        y = self.text.winfo_rooty() + bbox[1] + bbox[3]
+        self.popup.geometry(f"+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def hide(self):
+        if self._visible():
+            self.popup.withdraw()
+
+    def _hide_if_unfocused(self):
+        if self.text.focus_get() is not self.text:
+            self.hide()
+
+    def _move(self, step: int):
+        current = self.listbox.curselection()
+        index = max(0, min(len(self._items) - 1, (current[0] if current else -1) + step))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.activate(index)
+        self.listbox.see(index)
+
+    def accept(self):
+        current = self.listbox.curselection()
+        if not current:
+            return
+        name, kind = self._items[current[0]]
+        if kind == "Funktion":
+            insert = f"{name}("
+        elif kind == "Schlüsselwort":
+            insert = name.upper()
+        else:
+            insert = self.app._ident(name)
+        if self._prefix:
+            self.text.delete(f"insert-{len(self._prefix)}c", "insert")
+        self.text.insert("insert", insert)
+        self.hide()
+        self.app._highlight_sql()
+
+    # ---------- Tastatur ----------
+    def _on_key_press(self, event):
+        if not self._visible():
+            return None
+        if event.keysym == "Down":
+            self._move(1)
+        elif event.keysym == "Up":
+            self._move(-1)
+        elif event.keysym in ("Return", "Tab"):
+            self.accept()
+        elif event.keysym == "Escape":
+            self.hide()
+        else:
+            return None
+        return "break"
+
+    def _on_key_release(self, event):
+        if event.keysym in self.IGNORED_KEYS:
+            return
+        if event.keysym == "BackSpace" or event.char == "." or \
+                (event.char and (event.char.isalnum() or event.char in "_$")):
+            self.show()
+        else:
+            self.hide()
+
+
+# ==================== DB-VERGLEICH ====================
+DIFF_LEAF_ROWS = 512    # Zeilen je Chunk (im Mittel), für den ein Hash gebildet wird
+DIFF_ATTACH = "diff_b"  # Schema-Name, unter dem B an die Verbindung von A gehängt wird
+
+
+class _ChunkHashes:
+    """
+    SQLite-Aggregat diff_chunks(chunk, typen, spalte1, …).
+
+    Ein einziger Tabellendurchlauf liefert Zeilenzahl und ordnungsunabhängige
+    Hash-Summe aller Chunks als JSON [[chunk, anzahl, hash], …].
+    """
+
+    def __init__(self):
+        self.chunks: Dict[int, List[int]] = {}
+
+    def step(self, chunk, *row):
+        # hash() ist innerhalb des Prozesses stabil; die Typen trennen 1, 1.0 und '1'
+        entry = self.chunks.get(chunk)
+        if entry is None:
+            self.chunks[chunk] = [1, hash(row)]
+        else:
+            entry[0] += 1
+            entry[1] += hash(row)
+
+    def finalize(self):
+        return json.dumps([[chunk, n, h & 0x7FFFFFFFFFFFFFFF] for chunk, (n, h) in self.chunks.items()])
+
+
+def _open_for_diff(path: str, task: BackgroundTask, attach: Optional[str] = None) -> sqlite3.Connection:
+    conn = connect_readonly(path)
+    conn.create_aggregate("diff_chunks", -1, _ChunkHashes)
+    if attach:
+        conn.execute(f"ATTACH DATABASE ? AS {DIFF_ATTACH}", (f"file:{attach}?mode=ro",))
+    conn.set_progress_handler(task.progress_handler, PROGRESS_STEPS)
+    return conn
+
+
+def compare_schemas(conn_a: sqlite3.Connection, conn_b: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+    """Vergleicht sqlite_master: Liste von (Typ, Name, Befund)."""
+    query = "SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+    schema_a = {(r[0], r[1]): r[2] for r in conn_a.execute(query)}
+    schema_b = {(r[0], r[1]): r[2] for r in conn_b.execute(query)}
+    findings = []
+    for key in sorted(set(schema_a) | set(schema_b)):
+        if key not in schema_b:
+            findings.append((key[0], key[1], "nur in A"))
+        elif key not in schema_a:
+            findings.append((key[0], key[1], "nur in B"))
+        elif " ".join((schema_a[key] or "").split()) != " ".join((schema_b[key] or "").split()):
+            findings.append((key[0], key[1], "Definition geändert"))
+    return findings
+
+
+class TableDiffer:
+    """
+    Vergleicht eine Tabelle in zwei Datenbanken über Hashes von rowid-Chunks.
+
+    Je Seite liefert ein einziger Tabellendurchlauf Zeilenzahl und Hash aller
+    Chunks. Nur abweichende Chunks werden danach zeilenweise verglichen, und
+    zwar in SQL über den Schlüssel (Primärschlüssel, sonst rowid), damit
+    dessen Kollation gilt; B ist dafür als DIFF_ATTACH an die Verbindung von
+    A angehängt. Tabellen ohne rowid bilden einen einzigen Chunk.
+    Gefundene Zeilen gehen als (Art, Schlüssel, Zeile A, Zeile B) an emit.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, conn_b: sqlite3.Connection, table: str,
+                 ident: Callable[[str], str], emit: Callable[[str, Tuple, Optional[Tuple], Optional[Tuple]], None],
+                 task: BackgroundTask):
+        self.conn = conn
+        self.emit = emit
+        self.task = task
+        meta_a = load_table_meta(conn, table, ident)
+        meta_b = load_table_meta(conn_b, table, ident)
+        self.columns = [c for c in meta_a.columns if c in meta_b.columns]
+        if not self.columns:
+            raise ValueError("Keine gemeinsamen Spalten")
+        self.cols = [ident(c) for c in self.columns]
+        self.table_a = f"main.{ident(table)}"
+        self.table_b = f"{DIFF_ATTACH}.{ident(table)}"
+
+        # Chunks über die rowid; Vergleichsschlüssel ist der Primärschlüssel, sonst die rowid
+        rowid_a, rowid_b = meta_a.rowid_name(), meta_b.rowid_name()
+        self.rowid = rowid_a if rowid_a and rowid_a == rowid_b else None
+        if meta_a.pk and meta_a.pk == meta_b.pk and all(c in self.columns for c in meta_a.pk):
+            self.keys = [ident(c) for c in meta_a.pk]
+            alias = meta_a.rowid_alias()
+            self.key_is_rowid = bool(self.rowid and alias and alias == meta_b.rowid_alias())
+        elif self.rowid:
+            self.keys, self.key_is_rowid = [self.rowid], True
+        else:
+            raise ValueError("Kein gemeinsamer Schlüssel (rowid oder Primärschlüssel)")
+        self.changed = 0
+        self.rows_hashed = 0
+        self._reported: set = set()  # Schlüssel bereits gemeldeter geänderter Zeilen
+
+    def run(self) -> int:
+        low, width = self._chunking()
+        chunks_a = self._chunk_hashes(self.table_a, low, width)
+        chunks_b = self._chunk_hashes(self.table_b, low, width)
+        differing = sorted(c for c in chunks_a.keys() | chunks_b.keys() if chunks_a.get(c) != chunks_b.get(c))
+        if self.rowid is None:
+            if differing:
+                self._compare(None)
+            return self.changed
+
+        # Benachbarte abweichende Chunks zu einem rowid-Bereich zusammenfassen
+        runs: List[List[int]] = []
+        for chunk in differing:
+            if runs and chunk == runs[-1][1] + 1:
+                runs[-1][1] = chunk
+            else:
+                runs.append([chunk, chunk])
+        for first, last in runs:
+            if self.task.cancelled:
+                break
+            self._compare((low + first * width, low + (last + 1) * width - 1))
+        return self.changed
+
+    def _chunking(self) -> Tuple[int, int]:
+        """(kleinste rowid, Chunk-Breite), sodass ein Chunk im Mittel DIFF_LEAF_ROWS Zeilen hat."""
+        if self.rowid is None:
+            return 0, 1
+        lows, highs, counts = [], [], []
+        for table in (self.table_a, self.table_b):
+            low, high, count = self.conn.execute(
+                f"SELECT MIN({self.rowid}), MAX({self.rowid}), COUNT(*) FROM {table}").fetchone()
+            if low is not None:
+                lows.append(low)
+                highs.append(high)
+                counts.append(count)
+        if not lows:
+            return 0, 1
+        low, span = min(lows), max(highs) - min(lows) + 1
+        return low, max(1, -(-span * DIFF_LEAF_ROWS // max(counts)))
+
+    def _chunk_hashes(self, table: str, low: int, width: int) -> Dict[int, Tuple[int, int]]:
+        chunk = f"({self.rowid} - ?) / ?" if self.rowid else "0 + 0 * ? * ?"
+        types = " || ".join(f"typeof({c})" for c in self.cols)
+        row = self.conn.execute(
+            f"SELECT diff_chunks({chunk}, {types}, {', '.join(self.cols)}) FROM {table}", (low, width)
+        ).fetchone()
+        chunks = {chunk: (n, h) for chunk, n, h in json.loads(row[0] or "[]")}
+        self.rows_hashed += sum(n for n, _ in chunks.values())
+        return chunks
+
+    def _compare(self, rowid_range: Optional[Tuple[int, int]]):
+        """Vergleicht die Zeilen eines rowid-Bereichs (None = ganze Tabelle) per Schlüssel in SQL."""
+        nk, ncols = len(self.keys), len(self.cols)
+        params = rowid_range or ()
+        tables = {"a": (self.table_a, self.table_b), "b": (self.table_b, self.table_a)}
+
+        def keys(alias: str) -> str:
+            return ", ".join(f"{alias}.{k}" for k in self.keys)
+
+        def cols(alias: str) -> str:
+            return ", ".join(f"{alias}.{c}" for c in self.cols)
+
+        def match(side: str, other: str) -> str:
+            # Vergleich mit der Spalte der nachgeschlagenen Seite: deren Kollation und Index gelten
+            return " AND ".join(f"{other}.{k} = {side}.{k}" for k in self.keys)
+
+        def in_range(alias: str) -> str:
+            return f"{alias}.{self.rowid} BETWEEN ? AND ? AND " if rowid_range else ""
+
+        # Nur in A bzw. nur in B
+        for side, other, kind in (("a", "b", "-"), ("b", "a", "+")):
+            table, lookup = tables[side]
+            sql = (f"SELECT {keys(side)}, {cols(side)} FROM {table} {side} WHERE {in_range(side)}"
+                   f"NOT EXISTS (SELECT 1 FROM {lookup} {other} WHERE {match(side, other)}) "
+                   f"ORDER BY {keys(side)}")
+            for row in self.conn.execute(sql, params):
+                values = tuple(row[nk:])
+                self._report(kind, tuple(row[:nk]), values if kind == "-" else None,
+                             values if kind == "+" else None)
+            if self.task.cancelled:
+                return
+
+        # Geänderte Zeilen: von A aus, bei eigenem Schlüssel auch von B aus (die Partnerzeile
+        # kann dort in einem anderen rowid-Bereich liegen); doppelte Meldungen filtert _reported
+        # BINARY: Werte, die nur unter der Spalten-Kollation gleich sind (NOCASE), gelten als geändert
+        differs = " OR ".join(f"a.{c} IS NOT b.{c} COLLATE BINARY OR typeof(a.{c}) <> typeof(b.{c})"
+                              for c in self.cols)
+        sides = ("a",) if self.key_is_rowid or rowid_range is None else ("a", "b")
+        for side in sides:
+            other = "b" if side == "a" else "a"
+            table, lookup = tables[side]
+            sql = (f"SELECT {keys('a')}, {cols('a')}, {cols('b')} FROM {table} {side} "
+                   f"JOIN {lookup} {other} ON {match(side, other)} "
+                   f"WHERE {in_range(side)}({differs}) ORDER BY {keys(side)}")
+            for row in self.conn.execute(sql, params):
+                key = tuple(row[:nk])
+                if key in self._reported:
+                    continue
+                self._reported.add(key)
+                self._report("≠", key, tuple(row[nk:nk + ncols]), tuple(row[nk + ncols:]))
+
+    def _report(self, kind: str, key: Tuple, row_a: Optional[Tuple], row_b: Optional[Tuple]):
+        self.changed += 1
+        self.emit(kind, key, row_a, row_b)
+
+
+
+def _format_cell(value: Any) -> str:
+    return "NULL" if value is None else str(value)
+
+
+class DiffDialog(tk.Toplevel):
+    """Vergleich zweier Datenbanken: Schema-Befunde und geänderte Zeilen je Tabelle."""
+
+    DISPLAY_LIMIT = 5000   # maximal angezeigte Zeilen, gezählt wird weiter
+    BATCH_ROWS = 200       # Zeilen pro Übergabe an den UI-Thread
+
+    def __init__(self, app: "SqlViewer"):
+        super().__init__(app)
+        self.app = app
+        self.task: Optional[BackgroundTask] = None
+        self._events: "queue.Queue[Tuple]" = queue.Queue()
+        self._shown = 0
+        self._table_items: Dict[str, str] = {}
+
+        self.title("Datenbanken vergleichen")
+        self.geometry("900x620")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        files = ttk.Frame(self, padding=6)
+        files.pack(fill=tk.X)
+        self.path_a = tk.StringVar(value=app.db_path or "")
+        self.path_b = tk.StringVar()
+        for row, (label, var) in enumerate((("A:", self.path_a), ("B:", self.path_b))):
+            ttk.Label(files, text=label).grid(row=row, column=0, sticky="w")
+            ttk.Entry(files, textvariable=var).grid(row=row, column=1, sticky="ew", padx=4, pady=1)
+            ttk.Button(files, text="…", width=3,
+                       command=lambda v=var: self._choose_file(v)).grid(row=row, column=2)
+        files.columnconfigure(1, weight=1)
+
+        bar = ttk.Frame(self, padding=(6, 0))
+        bar.pack(fill=tk.X)
+        self.start_btn = ttk.Button(bar, text="Vergleichen", command=self._start)
+        self.start_btn.pack(side=tk.LEFT, padx=3)
+        self.cancel_btn = ttk.Button(bar, text="Abbrechen", command=self._cancel, state="disabled")
+        self.cancel_btn.pack(side=tk.LEFT, padx=3)
+        self.status_var = tk.StringVar(value="Bereit")
+        ttk.Label(bar, textvariable=self.status_var, anchor="w").pack(side=tk.LEFT, fill=tk.X, padx=6)
+
+        paned = ttk.PanedWindow(self, orient=tk.VERTICAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+
+        self.table_tree = ttk.Treeview(paned, show="headings", height=8,
+                                       columns=("name", "status", "changed", "hashed"))
+        for cid, text, width in (("name", "Tabelle / Objekt", 260), ("status", "Status", 260),
+                                 ("changed", "Unterschiede", 100), ("hashed", "Zeilen gehasht", 120)):
+            self.table_tree.heading(cid, text=text)
+            self.table_tree.column(cid, width=width, anchor="w" if cid in ("name", "status") else "e")
+        paned.add(self.table_tree, weight=1)
+
+        rows_frame = ttk.Frame(paned)
+        self.row_tree = ttk.Treeview(rows_frame, show="headings",
+                                     columns=("table", "kind", "key", "detail"))
+        for cid, text, width in (("table", "Tabelle", 140), ("kind", "Änderung", 70),
+                                 ("key", "Schlüssel", 120), ("detail", "Werte (A → B)", 520)):
+            self.row_tree.heading(cid, text=text)
+            self.row_tree.column(cid, width=width, anchor="w", stretch=(cid == "detail"))
+        vsb = ttk.Scrollbar(rows_frame, orient="vertical", command=self.row_tree.yview)
+        self.row_tree.configure(yscrollcommand=vsb.set)
+        self.row_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        paned.add(rows_frame, weight=3)
+
+    def _choose_file(self, var: tk.StringVar):
+        path = filedialog.askopenfilename(
+            parent=self,
+            title="Datenbank wählen",
+            filetypes=[("SQLite DB", "*.db *.sqlite *.sqlite3"), ("Alle Dateien", "*.*")],
+        )
+        if path:
+            var.set(path)
+
+    # ---------- Ablauf ----------
+    def _start(self):
+        if self.task is not None:
+            return
+        path_a, path_b = self.path_a.get().strip(), self.path_b.get().strip()
+        for path in (path_a, path_b):
+            if not os.path.isfile(path):
+                messagebox.showerror("Vergleich", f"Datei nicht gefunden:\n{path}", parent=self)
+                return
+        self.table_tree.delete(*self.table_tree.get_children())
+        self.row_tree.delete(*self.row_tree.get_children())
+        self._table_items.clear()
+        self._shown = 0
+        self.task = BackgroundTask()
+        self.start_btn.state(["disabled"])
+        self.cancel_btn.state(["!disabled"])
+        task, events, ident = self.task, self._events, self.app._ident
+        self.app._run_thread(lambda: self._compare(path_a, path_b, task, events, ident),
+                             self._finished, self._failed)
+        self._drain()
+
+    @classmethod
+    def _compare(cls, path_a: str, path_b: str, task: BackgroundTask,
+                 events: "queue.Queue[Tuple]", ident: Callable[[str], str]) -> int:
+        """Worker-Thread: vergleicht Schema und alle gemeinsamen Tabellen."""
+        conn_a = _open_for_diff(path_a, task, attach=path_b)
+        conn_b = _open_for_diff(path_b, task)
+        try:
+            findings = compare_schemas(conn_a, conn_b)
+            events.put(("schema", findings))
+            query = "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            tables = [r[0] for r in conn_a.execute(query)]
+            common = set(r[0] for r in conn_b.execute(query))
+            total = 0
+            for table in tables:
+                if table not in common:
+                    continue
+                if task.cancelled:
+                    break
+                events.put(("table", table, "wird verglichen …", "", ""))
+                batch: List[Tuple] = []
+
+                def emit(kind, key, row_a, row_b, table=table, batch=batch):
+                    batch.append((kind, key, row_a, row_b))
+                    if len(batch) >= cls.BATCH_ROWS:
+                        events.put(("rows", table, differ.columns, batch[:]))
+                        batch.clear()
+
+                try:
+                    differ = TableDiffer(conn_a, conn_b, table, ident, emit, task)
+                    changed = differ.run()
+                except (ValueError, sqlite3.Error) as e:
+                    if task.cancelled:
+                        break
+                    events.put(("table", table, f"übersprungen: {e}", "", ""))
+                    continue
+                if batch:
+                    events.put(("rows", table, differ.columns, batch[:]))
+                total += changed
+                status = "abgebrochen" if task.cancelled else ("identisch" if not changed else "unterschiedlich")
+                events.put(("table", table, status, changed, differ.rows_hashed))
+            return total
+        finally:
+            conn_a.close()
+            conn_b.close()
+
+    def _drain(self):
+        """Übernimmt Zwischenergebnisse des Workers in die Anzeige."""
+        if not self.winfo_exists():
+            return
+        try:
+            while True:
+                self._apply_event(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        if self.task is not None:
+            self.status_var.set(f"Vergleich läuft … {self.task.elapsed:.1f} s, "
+                                f"{self._shown} Zeilen angezeigt")
+            self.after(100, self._drain)
+
+    def _apply_event(self, event: Tuple):
+        if event[0] == "schema":
+            for kind, name, finding in event[1]:
+                self.table_tree.insert("", tk.END, values=(f"{kind} {name}", finding, "", ""))
+        elif event[0] == "table":
+            _, table, status, changed, hashed = event
+            values = (table, status, changed, hashed)
+            item = self._table_items.get(table)
+            if item:
+                self.table_tree.item(item, values=values)
+            else:
+                self._table_items[table] = self.table_tree.insert("", tk.END, values=values)
+        elif event[0] == "rows":
+            _, table, columns, batch = event
+            for kind, key, row_a, row_b in batch:
+                if self._shown >= self.DISPLAY_LIMIT:
+                    return
+                if kind == "≠":
+                    detail = "; ".join(f"{c}: {_format_cell(a)} → {_format_cell(b)}"
+                                       for c, a, b in zip(columns, row_a, row_b) if a != b or repr(a) != repr(b))
+                else:
+                    detail = ", ".join(_format_cell(v) for v in (row_a if kind == "-" else row_b))
+                key_text = ", ".join(_format_cell(k) for k in key)
+                self.row_tree.insert("", tk.END, values=(table, kind, key_text, detail))
+                self._shown += 1
+
+    def _finished(self, total: int):
+        cancelled = self.task is not None and self.task.cancelled
+        elapsed = self.task.elapsed if self.task else 0.0
+        self._reset()
+        if not self.winfo_exists():
+            return
+        self._drain()
+        limit = f" (angezeigt: {self._shown})" if total > self._shown else ""
+        state = "abgebrochen" if cancelled else "fertig"
+        self.status_var.set(f"Vergleich {state} in {elapsed:.1f} s: {total} Unterschiede{limit}")
+
+    def _failed(self, error: Exception):
+        cancelled = self.task is not None and self.task.cancelled
+        self._reset()
+        if not self.winfo_exists():
+            return
+        self._drain()
+        self.status_var.set("Vergleich abgebrochen" if cancelled else f"Vergleich fehlgeschlagen: {error}")
+
+    def _reset(self):
+        self.task = None
+        if not self.winfo_exists():
+            return
+        self.start_btn.state(["!disabled"])
+        self.cancel_btn.state(["disabled"])
+
+    def _cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def _on_close(self):
+        self._cancel()
+        self.destroy()
+
+# ==================== WARTUNG ====================
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def space_report(conn: sqlite3.Connection) -> Tuple[Dict[str, int], List[Tuple]]:
+    """
+    Seitenbelegung der Datenbank.
+
+    Returns:
+        (Kennzahlen aus page_size/page_count/freelist_count,
+         Zeilen (Name, Typ, Seiten, Bytes, ungenutzte Bytes) je Tabelle/Index
+         aus der dbstat-Tabelle; leer, falls SQLite ohne DBSTAT gebaut ist)
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    summary = {"page_size": page_size, "page_count": page_count, "freelist_count": freelist}
+
+    try:
+        rows = conn.execute(
+            "SELECT s.name, COALESCE(m.type, 'intern'), COUNT(*), SUM(s.pgsize), SUM(s.unused) "
+            "FROM dbstat AS s LEFT JOIN sqlite_master AS m ON m.name = s.name "
+            "GROUP BY s.name ORDER BY SUM(s.pgsize) DESC"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    return summary, [tuple(r) for r in rows]
+
+
+class MaintenanceDialog(tk.Toplevel):
+    """Wartungskonsole: Prüfungen, ANALYZE, VACUUM INTO und Speicherbelegung im Hintergrund."""
+
+    def __init__(self, app: "SqlViewer"):
+        super().__init__(app)
+        self.app = app
+        self.db_path = app.db_path
+        self.task: Optional[BackgroundTask] = None
+        self._vacuum_target: Optional[str] = None
+        self._vacuum_expected = 0
+
+        self.title(f"Datenbank-Wartung – {os.path.basename(self.db_path)}")
+        self.geometry("760x560")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        bar = ttk.Frame(self, padding=6)
+        bar.pack(fill=tk.X)
+        self.buttons = [
+            ttk.Button(bar, text="Integrity Check", command=lambda: self._run_check("integrity_check")),
+            ttk.Button(bar, text="Quick Check", command=lambda: self._run_check("quick_check")),
+            ttk.Button(bar, text="ANALYZE", command=self._run_analyze),
+            ttk.Button(bar, text="VACUUM INTO…", command=self._run_vacuum_into),
+            ttk.Button(bar, text="Speicherbelegung", command=self._run_space_report),
+        ]
+        for btn in self.buttons:
+            btn.pack(side=tk.LEFT, padx=3)
+        self.cancel_btn = ttk.Button(bar, text="Abbrechen", command=self._cancel, state="disabled")
+        self.cancel_btn.pack(side=tk.RIGHT, padx=3)
+
+        prog = ttk.Frame(self, padding=(6, 0))
+        prog.pack(fill=tk.X)
+        self.progress = ttk.Progressbar(prog, mode="indeterminate")
+        self.progress.pack(fill=tk.X)
+        self.status_var = tk.StringVar(value="Bereit")
+        ttk.Label(prog, textvariable=self.status_var, anchor="w").pack(fill=tk.X, pady=(2, 4))
+
+        paned = ttk.PanedWindow(self, orient=tk.VERTICAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=6, pady=(0, 6))
+
+        self.space_tree = ttk.Treeview(
+            paned, show="headings", height=8,
+            columns=("name", "type", "pages", "size", "share", "unused"),
+        )
+        for cid, text, width in (("name", "Name", 220), ("type", "Typ", 70), ("pages", "Seiten", 80),
+                                 ("size", "Größe", 90), ("share", "Anteil", 70), ("unused", "Ungenutzt", 90)):
+            self.space_tree.heading(cid, text=text)
+            self.space_tree.column(cid, width=width, anchor="w" if cid in ("name", "type") else "e")
+        paned.add(self.space_tree, weight=1)
+
+        self.output = tk.Text(paned, wrap=tk.NONE, font=("Consolas", 10), height=10,
+                              bg="#1e1e1e", fg="#d4d4d4")
+        paned.add(self.output, weight=1)
+
+    # ---------- Ablauf ----------
+    def _start(self, label: str, job: Callable[[sqlite3.Connection], Any],
+               on_done: Callable[[Any], None], writable: bool = False,
+               determinate: bool = False):
+        if self.task is not None:
+            return
+        if self.app.db_path != self.db_path:
+            messagebox.showwarning("Wartung", "Die Datenbank wurde inzwischen geschlossen.", parent=self)
+            return
+        self.task = BackgroundTask()
+        for btn in self.buttons:
+            btn.state(["disabled"])
+        self.cancel_btn.state(["!disabled"])
+        self.progress.configure(mode="determinate" if determinate else "indeterminate", value=0)
+        if not determinate:
+            self.progress.start(15)
+        self._label = label
+        self._log(f"-- {label} --")
+        self.app._run_background(job, lambda r: self._finish(on_done, r), self._failed,
+                                 task=self.task, writable=writable)
+        self._tick()
+
+    def _tick(self):
+        """Zeigt den Fortschritt, solange ein Job läuft."""
+        if self.task is None or not self.winfo_exists():
+            return
+        steps = f"{self.task.steps:,}".replace(",", ".")
+        text = f"{self._label} läuft … {self.task.elapsed:.1f} s, {steps} VM-Schritte"
+        if self._vacuum_target and self._vacuum_expected:
+            try:
+                written = os.path.getsize(self._vacuum_target)
+            except OSError:
+                written = 0
+            self.progress.configure(value=min(100.0, 100.0 * written / self._vacuum_expected))
+            text += f", {_format_bytes(written)} geschrieben"
+        self.status_var.set(text)
+        self.after(200, self._tick)
+
+    def _finish(self, on_done: Callable[[Any], None], result: Any):
+        elapsed = self.task.elapsed if self.task else 0.0
+        self._reset()
+        if not self.winfo_exists():
+            return
+        on_done(result)
+        self.status_var.set(f"{self._label} fertig in {elapsed:.1f} s")
+
+    def _failed(self, error: Exception):
+        cancelled = self.task is not None and self.task.cancelled
+        self._reset()
+        if not self.winfo_exists():
+            return
+        if cancelled:
+            self.status_var.set(f"{self._label} abgebrochen")
+            self._log("abgebrochen")
+        else:
+            self.status_var.set(f"{self._label} fehlgeschlagen")
+            self._log(f"Fehler: {error}")
+
+    def _reset(self):
+        self.task = None
+        self._vacuum_target = None
+        if not self.winfo_exists():
+            return
+        self.progress.stop()
+        for btn in self.buttons:
+            btn.state(["!disabled"])
+        self.cancel_btn.state(["disabled"])
+
+    def _cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def _on_close(self):
+        self._cancel()
+        self.destroy()
+
+    def _log(self, text: str):
+        self.output.insert(tk.END, text + "\n")
+        self.output.see(tk.END)
+
+    # ---------- Aktionen ----------
+    def _run_check(self, pragma: str):
+        def job(conn):
+            return [r[0] for r in conn.execute(f"PRAGMA {pragma}")]
+
+        def done(lines):
+            for line in lines:
+                self._log(line)
+
+        self._start(pragma, job, done)
+
+    def _run_analyze(self):
+        if not messagebox.askyesno(
+            "ANALYZE",
+            "ANALYZE schreibt Statistiken (sqlite_stat1) in die Datenbankdatei.\n"
+            "Dafür wird eine separate Schreibverbindung geöffnet.\n\nFortfahren?",
+            parent=self,
+        ):
+            return
+
+        def job(conn):
+            conn.execute("ANALYZE")
+            conn.commit()
+            return conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1 ORDER BY tbl, idx").fetchall()
+
+        def done(rows):
+            for tbl, idx, stat in rows:
+                self._log(f"{tbl:<30} {idx or '':<30} {stat}")
+
+        self._start("ANALYZE", job, done, writable=True)
+
+    def _run_vacuum_into(self):
+        base = os.path.splitext(os.path.basename(self.db_path))[0]
+        target = filedialog.asksaveasfilename(
+            parent=self,
+            title="Komprimierte Kopie speichern",
+            defaultextension=".db",
+            initialfile=f"{base}_vacuum.db",
+            filetypes=[("SQLite DB", "*.db *.sqlite *.sqlite3"), ("Alle Dateien", "*.*")],
+        )
+        if not target:
+            return
+        if os.path.abspath(target) == os.path.abspath(self.db_path):
+            messagebox.showerror("VACUUM INTO", "Ziel darf nicht die geöffnete Datei sein.", parent=self)
+            return
+        if os.path.exists(target):
+            # VACUUM INTO verweigert existierende, nicht leere Dateien
+            os.remove(target)
+
+        def job(conn):
+            conn.execute("VACUUM INTO ?", (target,))
+            return os.path.getsize(target)
+
+        def done(size):
+            original = os.path.getsize(self.db_path)
+            self.progress.configure(value=100)
+            self._log(f"{target}\n{_format_bytes(original)} → {_format_bytes(size)}")
+
+        # Erwartete Größe: belegte Seiten ohne Freelist
+        try:
+            conn = connect_readonly(self.db_path)
+            try:
+                page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                used = conn.execute("PRAGMA page_count").fetchone()[0] \
+                    - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            finally:
+                conn.close()
+            self._vacuum_expected = max(1, used * page_size)
+        except sqlite3.Error:
+            self._vacuum_expected = 0
+        self._vacuum_target = target
+        self._start("VACUUM INTO", job, done, determinate=bool(self._vacuum_expected))
+
+    def _run_space_report(self):
+        def done(result):
+            summary, rows = result
+            page_size = summary["page_size"]
+            total = summary["page_count"] * page_size
+            free = summary["freelist_count"] * page_size
+            self._log(f"Seitengröße: {page_size} B, Seiten: {summary['page_count']}, "
+                      f"Datei: {_format_bytes(total)}, frei (Freelist): {_format_bytes(free)} "
+                      f"({100.0 * free / total if total else 0:.1f} %)")
+            self.space_tree.delete(*self.space_tree.get_children())
+            if not rows:
+                self._log("dbstat ist in dieser SQLite-Version nicht verfügbar.")
+            for name, kind, pages, size, unused in rows:
+                share = f"{100.0 * size / total:.1f} %" if total else ""
+                self.space_tree.insert("", tk.END, values=(
+                    name, kind, pages, _format_bytes(size), share, _format_bytes(unused)))
+
+        self._start("Speicherbelegung", space_report, done)
+
+
 if __name__ == "__main__":
     app = SqlViewer()
     app.mainloop()
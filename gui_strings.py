@@ -0,0 +1,176 @@
+"""
+gui_strings.py - GUI-Strings aus Python-Quelltext extrahieren
+=============================================================
+Gemeinsamer Scanner fuer translator.py (Laufzeit) und
+manage_translations.py (CLI / pre-commit Hook).
+
+Die Strings werden per AST extrahiert (Tk: text=/label=/title=, Qt:
+setText/QLabel/..., messagebox-Aufrufe). Optional werden die Ergebnisse
+pro Datei mit Inhalts-Hash in einer Cache-Datei gehalten: unveraenderte
+Dateien werden uebersprungen, geaenderte bei Bedarf parallel im
+Prozess-Pool analysiert. Ohne cache_file schreibt der Scan nichts.
+"""
+
+import ast
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Bei Aenderungen an der Extraktion erhoehen, damit alte Caches verworfen werden
+CACHE_VERSION = 1
+
+# Ab dieser Anzahl geaenderter Dateien lohnt sich der Start eines Prozess-Pools
+PARALLEL_THRESHOLD = 16
+
+SKIP_DIRS = {'build', 'dist', 'venv', '.venv', '__pycache__', 'releases'}
+
+# Keyword-Argumente, deren String-Wert GUI-Text ist (Tk/ttk und Qt)
+TEXT_KEYWORDS = {"text", "label", "title", "message"}
+
+# Aufrufe mit GUI-Text als Positionsargument: Name -> Argument-Indizes
+TEXT_CALLS = {
+    "setText": (0,),
+    "setWindowTitle": (0,),
+    "setToolTip": (0,),
+    "setPlaceholderText": (0,),
+    "QLabel": (0,),
+    "QPushButton": (0,),
+    "QAction": (0,),
+    "addAction": (0, 1),
+    "addMenu": (0, 1),
+    "addTab": (1,),
+    "title": (0,),
+    "showinfo": (0, 1),
+    "showwarning": (0, 1),
+    "showerror": (0, 1),
+    "askyesno": (0, 1),
+    "askokcancel": (0, 1),
+}
+
+
+def _call_name(func):
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+def extract_strings(source):
+    """Liefert alle String-Literale, die als GUI-Text verwendet werden."""
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return []
+
+    found = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        candidates = [kw.value for kw in node.keywords if kw.arg in TEXT_KEYWORDS]
+        positions = TEXT_CALLS.get(_call_name(node.func), ())
+        candidates.extend(node.args[i] for i in positions if i < len(node.args))
+        for value in candidates:
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                text = value.value.strip()
+                if text:
+                    found.append(text)
+    return found
+
+
+def _extract_file(path):
+    """Worker: liest eine Datei und liefert (Pfad, Hash, Strings)."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return path, None, []
+    digest = hashlib.sha1(data).hexdigest()
+    try:
+        source = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return path, digest, []
+    return path, digest, extract_strings(source)
+
+
+def _iter_py_files(source_dir):
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for file in files:
+            if file.endswith(".py"):
+                yield os.path.join(root, file)
+
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
+
+
+def _save_cache(cache_file, entries):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": entries}, f, ensure_ascii=False)
+
+
+def scan_strings(source_dir, cache_file=None, jobs=None):
+    """
+    Extrahiert GUI-Strings aller .py-Dateien unter source_dir.
+
+    Mit cache_file kommen unveraenderte Dateien (gleiche Groesse/mtime bzw.
+    gleicher Inhalts-Hash) aus dem Cache, der danach aktualisiert wird;
+    geaenderte werden ab PARALLEL_THRESHOLD Dateien auf einen Prozess-Pool
+    verteilt.
+
+    Returns:
+        (strings, stats) - Menge aller Kandidaten und Zaehler fuer die Ausgabe
+    """
+    cached = _load_cache(cache_file) if cache_file else {}
+
+    entries = {}
+    changed = []
+    for path in _iter_py_files(source_dir):
+        rel = os.path.relpath(path, source_dir)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entry = cached.get(rel)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            entries[rel] = entry
+        else:
+            changed.append((rel, path, st))
+
+    if len(changed) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_extract_file, [p for _, p, _ in changed], chunksize=8))
+    else:
+        results = [_extract_file(p) for _, p, _ in changed]
+
+    reparsed = 0
+    for (rel, _, st), (_, digest, strings) in zip(changed, results):
+        if digest is None:
+            continue
+        old = cached.get(rel)
+        if old and old["sha1"] == digest:
+            # Nur Zeitstempel geaendert (z.B. git checkout): Ergebnis weiterverwenden
+            strings = old["strings"]
+        else:
+            reparsed += 1
+        entries[rel] = {"size": st.st_size, "mtime": st.st_mtime_ns,
+                        "sha1": digest, "strings": strings}
+
+    if cache_file and (changed or len(entries) != len(cached)):
+        _save_cache(cache_file, entries)
+
+    strings = set()
+    for entry in entries.values():
+        strings.update(entry["strings"])
+    stats = {"files": len(entries), "changed": len(changed), "reparsed": reparsed}
+    return strings, stats
@@ -3,62 +3,34 @@ manage_translations.py - Auto-Scanner fuer deutsche GUI-Strings
 ================================================================
 Findet deutsche Strings in .py-Dateien und pflegt locales/translations.json.
 
+Die Strings extrahiert gui_strings per AST (Tk: text=/label=/title=, Qt:
+setText/QLabel/..., messagebox-Aufrufe); deutsch ist, was translator.is_german
+erkennt. Ergebnisse werden pro Datei mit Inhalts-Hash in
+locales/.scan_cache.json gecacht: unveraenderte Dateien werden uebersprungen,
+geaenderte bei Bedarf parallel im Prozess-Pool analysiert. Damit eignet sich
+der Scan auch als pre-commit Hook.
+
 Verwendung:
-    python manage_translations.py [--dir PROJEKTVERZEICHNIS]
+    python manage_translations.py [PROJEKTVERZEICHNIS] [--no-cache] [--jobs N]
 """
 
+import argparse
 import json
-import re
 import os
 import sys
 
+from gui_strings import scan_strings
+from translator import is_german
+
 TRANSLATION_FILE = "locales/translations.json"
+CACHE_FILE = "locales/.scan_cache.json"
+
+
+def _cache_file(source_dir, use_cache):
+    return os.path.join(source_dir, CACHE_FILE) if use_cache else None
+
 
-STRING_PATTERNS = [
-    re.compile(r'text\s*=\s*"([^"]+)"'),
-    re.compile(r'setText\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-    re.compile(r'setWindowTitle\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-    re.compile(r'QLabel\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-    re.compile(r'QPushButton\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-]
-
-GERMAN_HINTS = [
-    "datei", "filter", "fehler", "laden", "speichern",
-    "ansicht", "optionen", "zurueck", "anzeigen", "export",
-    "import", "einstellungen", "abbrechen", "hilfe", "bearbeiten",
-    "oeffnen", "schliessen", "start", "aktualisieren",
-]
-
-
-def is_german(text):
-    if any(ch in text for ch in "\u00e4\u00f6\u00fc\u00c4\u00d6\u00dc\u00df"):
-        return True
-    text_lower = text.lower()
-    return any(w in text_lower for w in GERMAN_HINTS)
-
-
-def find_german_strings(source_dir):
-    german_strings = set()
-    skip_dirs = {'build', 'dist', 'venv', '.venv', '__pycache__', 'releases'}
-
-    for root, dirs, files in os.walk(source_dir):
-        dirs[:] = [d for d in dirs if d not in skip_dirs]
-        for file in files:
-            if file.endswith(".py"):
-                path = os.path.join(root, file)
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                except Exception:
-                    continue
-                for pattern in STRING_PATTERNS:
-                    for match in pattern.findall(content):
-                        if is_german(match):
-                            german_strings.add(match.strip())
-    return german_strings
-
-
-def manage_translations(source_dir="."):
+def manage_translations(source_dir=".", use_cache=True, jobs=None):
     trans_file = os.path.join(source_dir, TRANSLATION_FILE)
 
     if os.path.exists(trans_file):
@@ -67,7 +39,8 @@ def manage_translations(source_dir="."):
     else:
         translations = {}
 
-    found = find_german_strings(source_dir)
+    strings, stats = scan_strings(source_dir, _cache_file(source_dir, use_cache), jobs)
+    found = {s for s in strings if is_german(s)}
 
     added = []
     for s in sorted(found):
@@ -75,9 +48,13 @@ def manage_translations(source_dir="."):
             translations[s] = {"de": s, "en": ""}
             added.append(s)
 
-    os.makedirs(os.path.dirname(trans_file), exist_ok=True)
-    with open(trans_file, "w", encoding="utf-8") as f:
-        json.dump(translations, f, indent=2, ensure_ascii=False)
+    if added or not os.path.exists(trans_file):
+        os.makedirs(os.path.dirname(trans_file), exist_ok=True)
+        with open(trans_file, "w", encoding="utf-8") as f:
+            json.dump(translations, f, indent=2, ensure_ascii=False)
+
+    print(f"[i] {stats['files']} Dateien, {stats['changed']} geaendert, "
+          f"{stats['reparsed']} neu analysiert")
 
     if added:
         print(f"[+] {len(added)} neue Eintraege hinzugefuegt:")
@@ -97,6 +74,17 @@ def manage_translations(source_dir="."):
     print(f"\n[i] Gesamt: {len(translations)} Strings in {trans_file}")
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deutsche GUI-Strings finden und translations.json pflegen")
+    parser.add_argument("directory", nargs="?", default=None, help="Projektverzeichnis (default: .)")
+    parser.add_argument("--dir", dest="dir_opt", default=None, help="Projektverzeichnis")
+    parser.add_argument("--no-cache", action="store_true", help="Alle Dateien neu analysieren")
+    parser.add_argument("--jobs", type=int, default=None, help="Anzahl Worker-Prozesse (1 = seriell)")
+    args = parser.parse_args(argv)
+
+    target = args.dir_opt or args.directory or "."
+    manage_translations(target, use_cache=not args.no_cache, jobs=args.jobs)
+
+
 if __name__ == "__main__":
-    target = sys.argv[1] if len(sys.argv) > 1 else "."
-    manage_translations(target)
+    main(sys.argv[1:])
@@ -11,24 +11,72 @@ from translator import TranslationSystem
 translator = TranslationSystem('de')
 label.setText(translator.t('Datei oeffnen'))
 translator.set_language('en')
+
+Neue Keys werden nur im Speicher gesammelt und per Timer bzw. beim
+Beenden (atexit) gebuendelt nach locales/translations.json geschrieben;
+translator.flush() erzwingt das Speichern sofort.
 """
 
+import atexit
 import json
+import os
 import re
+import threading
+import weakref
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
+
+LANGUAGES = ('de', 'en')
+
+# Woran deutsche Texte erkannt werden (Umlaute/ß oder eines dieser Woerter);
+# die einzige Liste, auch manage_translations nutzt sie
+GERMAN_HINTS = [
+    "datei", "bearbeiten", "ansicht", "hilfe", "oeffnen", "speichern",
+    "schliessen", "einstellungen", "abbrechen", "ok", "ja", "nein",
+    "start", "stop", "pause", "fortsetzen", "laden", "aktualisieren",
+    "filter", "fehler", "export", "import", "optionen", "anzeigen", "zurueck",
+]
+
+# Ein einziger Regex statt Umlaut-Test + Substring-Schleife pro Aufruf
+GERMAN_RE = re.compile(
+    "[\u00e4\u00f6\u00fc\u00c4\u00d6\u00dc\u00df]|"
+    + "|".join(re.escape(h) for h in GERMAN_HINTS),
+    re.IGNORECASE,
+)
+
+
+def is_german(text: str) -> bool:
+    return GERMAN_RE.search(text) is not None
+
+
+# So viele unbekannte, nicht-deutsche Keys (Zahlen, Pfade, ...) merkt sich t()
+MISS_CACHE_SIZE = 1024
+
+# Alle Instanzen; ein einziger atexit-Hook speichert sie beim Beenden
+_instances: "weakref.WeakSet[TranslationSystem]" = weakref.WeakSet()
+
+
+def _flush_all():
+    for translator in list(_instances):
+        translator.flush()
+
+
+atexit.register(_flush_all)
 
 
 class TranslationSystem:
     """Multi-Language Support System v1.0"""
 
-    def __init__(self, default_lang: str = 'de', app_dir: Path = None):
+    def __init__(self, default_lang: str = 'de', app_dir: Path = None,
+                 flush_interval: Optional[float] = 5.0):
         """
         Initialisiert Translation-System.
 
         Args:
             default_lang: Standard-Sprache ('de' oder 'en')
             app_dir: Verzeichnis der Anwendung (default: aktuelles Verzeichnis)
+            flush_interval: Sekunden bis neue Keys gesammelt auf Platte
+                geschrieben werden (None = nur beim Beenden)
         """
         self.current_lang = default_lang
 
@@ -38,24 +86,19 @@ class TranslationSystem:
 
         self.translations_file = self.app_dir / "locales" / "translations.json"
 
-        self.string_patterns = [
-            re.compile(r'setText\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-            re.compile(r'setWindowTitle\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-            re.compile(r'QLabel\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-            re.compile(r'QPushButton\s*\(\s*["\']([^"\']+)["\']\s*\)'),
-            re.compile(r'addAction\s*\([^,]*["\']([^"\']+)["\']\s*\)'),
-            re.compile(r'addTab\s*\([^,]+,\s*["\']([^"\']+)["\']\s*\)'),
-            re.compile(r'text\s*=\s*"([^"]+)"'),
-        ]
-
-        self.german_hints = [
-            "datei", "bearbeiten", "ansicht", "hilfe", "oeffnen", "speichern",
-            "schliessen", "einstellungen", "abbrechen", "ok", "ja", "nein",
-            "start", "stop", "pause", "fortsetzen", "laden", "aktualisieren",
-            "filter", "fehler", "export", "import", "optionen", "anzeigen",
-        ]
+        self.german_hints = GERMAN_HINTS
+
+        # Write-behind: neue Keys werden gesammelt und gebuendelt gespeichert
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        _instances.add(self)
 
         self.translations = {}
+        self._lookup: Dict[str, Dict[str, str]] = {}
+        self._active: Dict[str, str] = {}
+        self._misses: Dict[str, None] = {}  # nicht-deutsche Keys im Lookup, aelteste zuerst
         self._load_translations()
 
     def _load_translations(self):
@@ -67,11 +110,50 @@ class TranslationSystem:
                 self.translations = {}
         else:
             self.translations = {}
+        self._build_lookup()
+
+    def _build_lookup(self):
+        """Baut je Sprache eine flache Key->Text Tabelle fuer t()."""
+        self._lookup = {lang: {} for lang in LANGUAGES}
+        self._misses = {}
+        for key, entry in self.translations.items():
+            self._index_entry(key, entry)
+        self._active = self._lookup.get(self.current_lang, {})
+
+    def _index_entry(self, key: str, entry: Dict[str, str]):
+        for lang, table in self._lookup.items():
+            # Leere Uebersetzungen fallen wie fehlende auf den Key zurueck
+            table[key] = entry.get(lang) or key
 
     def _save_translations(self):
-        self.translations_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.translations_file, 'w', encoding='utf-8') as f:
-            json.dump(self.translations, f, indent=2, ensure_ascii=False)
+        # Komplett unter dem Lock: Timer, atexit und add_translation schreiben
+        # sonst womoeglich einen aelteren Stand ueber einen neueren
+        with self._lock:
+            self._dirty = False
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            data = json.dumps(self.translations, indent=2, ensure_ascii=False)
+            self.translations_file.parent.mkdir(parents=True, exist_ok=True)
+            # Erst in eine Temp-Datei, dann atomar ersetzen: nie eine halbe Datei
+            tmp = self.translations_file.with_name(f"{self.translations_file.name}.{os.getpid()}.tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp, self.translations_file)
+
+    def _schedule_flush(self):
+        """Merkt neue Keys vor; geschrieben wird per Timer oder beim Beenden."""
+        self._dirty = True
+        if self.flush_interval is None or self._flush_timer is not None:
+            return
+        self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+
+    def flush(self):
+        """Schreibt gesammelte neue Keys nach translations.json (falls vorhanden)."""
+        if self._dirty:
+            self._save_translations()
 
     def t(self, key: str) -> str:
         """
@@ -83,24 +165,45 @@ class TranslationSystem:
         Returns:
             Uebersetzter Text oder Key als Fallback
         """
-        if key in self.translations:
-            return self.translations[key].get(self.current_lang, key)
-
-        if self._is_german(key):
-            self.translations[key] = {"de": key, "en": ""}
-            self._save_translations()
-
+        text = self._active.get(key)
+        if text is None:
+            text = self._miss(key)
+        return text
+
+    def _miss(self, key: str) -> str:
+        """Unbekannter Key: einmalig pruefen und in die Lookup-Tabellen aufnehmen."""
+        with self._lock:
+            if self._is_german(key):
+                if key not in self.translations:
+                    self.translations[key] = {"de": key, "en": ""}
+                    self._schedule_flush()
+                self._index_entry(key, self.translations[key])
+                return key
+            # Nicht-deutsche Keys nur begrenzt merken: dynamische Texte wuerden
+            # den Lookup sonst unbegrenzt wachsen lassen
+            for table in self._lookup.values():
+                table.setdefault(key, key)
+            self._misses[key] = None
+            if len(self._misses) > MISS_CACHE_SIZE:
+                oldest = next(iter(self._misses))
+                del self._misses[oldest]
+                if oldest not in self.translations:  # inzwischen echt uebersetzt?
+                    for table in self._lookup.values():
+                        table.pop(oldest, None)
         return key
 
     def set_language(self, lang: str):
-        if lang in ['de', 'en']:
+        if lang in LANGUAGES:
             self.current_lang = lang
+            self._active = self._lookup[lang]
 
     def get_language(self) -> str:
         return self.current_lang
 
     def add_translation(self, key: str, de: str, en: str):
-        self.translations[key] = {"de": de, "en": en}
+        with self._lock:
+            self.translations[key] = {"de": de, "en": en}
+            self._index_entry(key, self.translations[key])
         self._save_translations()
 
     def scan_and_update(self, project_dir: Path = None) -> Dict:
@@ -111,10 +214,12 @@ class TranslationSystem:
         found_strings = self._find_german_strings(project_dir)
 
         added = []
-        for string in sorted(found_strings):
-            if string not in self.translations:
-                self.translations[string] = {"de": string, "en": ""}
-                added.append(string)
+        with self._lock:
+            for string in sorted(found_strings):
+                if string not in self.translations:
+                    self.translations[string] = {"de": string, "en": ""}
+                    self._index_entry(string, self.translations[string])
+                    added.append(string)
 
         if added:
             self._save_translations()
@@ -124,30 +229,15 @@ class TranslationSystem:
         return {'added': added, 'missing': missing, 'total': len(self.translations)}
 
     def _find_german_strings(self, directory: Path) -> Set[str]:
-        german_strings = set()
-        skip_dirs = {'build', 'dist', 'venv', '.venv', '__pycache__', 'releases'}
-
-        for py_file in directory.rglob("*.py"):
-            if any(folder in py_file.parts for folder in skip_dirs):
-                continue
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            except Exception:
-                continue
-
-            for pattern in self.string_patterns:
-                for match in pattern.findall(content):
-                    if match and self._is_german(match):
-                        german_strings.add(match.strip())
+        # Gemeinsamer AST-Scanner, ohne Cache-Datei: der Scan zur Laufzeit
+        # schreibt nichts ins Projekt (lazy: t() braucht ihn nicht)
+        from gui_strings import scan_strings
 
-        return german_strings
+        strings, _ = scan_strings(str(directory))
+        return {s for s in strings if is_german(s)}
 
     def _is_german(self, text: str) -> bool:
-        if any(ch in text for ch in "\u00e4\u00f6\u00fc\u00c4\u00d6\u00dc\u00df"):
-            return True
-        text_lower = text.lower()
-        return any(hint in text_lower for hint in self.german_hints)
+        return is_german(text)
 
     def get_missing_translations(self) -> List[str]:
         return [k for k, v in self.translations.items() if not v.get("en")]